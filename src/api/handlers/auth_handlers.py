@@ -4,34 +4,35 @@ from typing import Dict, Any
 
 # Core components
 from core.services.auth_service import AuthService
-from core.exceptions.auth_errors import UserAlreadyExistsError, InvalidCredentialsError
+from core.exceptions.auth_errors import UserAlreadyExistsError, InvalidCredentialsError, PasswordHashingUnavailableError
 
 # Infrastructure components
 from infrastructure.database.mongo_repositories import MongoUserRepository
-from infrastructure.auth.jwt_provider import JWTProvider
+from infrastructure.auth.jwt_provider import get_jwt_provider
+from infrastructure.auth.password_hasher import BcryptWorkerPool
+from infrastructure.monitoring.server_timing import timed
 
 from api.utils.responses import success, error
+from api.utils.events import get_json_body
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 try:
     user_repository = MongoUserRepository()
-    auth_service = AuthService(repository=user_repository)
-    jwt_provider = JWTProvider()
+    password_hasher = BcryptWorkerPool()
+    auth_service = AuthService(repository=user_repository, password_hasher=password_hasher)
+    jwt_provider = get_jwt_provider()
 except Exception as setup_error:
     raise setup_error
 
-def register_user(event: Dict[str, Any], context: Any) -> Dict:
+async def register_user(event: Dict[str, Any], context: Any) -> Dict:
     try:
-        body_str = event.get("body")
-        if not body_str:
-            return error(400, "Request body is missing")
         try:
-            body = json.loads(body_str)
+            body = get_json_body(event)
         except json.JSONDecodeError:
             return error(400, "Invalid JSON format")
+        if body is None:
+            return error(400, "Request body is missing")
         
         email = body.get("email")
         password = body.get("password")
@@ -39,8 +40,9 @@ def register_user(event: Dict[str, Any], context: Any) -> Dict:
         if not email or not password:
             return error(400, "Email and password are required")
         
-        user = auth_service.register_user(email, password)
-        token = jwt_provider.generate_token(user)
+        user = await auth_service.register_user(email, password)
+        with timed("auth"):
+            token = jwt_provider.generate_token(user)
 
 
         response_data = {"email": user.email, "token": token} 
@@ -49,21 +51,22 @@ def register_user(event: Dict[str, Any], context: Any) -> Dict:
 
     except UserAlreadyExistsError as e:
         return error(409, str(e))
+    except PasswordHashingUnavailableError as e:
+        return _service_busy(e)
     except ValueError as e:
         return error(400, str(e))
     except Exception as e:
         return error(500, "Internal server error")
 
-def login_user(event: Dict[str, Any], context: Any) -> Dict:
+async def login_user(event: Dict[str, Any], context: Any) -> Dict:
     """Iniciar sesión"""
     try:
-        body_str = event.get("body")
-        if not body_str:
-            return error(400, "Request body is missing")
         try:
-            body = json.loads(body_str)
+            body = get_json_body(event)
         except json.JSONDecodeError:
             return error(400, "Invalid JSON format")
+        if body is None:
+            return error(400, "Request body is missing")
 
         email = body.get("email")
         password = body.get("password")
@@ -72,10 +75,11 @@ def login_user(event: Dict[str, Any], context: Any) -> Dict:
             return error(400, "Email and password are required")
 
         # Use the pre-initialized auth_service
-        user = auth_service.authenticate_user(email, password)
+        user = await auth_service.authenticate_user(email, password)
 
         # Generate token
-        token = jwt_provider.generate_token(user)
+        with timed("auth"):
+            token = jwt_provider.generate_token(user)
 
         # Return success response including the token and relevant user info
         response_data = {"email": user.email,"token": token}
@@ -85,8 +89,16 @@ def login_user(event: Dict[str, Any], context: Any) -> Dict:
     except InvalidCredentialsError as e:
         # Use 401 Unauthorized for invalid credentials
         return error(401, str(e))
+    except PasswordHashingUnavailableError as e:
+        # Fail fast while the hashing pool is saturated instead of queueing
+        return _service_busy(e)
     except ValueError as e: # Catch other validation errors
         return error(400, str(e))
     except Exception as e:
         # Log the full exception for unexpected errors
-        return error(500, "Internal server error")
\ No newline at end of file
+        return error(500, "Internal server error")
+
+def _service_busy(e: PasswordHashingUnavailableError) -> Dict:
+    response = error(503, str(e))
+    response["headers"]["Retry-After"] = "1"
+    return response
\ No newline at end of file
@@ -1,111 +1,142 @@
 import logging
-from typing import Dict, Any, List
+from typing import Awaitable, Callable, Dict, Any, List
 from pydantic import ValidationError
 import json
+import os
 
-from core.services.task_service import TaskService
-from core.entities.task import Task, TaskUpdate
-from core.exceptions.task_errors import TaskNotFoundError, TaskPermissionError
+from core.services.task_service import TaskService, DEFAULT_PAGE_SIZE, DEFAULT_MAX_BATCH_SIZE
+from core.entities.task import Task, TaskUpdate, TaskPage, TaskChanges, TaskBatchResult
+from core.exceptions.task_errors import (TaskNotFoundError, TaskPermissionError, InvalidCursorError,
+                                         InvalidSyncTokenError, SyncTokenExpiredError, BatchTooLargeError)
 from core.exceptions.auth_errors import AuthenticationError
 
+from infrastructure.cache.cached_task_repository import CachedTaskRepository, DEFAULT_MAX_TASKS
+from infrastructure.cache.task_list_cache import task_list_cache_from_env
 from infrastructure.database.mongo_repositories import MongoTaskRepository
-from infrastructure.auth.jwt_provider import JWTProvider
-from api.utils.responses import success, error
+from infrastructure.database.write_coalescer import DEFAULT_MAX_ITEMS
+from infrastructure.monitoring.server_timing import timed
+from api.utils.etags import body_etag, etag_matches, list_etag
+from api.utils.responses import success, error, not_modified
+from api.utils.events import get_header, get_json_body, get_principal_email
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 try:
-    task_repository = MongoTaskRepository()
-    task_service = TaskService(repository=task_repository)
-    jwt_provider = JWTProvider()
+    task_repository = MongoTaskRepository(insert_delay_ms=float(os.getenv("TASK_INSERT_COALESCE_MS", "0")),
+                                          insert_max_batch=int(os.getenv("TASK_INSERT_COALESCE_MAX", DEFAULT_MAX_ITEMS)))
+    task_list_cache = task_list_cache_from_env()
+    if task_list_cache is not None:
+        task_repository = CachedTaskRepository(
+            task_repository, task_list_cache, int(os.getenv("TASK_CACHE_MAX_TASKS", DEFAULT_MAX_TASKS)))
+    task_service = TaskService(repository=task_repository,
+                               max_batch_size=int(os.getenv("TASK_BATCH_MAX_ITEMS", DEFAULT_MAX_BATCH_SIZE)))
 except Exception as setup_error:
-    logger.error(f"Error setting up task handlers dependencies: {setup_error}")
+    logger.error("Error setting up task handlers dependencies: %s", setup_error)
     raise setup_error
 
-def get_tasks(event: Dict[str, Any], context: Any) -> Dict:
+async def get_tasks(event: Dict[str, Any], context: Any) -> Dict:
     try:
-        # 1. Extract Token from headers
-        headers = event.get("headers", {})
-        auth_header = headers.get("authorization", headers.get("Authorization"))
-
-        if not auth_header or not auth_header.startswith("Bearer "):
-            logger.warning("Missing or invalid Authorization header")
-            return error(401, "Authorization header missing or invalid")
-
-        token = auth_header.split(" ")[1]
-
-        # 2. Decode Token using JWTProvider
-        user = jwt_provider.decode_token(token)
-
-        # 3. Check if token decoding was successful
-        if user is None:
-            logger.warning("Token validation failed (invalid, expired, or other error)")
-            return error(401, "Invalid or expired token")
-
-        # 4. Proceed with getting tasks if user is valid
-        user_email = user.get("email")
+        user_email = get_principal_email(event)
         if not user_email:
-             logger.error("Token payload does not contain email")
-             return error(401, "Invalid token payload")
-
-        logger.info(f"Authenticated user: {user_email}")
+            return error(401, "Authorization header missing or invalid")
 
-        tasks: List[Task] = task_service.get_user_tasks(user_email=user_email)
+        # Read pagination parameters
+        params = event.get("queryStringParameters") or {}
+        try:
+            limit = int(params.get("limit", DEFAULT_PAGE_SIZE))
+        except (TypeError, ValueError):
+            return error(400, "limit must be an integer")
+        if limit < 1:
+            return error(400, "limit must be a positive integer")
+
+        # The list version alone decides whether the client's copy is current,
+        # so a 304 costs one point read and no task is loaded or serialized
+        cursor = params.get("cursor")
+        version = await task_service.get_list_version(user_email)
+        etag = list_etag(user_email, version, limit, cursor)
+        if etag_matches(get_header(event, "If-None-Match"), etag):
+            return not_modified(etag)
+
+        page: TaskPage = await task_service.get_user_tasks(user_email=user_email, limit=limit, cursor=cursor, version=version)
+        tasks: List[Task] = page.items
 
         tasks_data = [
             t.model_dump(exclude={"user_email"}) if hasattr(t, 'model_dump') else t.dict(exclude={"user_email"})
             for t in tasks
         ]
-        for i, task in enumerate(tasks):
-             tasks_data[i]['id'] = str(task.id)
 
-        return success(200, tasks_data)
+        response = success(200, tasks_data)
+        response["headers"]["ETag"] = etag
+        if page.next_cursor:
+            response["headers"]["X-Next-Cursor"] = page.next_cursor
+        return response
 
+    except InvalidCursorError as e:
+        return error(400, str(e))
     except TaskPermissionError as e:
-        logger.warning(f"Authentication error in get_tasks: {e}")
+        logger.warning("Authentication error in get_tasks: %s", e)
         return error(401, str(e))
     except Exception as e:
-        logger.error(f"Unexpected error in get_tasks: {e}", exc_info=True) # Log full traceback
+        logger.error("Unexpected error in get_tasks: %s", e, exc_info=True) # Log full traceback
         return error(500, "Internal server error")
 
-def create_task(event: Dict[str, Any], context: Any) -> Dict:
+async def get_task_changes(event: Dict[str, Any], context: Any) -> Dict:
     try:
-        headers = event.get("headers", {})
-        auth_header = headers.get("authorization", headers.get("Authorization"))
-        if not auth_header or not auth_header.startswith("Bearer "):
+        user_email = get_principal_email(event)
+        if not user_email:
             return error(401, "Authorization header missing or invalid")
-        token = auth_header.split(" ")[1]
-        user = jwt_provider.decode_token(token)
-        if user is None:
-            return error(401, "Invalid or expired token")
-        user_email = user.get("email")
+
+        params = event.get("queryStringParameters") or {}
+        try:
+            limit = int(params.get("limit", DEFAULT_PAGE_SIZE))
+        except (TypeError, ValueError):
+            return error(400, "limit must be an integer")
+        if limit < 1:
+            return error(400, "limit must be a positive integer")
+
+        changes: TaskChanges = await task_service.get_user_changes(user_email=user_email, since=params.get("since"), limit=limit)
+        return success(200, {
+            "tasks": [task.model_dump(exclude={"user_email"}) for task in changes.tasks],
+            "deleted": changes.deleted,
+            "sync_token": changes.sync_token,
+            "has_more": changes.has_more,
+        })
+
+    except InvalidSyncTokenError as e:
+        return error(400, str(e))
+    except SyncTokenExpiredError as e:
+        # The deletions since the token are no longer known; the client starts over
+        return error(410, str(e))
+    except Exception as e:
+        logger.error("Unexpected error in get_task_changes: %s", e, exc_info=True)
+        return error(500, "Internal server error")
+
+async def create_task(event: Dict[str, Any], context: Any) -> Dict:
+    try:
+        user_email = get_principal_email(event)
         if not user_email:
-             return error(401, "Invalid token payload")
-        logger.info(f"Authenticated user for create_task: {user_email}")
-        body_str = event.get("body")
-        if not body_str:
-            return error(400, "Request body is missing")
+            return error(401, "Authorization header missing or invalid")
         try:
-            body = json.loads(body_str)
+            body = get_json_body(event)
         except json.JSONDecodeError:
             return error(400, "Invalid JSON format")
+        if body is None:
+            return error(400, "Request body is missing")
 
         body["user_email"] = user_email
         title = body.get("title")
         description = body.get("description")
 
         try:
-            task_data = Task(**body)
+            with timed("validation"):
+                task_data = Task(**body)
         except ValidationError as e:
             return error(400, f"Validation Error: {e.errors()}")
 
-        new_task = task_service.create_task(title=title, user_email=user_email, description=description)
+        new_task = await task_service.create_task(title=title, user_email=user_email, description=description)
 
         # Serialize response
         response_data = new_task.model_dump(exclude={"user_email"}) if hasattr(new_task, 'model_dump') else new_task.dict(exclude={"user_email"})
-        response_data['id'] = str(new_task.id)
 
         return success(201, response_data)
 
@@ -114,87 +145,71 @@ def create_task(event: Dict[str, Any], context: Any) -> Dict:
     except ValidationError as e:
          return error(400, f"Creation Validation Error: {e.errors()}")
     except Exception as e:
-        logger.error(f"Unexpected error in create_task: {e}", exc_info=True)
+        logger.error("Unexpected error in create_task: %s", e, exc_info=True)
         return error(500, "Internal server error")
 
 
-def update_task(event: Dict[str, Any], context: Any) -> Dict:
+async def update_task(event: Dict[str, Any], context: Any) -> Dict:
     try:
-        headers = event.get("headers", {})
-        auth_header = headers.get("authorization", headers.get("Authorization"))
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return error(401, "Authorization header missing or invalid")
-        token = auth_header.split(" ")[1]
-        user = jwt_provider.decode_token(token)
-        if user is None:
-            return error(401, "Invalid or expired token")
-        user_email = user.get("email")
+        user_email = get_principal_email(event)
         if not user_email:
-             return error(401, "Invalid token payload")
-        logger.info(f"Authenticated user for update_task: {user_email}")
+            return error(401, "Authorization header missing or invalid")
 
         task_id = event.get("pathParameters", {}).get("taskId")
         if not task_id:
             return error(400, "Task ID missing in path")
 
-        body_str = event.get("body")
-        if not body_str:
-            return error(400, "Request body is missing")
         try:
-            body = json.loads(body_str)
+            body = get_json_body(event)
         except json.JSONDecodeError:
             return error(400, "Invalid JSON format")
+        if body is None:
+            return error(400, "Request body is missing")
 
         body.pop("user_email", None)
         body.pop("id", None)
 
         try:
-            update_data = TaskUpdate(**body).model_dump(exclude_unset=True)
+            with timed("validation"):
+                update_data = TaskUpdate(**body).model_dump(exclude_unset=True)
         except ValidationError as e:
             return error(400, f"Validation Error: {e.errors()}")
 
-        updated_task = task_service.update_task(task_id=task_id, updates=update_data, user_email=user_email)
+        updated_task = await task_service.update_task(task_id=task_id, updates=update_data, user_email=user_email)
 
         if updated_task is None:
              return error(404, f"Task with id {task_id} not found or not authorized to update.")
 
         response_data = updated_task.model_dump(exclude={"user_email"}) if hasattr(updated_task, 'model_dump') else updated_task.dict(exclude={"user_email"})
-        response_data['id'] = task_id
 
-        return success(200, response_data)
+        response = success(200, response_data)
+        response["headers"]["ETag"] = body_etag(response["body"])
+        return response
 
     except TaskNotFoundError:
         return error(404, f"Task with id {task_id} not found.")
+    except TaskPermissionError as e:
+        return error(403, str(e))
     except AuthenticationError as e:
         return error(403, str(e))
     except ValidationError as e:
          return error(400, f"Update Validation Error: {e.errors()}")
     except Exception as e:
-        logger.error(f"Unexpected error in update_task: {e}", exc_info=True)
+        logger.error("Unexpected error in update_task: %s", e, exc_info=True)
         return error(500, "Internal server error")
 
 
-def delete_task(event: Dict[str, Any], context: Any) -> Dict:
+async def delete_task(event: Dict[str, Any], context: Any) -> Dict:
     try:
-        headers = event.get("headers", {})
-        auth_header = headers.get("authorization", headers.get("Authorization"))
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return error(401, "Authorization header missing or invalid")
-        token = auth_header.split(" ")[1]
-        user = jwt_provider.decode_token(token)
-        if user is None:
-            return error(401, "Invalid or expired token")
-        user_email = user.get("email")
+        user_email = get_principal_email(event)
         if not user_email:
-             return error(401, "Invalid token payload")
-        logger.info(f"Authenticated user for delete_task: {user_email}")
-        # --- End Authentication Check ---
+            return error(401, "Authorization header missing or invalid")
 
         task_id = event.get("pathParameters", {}).get("taskId")
         if not task_id:
             return error(400, "Task ID missing in path")
 
-        deleted = task_service.delete_task(task_id=task_id, user_email=user_email)
+        deleted = await task_service.delete_task(task_id=task_id, user_email=user_email)
 
         if not deleted:
             # Task not found or user not authorized
@@ -205,8 +220,57 @@ def delete_task(event: Dict[str, Any], context: Any) -> Dict:
 
     except TaskNotFoundError:
          return error(404, f"Task with id {task_id} not found.")
+    except TaskPermissionError as e:
+        return error(403, str(e))
     except AuthenticationError as e:
         return error(403, str(e))
     except Exception as e:
-        logger.error(f"Unexpected error in delete_task: {e}", exc_info=True)
+        logger.error("Unexpected error in delete_task: %s", e, exc_info=True)
+        return error(500, "Internal server error")
+
+
+async def create_tasks_batch(event: Dict[str, Any], context: Any) -> Dict:
+    return await _run_batch(event, "tasks", task_service.create_tasks, "create_tasks_batch")
+
+
+async def update_tasks_batch(event: Dict[str, Any], context: Any) -> Dict:
+    return await _run_batch(event, "tasks", task_service.update_tasks, "update_tasks_batch")
+
+
+async def delete_tasks_batch(event: Dict[str, Any], context: Any) -> Dict:
+    return await _run_batch(event, "ids", task_service.delete_tasks, "delete_tasks_batch")
+
+
+async def _run_batch(event: Dict[str, Any], key: str,
+                     apply: Callable[..., Awaitable[List[TaskBatchResult]]], name: str) -> Dict:
+    """
+    Runs a batch request, {key: [...], "ordered": false}. The request as a
+    whole is answered 200 once it is well formed, whatever happened to its
+    items; each item's outcome is in "results", in the order of the request.
+    """
+    try:
+        user_email = get_principal_email(event)
+        if not user_email:
+            return error(401, "Authorization header missing or invalid")
+        try:
+            body = get_json_body(event)
+        except json.JSONDecodeError:
+            return error(400, "Invalid JSON format")
+        if body is None:
+            return error(400, "Request body is missing")
+        if not isinstance(body, dict) or not isinstance(body.get(key), list):
+            return error(400, f"Request body must hold a '{key}' list")
+        ordered = body.get("ordered", False)
+        if not isinstance(ordered, bool):
+            return error(400, "ordered must be a boolean")
+
+        results = await apply(user_email, body[key], ordered=ordered)
+        return success(200, {"results": [
+            result.model_dump(exclude={"task": {"user_email"}}) for result in results
+        ]})
+
+    except BatchTooLargeError as e:
+        return error(413, str(e))
+    except Exception as e:
+        logger.error("Unexpected error in %s: %s", name, e, exc_info=True)
         return error(500, "Internal server error")
@@ -1,40 +1,76 @@
-from api.handlers import task_handlers, auth_handlers
-
+# Handlers and body schemas are "module:attribute" references, so importing the
+# table does not import the handlers (and the database, auth and model code
+# behind them). api.routes.dispatcher resolves them at startup, or on the first
+# request for each route when STARTUP_MODE=lazy. "schema" validates the request
+# body before the handler runs, as the FastAPI routes in main.py do; "partial"
+# passes the handler only the fields the client set, as main.py does for updates.
 routes = [
     {
         "path": "/auth/register",
         "method": "POST",
-        "handler": auth_handlers.register_user,
-        "protected": False
+        "handler": "api.handlers.auth_handlers:register_user",
+        "protected": False,
+        "schema": "api.schemas.auth_schemas:UserRegisterSchema"
     },
     {
         "path": "/auth/login",
         "method": "POST",
-        "handler": auth_handlers.login_user,
-        "protected": False
+        "handler": "api.handlers.auth_handlers:login_user",
+        "protected": False,
+        "schema": "api.schemas.auth_schemas:UserLoginSchema"
     },
     {
         "path": "/tasks",
         "method": "GET",
-        "handler": task_handlers.get_tasks,
+        "handler": "api.handlers.task_handlers:get_tasks",
+        "protected": True
+    },
+    {
+        "path": "/tasks/changes",
+        "method": "GET",
+        "handler": "api.handlers.task_handlers:get_task_changes",
         "protected": True
     },
     {
         "path": "/tasks",
         "method": "POST",
-        "handler": task_handlers.create_task,
-        "protected": True
+        "handler": "api.handlers.task_handlers:create_task",
+        "protected": True,
+        "schema": "api.schemas.task_schemas:TaskCreateSchema"
+    },
+    {
+        "path": "/tasks:batch",
+        "method": "POST",
+        "handler": "api.handlers.task_handlers:create_tasks_batch",
+        "protected": True,
+        "schema": "api.schemas.task_schemas:TaskBatchCreateSchema"
+    },
+    {
+        "path": "/tasks:batch",
+        "method": "PATCH",
+        "handler": "api.handlers.task_handlers:update_tasks_batch",
+        "protected": True,
+        "schema": "api.schemas.task_schemas:TaskBatchUpdateSchema"
+    },
+    {
+        "path": "/tasks:batch",
+        "method": "DELETE",
+        "handler": "api.handlers.task_handlers:delete_tasks_batch",
+        "protected": True,
+        "schema": "api.schemas.task_schemas:TaskBatchDeleteSchema"
     },
     {
         "path": "/tasks/{taskId}",
         "method": "PUT",
-        "handler": task_handlers.update_task,
-        "protected": True
+        "handler": "api.handlers.task_handlers:update_task",
+        "protected": True,
+        "schema": "api.schemas.task_schemas:TaskUpdateSchema",
+        "partial": True
     },
     {
         "path": "/tasks/{taskId}",
         "method": "DELETE",
-        "handler": task_handlers.delete_task,
+        "handler": "api.handlers.task_handlers:delete_task",
         "protected": True
     }
-]
\ No newline at end of file
+]
@@ -0,0 +1,327 @@
+"""
+Direct API Gateway entry point built on the route table in api.routes.api_routes.
+
+The table is compiled once into a per-path lookup: a dict for static paths and
+a short list of regular expressions for paths with parameters. Each invocation
+then goes straight from the API Gateway proxy event to the Lambda-style
+handler, without the ASGI translation, the FastAPI request pipeline or the
+event that main.py rebuilds for its handlers. Protected routes are
+authenticated once with the shared principal helpers, and bodies are validated
+with the same schemas the FastAPI routes use.
+
+With lazy=True (STARTUP_MODE=lazy in lambda_handler.py) nothing beyond this
+module and the response helpers is imported at startup: each route's handler
+and schema, the auth helpers and the index registry are imported on first use,
+so a cold start only pays for the code its first request needs.
+
+With server_timing=True (SERVER_TIMING=true) each response carries a
+Server-Timing header with the request's phase breakdown, which is also logged
+(see infrastructure.monitoring.server_timing). Every invocation is also recorded
+in the process's request metrics and, with METRICS_MODE=emf (the default on
+Lambda), written out as one CloudWatch EMF line (see
+infrastructure.monitoring.request_metrics). Outside production a request can
+ask to be profiled (see infrastructure.monitoring.request_profiler).
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+import re
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from api.utils.events import get_json_body, principal_context
+from api.utils.imports import import_string
+from api.utils.responses import error
+from infrastructure.monitoring import server_timing as timing
+from infrastructure.monitoring.request_metrics import UNMATCHED_ROUTE, flush_emf, metrics_mode, request_metrics
+from infrastructure.monitoring.request_profiler import RequestProfiler
+
+logger = logging.getLogger(__name__)
+
+_PATH_PARAMETER = re.compile(r"\{(\w+)\}")
+# Same CORS policy as the CORSMiddleware in main.py
+_EXPOSE_HEADERS = "ETag, X-Next-Cursor, Server-Timing, X-Profile-Id, X-Profile-Status"
+_PREFLIGHT_METHODS = "DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the loop every invocation runs on. It lives for the whole process,
+    as the Mongo client and the hashing pool are bound to it; it is also set as
+    the current loop so Mangum shares it.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def _header(headers: Dict[str, str], name: str) -> Optional[str]:
+    """Case-insensitive lookup of a lower-case header name without copying the headers."""
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.title())
+        if value is None:
+            for key, candidate in headers.items():
+                if key.lower() == name:
+                    return candidate
+    return value
+
+
+def _load_route(route: Dict[str, Any]) -> None:
+    """Resolves a route's handler and schema references in place."""
+    for key in ("handler", "schema"):
+        if isinstance(route.get(key), str):
+            route[key] = import_string(route[key])
+    route["loaded"] = True
+
+
+class ApiGatewayDispatcher:
+    """
+    Lambda handler that dispatches API Gateway proxy events (REST v1 and HTTP
+    API v2 payloads) to the handlers of a route table.
+    """
+
+    def __init__(self, routes: List[Dict[str, Any]], base_path: Optional[str] = None, allowed_origin: Optional[str] = None,
+                 lazy: bool = False, server_timing: Optional[bool] = None, metrics: Optional[str] = None,
+                 profiler: Optional[RequestProfiler] = None):
+        """
+        Args:
+            routes: Route table entries with "path", "method", "handler",
+                "protected" and an optional body "schema". Handlers and schemas
+                may be objects or "module:attribute" references.
+            base_path: Custom domain base path to strip from request paths.
+            allowed_origin: CORS origin; defaults to FRONTEND_ORIGIN or "*".
+            lazy: Import handlers, schemas and helpers on first use instead of now.
+            server_timing: Add the Server-Timing header and log the phase
+                breakdown of every request; defaults to SERVER_TIMING.
+            metrics: "prometheus" to record request metrics in-process, "emf"
+                to also write them out per invocation, or "off"; defaults to
+                METRICS_MODE.
+            profiler: Profiles the requests that ask for it with the
+                X-Debug-Profile header; defaults to RequestProfiler.from_env(),
+                which is None (no profiling) unless it is configured.
+        """
+        self.base_path = "/" + base_path.strip("/") if base_path and base_path.strip("/") else ""
+        self.allowed_origin = allowed_origin or os.getenv("FRONTEND_ORIGIN", "*")
+        # path -> method -> route, for paths without parameters
+        self.static_routes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # (pattern, method -> route), for paths with parameters
+        self.dynamic_routes: List[Tuple[Pattern, Dict[str, Dict[str, Any]]]] = []
+
+        self.server_timing = server_timing if server_timing is not None else timing.enabled()
+        self.metrics = metrics or metrics_mode()
+        self.profiler = profiler or RequestProfiler.from_env()
+        self._provisioned = False
+
+        patterns: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for route in routes:
+            route = dict(route, loaded=False)
+            path = route["path"].rstrip("/") or "/"
+            method = route["method"].upper()
+            if _PATH_PARAMETER.search(path):
+                methods = patterns.setdefault(path, {})
+            else:
+                methods = self.static_routes.setdefault(path, {})
+            methods[method] = route
+        for path, methods in patterns.items():
+            regex = "".join(
+                f"(?P<{part}>[^/]+)" if i % 2 else re.escape(part)
+                for i, part in enumerate(_PATH_PARAMETER.split(path))
+            )
+            self.dynamic_routes.append((re.compile(regex + "$"), methods))
+
+        if not lazy:
+            self.load()
+
+    def load(self) -> None:
+        """Imports everything the routes need, so no request pays for an import."""
+        for methods in list(self.static_routes.values()) + [methods for _, methods in self.dynamic_routes]:
+            for route in methods.values():
+                _load_route(route)
+        import_string("infrastructure.auth.principal:get_current_user")
+        import_string("infrastructure.database.indexes:provision_indexes")
+        import_string("pydantic:ValidationError")
+
+    def __call__(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        return event_loop().run_until_complete(self.dispatch(event, context))
+
+    def match(self, path: str, method: Optional[str] = None) -> Tuple[Optional[Dict[str, Dict[str, Any]]], Dict[str, str]]:
+        """
+        Finds the routes registered for a path.
+
+        As in FastAPI, a path that matches a route without the method goes on
+        to the routes with parameters, so PUT /tasks/changes reaches
+        PUT /tasks/{taskId}; only if none of them has the method either is the
+        first match returned, to be answered 405.
+
+        Returns:
+            The method -> route mapping (None if no route has this path) and the
+            path parameters.
+        """
+        if self.base_path and (path == self.base_path or path.startswith(self.base_path + "/")):
+            path = path[len(self.base_path):]
+        path = path.rstrip("/") or "/"
+        first: Tuple[Optional[Dict[str, Dict[str, Any]]], Dict[str, str]] = (None, {})
+        methods = self.static_routes.get(path)
+        if methods is not None:
+            if method is None or method in methods:
+                return methods, {}
+            first = (methods, {})
+        for pattern, methods in self.dynamic_routes:
+            found = pattern.match(path)
+            if found:
+                if method is None or method in methods:
+                    return methods, found.groupdict()
+                if first[0] is None:
+                    first = (methods, found.groupdict())
+        return first
+
+    async def dispatch(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        """Handles one API Gateway proxy event and returns the proxy response."""
+        request_context = event.get("requestContext") or {}
+        method = event.get("httpMethod") or request_context.get("http", {}).get("method", "")
+        path = event.get("path") or event.get("rawPath") or "/"
+        methods, path_parameters = self.match(path, method)
+        call = self.route(event, context, method, methods, path_parameters)
+        if self.profiler is not None:
+            headers = event.get("headers") or {}
+            profile = self.profiler.requested(lambda name: _header(headers, name), request_context.get("stage"),
+                                              request_context.get("requestId"))
+            if profile is not None:
+                call = self.profiler.run_proxy(profile, call)
+        if not self.server_timing and self.metrics == "off":
+            return await call
+
+        route_path = next(iter(methods.values()))["path"] if methods else UNMATCHED_ROUTE
+        status_code = 500
+        record = self.metrics != "off"
+        if record:
+            request_metrics.started(method)
+        start = time.perf_counter()
+        try:
+            with timing.request() if self.server_timing else nullcontext() as timings:
+                response = await call
+            status_code = response["statusCode"]
+            if timings is not None:
+                response["headers"] = dict(response["headers"], **{
+                    "Server-Timing": timing.report(timings, method, path, status_code),
+                    "Timing-Allow-Origin": self.allowed_origin,
+                })
+            return response
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if record:
+                request_metrics.finished(method, route_path, status_code, duration_ms)
+            if self.metrics == "emf":
+                flush_emf(method, route_path, status_code, duration_ms)
+
+    async def route(self, event: Dict[str, Any], context: Any, method: str,
+                    methods: Optional[Dict[str, Dict[str, Any]]], path_parameters: Dict[str, str]) -> Dict[str, Any]:
+        """Runs the matched route (see match()) for one API Gateway proxy event and returns the proxy response."""
+        request_context = event.get("requestContext") or {}
+        path = event.get("path") or event.get("rawPath") or "/"
+        headers = event.get("headers") or {}
+        cors = self.cors_headers(headers)
+
+        if methods is None:
+            return self.finish(error(404, "Not Found"), cors)
+        if method == "OPTIONS" and _header(headers, "access-control-request-method"):
+            return self.preflight(headers, cors)
+        route = methods.get(method)
+        if route is None:
+            response = error(405, "Method Not Allowed")
+            response["headers"]["Allow"] = ", ".join(sorted(methods))
+            return self.finish(response, cors)
+        if not route["loaded"]:
+            _load_route(route)
+
+        handler_event = dict(event, pathParameters=path_parameters or event.get("pathParameters"))
+        if route["protected"]:
+            from core.exceptions.auth_errors import AuthenticationError
+            from infrastructure.auth.principal import get_current_user
+            try:
+                principal = get_current_user(event)
+            except AuthenticationError as e:
+                return self.finish(error(401, str(e)), cors)
+            handler_event["requestContext"] = dict(request_context, **principal_context(principal))
+
+        schema = route.get("schema")
+        if schema is not None:
+            body = event.get("body")
+            if body and event.get("isBase64Encoded"):
+                body = base64.b64decode(body)
+            try:
+                payload = get_json_body({"body": body})
+            except json.JSONDecodeError:
+                return self.finish(error(400, "Invalid JSON format"), cors)
+            from pydantic import ValidationError
+            try:
+                with timing.timed("validation"):
+                    handler_event["body"] = schema.model_validate(payload).model_dump(exclude_unset=route.get("partial", False))
+            except ValidationError as e:
+                return self.finish(error(422, {"detail": e.errors(include_url=False, include_context=False)}), cors)
+
+        # Only a request that reaches a handler waits for the indexes; 404s,
+        # preflights and rejected requests do not touch MongoDB
+        if not self._provisioned:
+            from infrastructure.database import indexes
+            self._provisioned = await indexes.provision_indexes()
+
+        try:
+            response = await route["handler"](handler_event, context)
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s: %s", method, path, e)
+            response = error(500, "Internal server error")
+        return self.finish(response, cors)
+
+    def cors_headers(self, headers: Dict[str, str]) -> Dict[str, str]:
+        """CORS response headers for a request, mirroring the CORSMiddleware configuration in main.py."""
+        origin = _header(headers, "origin")
+        if origin is None:
+            return {}
+        if self.allowed_origin == "*":
+            allow_origin = "*"
+        elif origin == self.allowed_origin:
+            allow_origin = origin
+        else:
+            return {}
+        return {
+            "Access-Control-Allow-Origin": allow_origin,
+            "Access-Control-Allow-Credentials": "true",
+            "Access-Control-Expose-Headers": _EXPOSE_HEADERS,
+            "Vary": "Origin",
+        }
+
+    def preflight(self, headers: Dict[str, str], cors: Dict[str, str]) -> Dict[str, Any]:
+        """Answers a CORS preflight request."""
+        if not cors:
+            return self.finish(error(400, "Disallowed CORS origin"), cors)
+        preflight_headers = dict(cors, **{
+            "Access-Control-Allow-Methods": _PREFLIGHT_METHODS,
+            "Access-Control-Max-Age": "600",
+        })
+        requested_headers = _header(headers, "access-control-request-headers")
+        if requested_headers:
+            preflight_headers["Access-Control-Allow-Headers"] = requested_headers
+        return {"statusCode": 204, "headers": preflight_headers, "body": "", "isBase64Encoded": False}
+
+    @staticmethod
+    def finish(response: Dict[str, Any], cors: Dict[str, str]) -> Dict[str, Any]:
+        """Turns a handler response into an API Gateway proxy response."""
+        headers = response.get("headers") or {}
+        if cors:
+            headers = dict(headers, **cors)
+        body = response.get("body")
+        return {
+            "statusCode": response.get("statusCode", 500),
+            "headers": headers,
+            "body": "" if body is None else body,
+            "isBase64Encoded": False,
+        }
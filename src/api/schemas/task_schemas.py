@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, AliasChoices
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 from bson import ObjectId
 
 class PyObjectId(ObjectId):
@@ -65,5 +65,39 @@ class TaskResponseSchema(TaskBaseSchema):
         populate_by_name = True
         json_encoders = {ObjectId: str}
 
+class TaskChangesResponseSchema(BaseModel):
+    """Schema for the changes to the user's tasks since a sync token."""
+    tasks: List[TaskResponseSchema] = Field(..., description="Tasks created or updated since the token, oldest change first")
+    deleted: List[str] = Field(..., description="Ids of the tasks deleted since the token")
+    sync_token: str = Field(..., description="Pass as `since` on the next call")
+    has_more: bool = Field(..., description="More changes follow; call again with sync_token right away")
+
+class TaskBatchCreateSchema(BaseModel):
+    """Schema for creating many tasks; each item is validated on its own and reported in the results."""
+    tasks: List[Dict[str, Any]] = Field(..., example=[{"title": "Comprar leche"}, {"title": "Comprar pan"}])
+    ordered: bool = Field(False, description="Stop at the first failed item; later items are not applied (424)")
+
+class TaskBatchUpdateSchema(BaseModel):
+    """Schema for updating many tasks; each item holds the task id and the fields to change."""
+    tasks: List[Dict[str, Any]] = Field(..., example=[{"id": "60d5ecf3a3b4b5b6c7d8e9f0", "completed": "finished"}])
+    ordered: bool = Field(False, description="Stop at the first failed item; later items are not applied (424)")
+
+class TaskBatchDeleteSchema(BaseModel):
+    """Schema for deleting many tasks by id."""
+    ids: List[Any] = Field(..., example=["60d5ecf3a3b4b5b6c7d8e9f0"])
+    ordered: bool = Field(False, description="Stop at the first failed item; later items are not applied (424)")
+
+class TaskBatchResultSchema(BaseModel):
+    """The outcome of one item of a batch request."""
+    index: int = Field(..., description="Position of the item in the request")
+    status: int = Field(..., description="HTTP status the item would have had as a single request", example=201)
+    id: Optional[str] = None
+    task: Optional[TaskResponseSchema] = None
+    error: Optional[str] = None
+
+class TaskBatchResponseSchema(BaseModel):
+    """Schema for the per-item results of a batch request, in request order."""
+    results: List[TaskBatchResultSchema]
+
 class ErrorDetailSchema(BaseModel):
     detail: str = Field(..., example="Task not found")
@@ -0,0 +1,32 @@
+import hashlib
+from typing import Optional
+
+def list_etag(user_email: str, version: int, limit: int, cursor: Optional[str]) -> str:
+    """
+    Builds the strong ETag of one page of a user's task list.
+
+    The list version changes with every write to the user's tasks, so the tag
+    is known before any task is loaded. The user and the page (limit and
+    cursor) are part of it, since each of them selects a different
+    representation.
+    """
+    key = f"{user_email}\0{version}\0{limit}\0{cursor or ''}".encode()
+    return f'"{hashlib.blake2b(key, digest_size=16).hexdigest()}"'
+
+def body_etag(body: str) -> str:
+    """Builds the strong ETag of a serialized response body from its bytes."""
+    return f'"{hashlib.blake2b(body.encode(), digest_size=16).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Tells whether an If-None-Match header names the given ETag (or is "*").
+    The comparison is the weak one RFC 9110 prescribes for If-None-Match, so
+    a W/ prefix added by an intermediary does not prevent a match.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
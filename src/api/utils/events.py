@@ -0,0 +1,59 @@
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+from api.utils.serialization import loads
+
+if TYPE_CHECKING:
+    from core.entities.principal import Principal
+
+def get_json_body(event: Dict[str, Any]) -> Any:
+    """
+    Returns the body of a Lambda-style event as Python objects.
+
+    API Gateway delivers the body as a JSON string, which is parsed here. The
+    FastAPI routes have already parsed and validated the body, so they pass it
+    as a dict instead of serializing it again only for it to be parsed back.
+
+    Args:
+        event: The Lambda-style event.
+
+    Returns:
+        The parsed body, or None if the event has no body.
+
+    Raises:
+        json.JSONDecodeError: If a string body is not valid JSON.
+    """
+    body = event.get("body")
+    if body is None or body == "":
+        return None
+    if isinstance(body, (str, bytes)):
+        return loads(body)
+    return body
+
+def principal_context(principal: "Principal") -> Dict[str, Any]:
+    """
+    Builds the requestContext that carries an authenticated caller to a handler,
+    in the shape API Gateway uses for authorizer output.
+    """
+    return {"authorizer": {"email": principal.email}}
+
+def get_principal_email(event: Dict[str, Any]) -> Optional[str]:
+    """
+    Returns the email of the caller that was authenticated before the handler
+    ran, or None if the event carries no principal.
+    """
+    authorizer = (event.get("requestContext") or {}).get("authorizer") or {}
+    return authorizer.get("email")
+
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """
+    Returns a request header of a Lambda-style event, looked up without regard
+    to case (API Gateway passes the names as the client sent them), or None.
+    """
+    headers = event.get("headers") or {}
+    value = headers.get(name)
+    if value is None:
+        lower = name.lower()
+        for key, candidate in headers.items():
+            if key.lower() == lower:
+                return candidate
+    return value
@@ -0,0 +1,22 @@
+from importlib import import_module
+from typing import Any
+
+def import_string(path: str) -> Any:
+    """
+    Imports an object from a "package.module:attribute" reference.
+
+    Args:
+        path: The reference, e.g. "api.handlers.task_handlers:get_tasks".
+
+    Returns:
+        The referenced attribute.
+
+    Raises:
+        ImportError: If the module cannot be imported or has no such attribute.
+    """
+    module_name, _, attribute = path.partition(":")
+    module = import_module(module_name)
+    try:
+        return getattr(module, attribute)
+    except AttributeError:
+        raise ImportError(f"Module '{module_name}' has no attribute '{attribute}'") from None
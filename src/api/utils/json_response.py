@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from api.utils.serialization import dumps
+from infrastructure.monitoring.server_timing import timed
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered through api.utils.serialization (orjson when available).
+
+    Content that is already encoded JSON (bytes) is sent unchanged, which lets the
+    routes forward the bodies the handlers have serialized without a second pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)
+        with timed("serialization"):
+            return dumps(content)
@@ -1,6 +1,8 @@
-import json
 from typing import Union, Dict, Any
 
+from api.utils.serialization import dumps_str
+from infrastructure.monitoring.server_timing import timed
+
 def success(status_code: int, data: Any) -> Dict[str, Any]:
     """
     Formats a successful response for API Gateway Lambda Proxy.
@@ -8,13 +10,15 @@ def success(status_code: int, data: Any) -> Dict[str, Any]:
     Args:
         status_code: HTTP status code (e.g., 200, 201).
         data: The data to include in the response body.
-              Can be a dictionary, list, or any object serializable by json.dumps.
+              Can be a dictionary, list, or any object supported by
+              api.utils.serialization (including ObjectId and datetime).
 
     Returns:
         A dictionary formatted for Lambda Proxy response.
     """
     try:
-        body_content = json.dumps(data)
+        with timed("serialization"):
+            body_content = dumps_str(data)
     except TypeError as e:
         return error(500, "Internal server error: Failed to serialize response data")
 
@@ -46,11 +50,28 @@ def error(status_code: int, detail: Union[str, Dict[str, Any]]) -> Dict[str, Any
     else:
         body_data = {"error": str(detail)}
 
+    with timed("serialization"):
+        body_content = dumps_str(body_data)
+
     return {
         "statusCode": status_code,
-        "body": json.dumps(body_data),
+        "body": body_content,
         "headers": {
             "Content-Type": "application/json",
             "Access-Control-Allow-Origin": "*"
         }
-    }
\ No newline at end of file
+    }
+
+def not_modified(etag: str) -> Dict[str, Any]:
+    """
+    Formats a 304 Not Modified response for API Gateway Lambda Proxy: no body,
+    only the ETag the client's copy still matches.
+    """
+    return {
+        "statusCode": 304,
+        "body": "",
+        "headers": {
+            "ETag": etag,
+            "Access-Control-Allow-Origin": "*"
+        }
+    }
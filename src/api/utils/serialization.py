@@ -0,0 +1,86 @@
+"""
+Single JSON serialization layer for the API.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Both backends encode ObjectId as its hex string and datetime as
+ISO 8601, so handlers can hand over documents and entities without fix-ups.
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Union
+
+from bson import ObjectId
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Encodes the non-JSON types that appear in tasks and users."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _orjson_dumps(data: Any) -> bytes:
+    return orjson.dumps(data, default=_default)
+
+
+def _stdlib_dumps(data: Any) -> bytes:
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+_dumps: Callable[[Any], bytes] = _stdlib_dumps
+_loads: Callable[[Union[str, bytes]], Any] = json.loads
+backend = "json"
+
+
+def use_backend(name: str) -> None:
+    """
+    Selects the serialization backend ("orjson" or "json").
+
+    Raises:
+        ValueError: If the backend is unknown or orjson is not installed.
+    """
+    global _dumps, _loads, backend
+    if name == "orjson":
+        if orjson is None:
+            raise ValueError("orjson is not installed")
+        _dumps, _loads = _orjson_dumps, orjson.loads
+    elif name == "json":
+        _dumps, _loads = _stdlib_dumps, json.loads
+    else:
+        raise ValueError(f"Unknown JSON backend: {name}")
+    backend = name
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Serializes data to compact UTF-8 JSON bytes.
+
+    Raises:
+        TypeError: If the data contains an unsupported type.
+    """
+    return _dumps(data)
+
+
+def dumps_str(data: Any) -> str:
+    """Serializes data to a JSON string, as API Gateway expects for response bodies."""
+    return _dumps(data).decode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parses JSON text.
+
+    Raises:
+        json.JSONDecodeError: If the data is not valid JSON (orjson's error subclasses it).
+    """
+    return _loads(data)
+
+
+use_backend("orjson" if orjson is not None else "json")
@@ -0,0 +1,117 @@
+"""
+Per-request CPU cost of authenticating a task request.
+
+Compares the previous path, where the route ran HTTPBearer, copied the request
+headers with dict(request.headers) and the handler parsed the Authorization
+header and decoded the token itself, with the principal dependency used by the
+routes now (main.require_principal), which reads the header once and hands a
+Principal to the handler. Both use the process-wide verified-token cache, so
+the difference is the per-request plumbing rather than the HMAC check.
+
+Usage (from src/):
+    python -m benchmarks.bench_auth_path --iterations 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-at-least-32-bytes-long")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost/benchmark")
+os.environ.setdefault("DATABASE_NAME", "benchmark")
+
+from fastapi import Request
+from fastapi.security import HTTPBearer
+
+from api.utils.events import get_principal_email, principal_context
+from core.entities.user import User
+from infrastructure.auth.jwt_provider import get_jwt_provider
+from main import require_principal
+
+USER_EMAIL = "bench@example.com"
+
+# Headers a browser typically sends with a fetch() to the API
+BROWSER_HEADERS = {
+    "host": "api.example.com",
+    "accept": "application/json, text/plain, */*",
+    "accept-encoding": "gzip, deflate, br",
+    "accept-language": "en-US,en;q=0.9",
+    "content-type": "application/json",
+    "origin": "https://app.example.com",
+    "referer": "https://app.example.com/tasks",
+    "sec-ch-ua": '"Chromium";v="124", "Google Chrome";v="124", "Not-A.Brand";v="99"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"macOS"',
+    "sec-fetch-dest": "empty",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-site": "same-site",
+    "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "x-forwarded-for": "203.0.113.10",
+    "x-forwarded-proto": "https",
+}
+
+legacy_bearer = HTTPBearer()
+
+
+def make_request(token: str) -> Request:
+    headers = dict(BROWSER_HEADERS, authorization=f"Bearer {token}")
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/tasks",
+        "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()],
+    }
+    return Request(scope)
+
+
+def legacy_handler_auth(event):
+    """The block every task handler used to start with."""
+    headers = event.get("headers", {})
+    auth_header = headers.get("authorization", headers.get("Authorization"))
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    token = auth_header.split(" ")[1]
+    user = get_jwt_provider().decode_token(token)
+    if user is None:
+        return None
+    return user.get("email")
+
+
+async def legacy_path(request: Request) -> str:
+    await legacy_bearer(request)
+    event = {"headers": dict(request.headers)}
+    return legacy_handler_auth(event)
+
+
+async def principal_path(request: Request) -> str:
+    principal = await require_principal(request)
+    event = {"requestContext": principal_context(principal)}
+    return get_principal_email(event)
+
+
+async def measure(fn, request: Request, iterations: int) -> float:
+    assert await fn(request) == USER_EMAIL  # warm up (and fill the token cache)
+    start = time.process_time()
+    for _ in range(iterations):
+        await fn(request)
+    return (time.process_time() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = get_jwt_provider().generate_token(User(email=USER_EMAIL, password_hash="x"))
+    request = make_request(token)
+
+    before = asyncio.run(measure(legacy_path, request, args.iterations))
+    after = asyncio.run(measure(principal_path, request, args.iterations))
+    print(f"{args.iterations} iterations, {len(BROWSER_HEADERS) + 1} request headers")
+    print(f"  before (HTTPBearer + dict(headers) + handler parsing): {before * 1e6:8.2f} us CPU/request")
+    print(f"  after  (principal dependency)                        : {after * 1e6:8.2f} us CPU/request")
+    print(f"  speed-up                                             : {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Concurrency benchmark for the task routes.
+
+Drives GET /tasks through the FastAPI app with many requests in flight against
+the in-memory Mongo stand-in, once with a non-blocking stand-in (the asyncio
+driver path) and once with a blocking one (what a synchronous PyMongo call does
+to the event loop), and prints requests per second for each.
+
+Usage (from src/):
+    python -m benchmarks.bench_concurrency --requests 400 --concurrency 50 --latency-ms 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-at-least-32-bytes-long")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost/benchmark")
+os.environ.setdefault("DATABASE_NAME", "benchmark")
+
+import httpx
+
+from core.entities.user import User
+from infrastructure.auth.jwt_provider import JWTProvider
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from main import app
+
+USER_EMAIL = "bench@example.com"
+
+
+async def seed(db: InMemoryDatabase, tasks: int) -> None:
+    latency, db.latency = db.latency, 0
+    for i in range(tasks):
+        await db.tasks.insert_one({"title": f"Task {i}", "description": None, "completed": "to do", "user_email": USER_EMAIL})
+    db.latency = latency
+
+
+async def run(blocking: bool, requests: int, concurrency: int, latency: float, tasks: int) -> float:
+    db = InMemoryDatabase(latency=latency, blocking=blocking)
+    MongoConnection.use_database(db)
+    await seed(db, tasks)
+    token = JWTProvider().generate_token(User(email=USER_EMAIL, password_hash="x"))
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get("/tasks", headers=headers)
+                assert response.status_code == 200, response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+    return requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--tasks", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    latency = args.latency_ms / 1000
+    for label, blocking in (("blocking driver", True), ("asyncio driver", False)):
+        rps = asyncio.run(run(blocking, args.requests, args.concurrency, latency, args.tasks))
+        print(f"{label:>16}: {rps:8.1f} req/s  ({args.requests} requests, concurrency {args.concurrency}, {args.latency_ms} ms/command)")
+
+
+if __name__ == "__main__":
+    main()
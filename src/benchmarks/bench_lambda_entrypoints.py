@@ -0,0 +1,154 @@
+"""
+Compares the two Lambda entry points in lambda_handler.py.
+
+  direct  api.routes.dispatcher.ApiGatewayDispatcher over the route table
+  mangum  Mangum -> ASGI -> FastAPI (main.py) -> Lambda-style handler
+
+Warm latency: wall-clock time per invocation of API Gateway proxy events for
+GET /tasks and POST /tasks against the in-memory Mongo stand-in.
+
+Cold start: a fresh interpreter per run, timing the import of lambda_handler
+(the Lambda init phase) and the first invocation, which also provisions the
+indexes.
+
+Usage (from src/):
+    python -m benchmarks.bench_lambda_entrypoints --invocations 2000 --cold-runs 5
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-at-least-32-bytes-long")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost/benchmark")
+os.environ.setdefault("DATABASE_NAME", "benchmark")
+
+ENTRYPOINTS = ("direct", "mangum")
+USER_EMAIL = "bench@example.com"
+
+
+def api_event(method, path, token, body=None, query=None):
+    headers = {
+        "Host": "api.example.com",
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+        "Origin": "https://app.example.com",
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko)",
+    }
+    return {
+        "resource": "/{proxy+}",
+        "path": path,
+        "httpMethod": method,
+        "headers": headers,
+        "multiValueHeaders": {k: [v] for k, v in headers.items()},
+        "queryStringParameters": query,
+        "multiValueQueryStringParameters": {k: [v] for k, v in query.items()} if query else None,
+        "pathParameters": {"proxy": path.lstrip("/")},
+        "requestContext": {"stage": "dev", "httpMethod": method, "path": "/dev" + path, "requestId": "bench"},
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+# Runs in a fresh interpreter: prints the init and first-invocation times in ms.
+COLD_START_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+import lambda_handler
+init = time.perf_counter() - start
+from benchmarks.bench_lambda_entrypoints import api_event, USER_EMAIL
+from core.entities.user import User
+from infrastructure.auth.jwt_provider import get_jwt_provider
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+MongoConnection.use_database(InMemoryDatabase())
+event = api_event("GET", "/tasks", get_jwt_provider().generate_token(User(email=USER_EMAIL, password_hash="x")))
+start = time.perf_counter()
+response = lambda_handler.handler(event, {})
+first = time.perf_counter() - start
+assert response["statusCode"] == 200, response
+print(json.dumps({"init": init * 1000, "first": first * 1000}))
+"""
+
+
+def cold_start(entrypoint: str, runs: int):
+    # No MongoDB here: the in-memory stand-in is installed after the import
+    env = dict(os.environ, LAMBDA_ENTRYPOINT=entrypoint, MONGO_PRECONNECT="false")
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-W", "ignore", "-c", COLD_START_SCRIPT], env=env,
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return statistics.median(r["init"] for r in results), statistics.median(r["first"] for r in results)
+
+
+def load_handler(entrypoint: str):
+    if entrypoint == "mangum":
+        from mangum import Mangum
+        from main import app
+        return Mangum(app)
+    from api.routes.api_routes import routes
+    from api.routes.dispatcher import ApiGatewayDispatcher
+    return ApiGatewayDispatcher(routes)
+
+
+def warm_latency(entrypoint: str, events, invocations: int):
+    handler = load_handler(entrypoint)
+    for event in events:
+        assert handler(event, {})["statusCode"] in (200, 201)
+    timings = []
+    for i in range(invocations):
+        event = events[i % len(events)]
+        start = time.perf_counter()
+        handler(event, {})
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return statistics.mean(timings) * 1e6, timings[len(timings) // 2] * 1e6, timings[int(len(timings) * 0.99)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invocations", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--cold-runs", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    import asyncio
+    from core.entities.user import User
+    from infrastructure.auth.jwt_provider import get_jwt_provider
+    from infrastructure.database.in_memory_mongo import InMemoryDatabase
+    from infrastructure.database.mongo_connection import MongoConnection
+
+    db = InMemoryDatabase()
+    MongoConnection.use_database(db)
+
+    async def seed():
+        for i in range(args.tasks):
+            await db.tasks.insert_one({"title": f"Task {i}", "description": None, "completed": "to do", "user_email": USER_EMAIL})
+    asyncio.run(seed())
+
+    token = get_jwt_provider().generate_token(User(email=USER_EMAIL, password_hash="x"))
+    events = {
+        "GET /tasks": [api_event("GET", "/tasks", token)],
+        "POST /tasks": [api_event("POST", "/tasks", token, body={"title": "Benchmark task", "description": "x"})],
+    }
+
+    print(f"warm invocations ({args.invocations} each, {args.tasks} tasks listed)")
+    for label, event_list in events.items():
+        for entrypoint in ENTRYPOINTS:
+            mean, p50, p99 = warm_latency(entrypoint, event_list, args.invocations)
+            print(f"  {label:<12} {entrypoint:<7} mean {mean:8.1f} us  p50 {p50:8.1f} us  p99 {p99:8.1f} us")
+
+    print(f"cold start (median of {args.cold_runs} fresh interpreters)")
+    for entrypoint in ENTRYPOINTS:
+        init, first = cold_start(entrypoint, args.cold_runs)
+        print(f"  {entrypoint:<7} init {init:8.1f} ms  first invocation {first:8.1f} ms  total {init + first:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Cost of logging on the request path under concurrent load.
+
+Several threads log the same mix of lines a request produces (info lines with
+arguments, a debug line below the level) and the time each logging call takes
+on the calling thread is measured for:
+
+    sync      the previous setup: logging.basicConfig's StreamHandler and
+              f-string messages, formatted and written by the caller
+    queue     structured_logging.configure_logging: %-style arguments, the
+              record is handed to the listener thread which renders the JSON
+    sampled   the same with LOG_SAMPLE_RATES keeping 10% of the info lines
+
+Output goes to a temporary file, so the I/O is real but does not flood the
+terminal. --write-latency-us adds a delay to every write, standing in for a
+stdout pipe that is slow to drain (as Lambda's log pipe can be under load).
+
+Usage (from src/):
+    python -m benchmarks.bench_logging --threads 8 --lines 5000 --write-latency-us 50
+"""
+import argparse
+import logging
+import statistics
+import tempfile
+import threading
+import time
+
+from infrastructure.monitoring import structured_logging
+
+LOGGER = "benchmark.requests"
+
+
+def _log_fstring(logger, i):
+    logger.info(f"Task {i} updated successfully.")
+    logger.debug(f"Updating task {i} with data: {{'title': 'Task {i}'}}")
+    logger.info(f"Indexes ready on 'tasks': {['user_email_1__id_1']}")
+
+
+def _log_lazy(logger, i):
+    logger.info("Task %s updated successfully.", i)
+    logger.debug("Updating task %s with data: %s", i, {"title": f"Task {i}"})
+    logger.info("Indexes ready on '%s': %s", "tasks", ["user_email_1__id_1"])
+
+
+class SlowStream:
+    """File wrapper whose writes block for a fixed time, like a pipe whose reader is behind."""
+
+    def __init__(self, stream, latency_s: float):
+        self.stream = stream
+        self.latency_s = latency_s
+
+    def write(self, text):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def run(log, threads: int, lines: int):
+    logger = logging.getLogger(LOGGER)
+    latencies = [[] for _ in range(threads)]
+    start_barrier = threading.Barrier(threads + 1)
+
+    def worker(samples):
+        start_barrier.wait()
+        for i in range(lines):
+            start = time.perf_counter()
+            log(logger, i)
+            samples.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(samples,)) for samples in latencies]
+    for thread in workers:
+        thread.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    structured_logging.flush_logs(timeout=60)
+    drained = time.perf_counter() - start
+    samples = sorted(sample for thread_samples in latencies for sample in thread_samples)
+    return {
+        "requests_per_s": len(samples) / elapsed,
+        "p50_us": statistics.median(samples) * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+        "drained_s": drained,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--write-latency-us", type=float, default=0)
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    with tempfile.TemporaryFile("w+") as file:
+        output = SlowStream(file, args.write_latency_us / 1e6)
+        results = {}
+        for name in ("sync", "queue", "sampled"):
+            structured_logging.stop_logging()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            if name == "sync":
+                logging.basicConfig(level=logging.INFO, stream=output, force=True)
+                results[name] = run(_log_fstring, args.threads, args.lines)
+            else:
+                rates = {LOGGER: 0.1} if name == "sampled" else {}
+                structured_logging.configure_logging("INFO", stream=output, sample_rates=rates, force=True)
+                results[name] = run(_log_lazy, args.threads, args.lines)
+        structured_logging.stop_logging()
+
+    print(f"{args.threads} threads x {args.lines} requests (3 logging calls each), "
+          f"{args.write_latency_us:g} us per write")
+    print(f"{'setup':<8} {'requests/s':>12} {'p50 (us)':>10} {'p99 (us)':>10} {'all written (s)':>16}")
+    for name, result in results.items():
+        print(f"{name:<8} {result['requests_per_s']:12.0f} {result['p50_us']:10.2f} {result['p99_us']:10.2f} "
+              f"{result['drained_s']:16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Per-request overhead of the request metrics middleware.
+
+Calls a minimal ASGI app directly and through MetricsMiddleware, with a
+Starlette-style matched route in the scope, and reports the difference per
+request. The budget documented in infrastructure.monitoring.request_metrics
+is what tests/test_request_metrics.py enforces.
+
+Usage (from src/):
+    python -m benchmarks.bench_request_metrics --requests 20000
+"""
+import argparse
+import asyncio
+import time
+
+from infrastructure.monitoring.request_metrics import MetricsMiddleware, RequestMetrics
+
+
+class _Route:
+    path = "/tasks/{task_id}"
+
+
+async def app(scope, receive, send):
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def per_request(handler, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/tasks/1"}
+    for _ in range(1000):  # warm up
+        await handler(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await handler(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def measure_overhead(requests: int = 20000, repeat: int = 5) -> float:
+    """Best-of-repeat overhead of MetricsMiddleware per request, in seconds."""
+    middleware = MetricsMiddleware(app, registry=RequestMetrics())
+
+    async def run():
+        bare = min([await per_request(app, requests) for _ in range(repeat)])
+        measured = min([await per_request(middleware, requests) for _ in range(repeat)])
+        return measured - bare
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"MetricsMiddleware overhead: {measure_overhead(args.requests, args.repeat) * 1e6:.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
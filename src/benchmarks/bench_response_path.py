@@ -0,0 +1,72 @@
+"""
+Per-request CPU cost of turning a handler result into a FastAPI response.
+
+Compares the previous path, where the handler's JSON body was parsed back with
+json.loads and re-encoded by JSONResponse, with the direct path used by
+main.process_handler_response, where the handler's body goes to the wire as is.
+Both include the handler's own serialization (api.utils.responses.success).
+
+Usage (from src/):
+    python -m benchmarks.bench_response_path --tasks 5000 --iterations 200
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-at-least-32-bytes-long")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost/benchmark")
+os.environ.setdefault("DATABASE_NAME", "benchmark")
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+from api.utils.responses import success
+from main import process_handler_response
+
+
+def task_list(count: int):
+    return [
+        {"id": str(ObjectId()), "title": f"Task number {i}", "description": "Some description text", "completed": "to do"}
+        for i in range(count)
+    ]
+
+
+def legacy_path(tasks):
+    """The handler body was json.loads-ed and re-encoded by JSONResponse."""
+    result = success(200, tasks)
+    return JSONResponse(content=json.loads(result["body"]), status_code=result["statusCode"], headers=result["headers"])
+
+
+def direct_path(tasks):
+    result = success(200, tasks)
+    return process_handler_response(result)
+
+
+def measure(fn, tasks, iterations: int) -> float:
+    fn(tasks)  # warm up
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(tasks)
+    return (time.process_time() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    tasks = task_list(args.tasks)
+    assert json.loads(legacy_path(tasks).body) == json.loads(direct_path(tasks).body)
+
+    before = measure(legacy_path, tasks, args.iterations)
+    after = measure(direct_path, tasks, args.iterations)
+    print(f"{args.tasks} tasks, {args.iterations} iterations")
+    print(f"  before (dumps -> loads -> dumps): {before * 1000:8.3f} ms CPU/request")
+    print(f"  after  (prebuilt body)          : {after * 1000:8.3f} ms CPU/request")
+    print(f"  speed-up                        : {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Micro-benchmarks for api.utils.serialization.
+
+Times dumps and loads for the task list and auth payloads with every available
+backend (stdlib json and orjson).
+
+Usage (from src/):
+    python -m benchmarks.bench_serialization
+"""
+import argparse
+import timeit
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+from api.utils import serialization
+
+
+def payloads():
+    def task(i):
+        return {"id": ObjectId(), "title": f"Task number {i}", "description": "Some description text", "completed": "to do"}
+
+    return {
+        "task list (100)": [task(i) for i in range(100)],
+        "task list (5000)": [task(i) for i in range(5000)],
+        "single task": task(0),
+        "auth response": {"email": "user@example.com", "token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9." + "x" * 120},
+        "auth request": {"email": "user@example.com", "password": "SecurePass123"},
+        "error": {"error": "Invalid email or password"},
+        "task with datetime": dict(task(0), updated_at=datetime.now(timezone.utc)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backends = ["json"] + (["orjson"] if serialization.orjson is not None else [])
+    default_backend = serialization.backend
+    print(f"{'payload':<20} {'backend':<8} {'dumps (us)':>12} {'loads (us)':>12}")
+    for name, data in payloads().items():
+        for backend in backends:
+            serialization.use_backend(backend)
+            encoded = serialization.dumps(data)
+            number = max(1, 20000 // max(1, len(encoded) // 100))
+            dumps_time = min(timeit.repeat(lambda: serialization.dumps(data), number=number, repeat=args.repeat)) / number
+            loads_time = min(timeit.repeat(lambda: serialization.loads(encoded), number=number, repeat=args.repeat)) / number
+            print(f"{name:<20} {backend:<8} {dumps_time * 1e6:12.2f} {loads_time * 1e6:12.2f}")
+    serialization.use_backend(default_backend)
+
+
+if __name__ == "__main__":
+    main()
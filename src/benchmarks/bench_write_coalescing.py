@@ -0,0 +1,62 @@
+"""
+Throughput benchmark for insert coalescing (TASK_INSERT_COALESCE_MS).
+
+Creates tasks through MongoTaskRepository.create_task with a given number of
+calls in flight, against the in-memory Mongo stand-in with a per-command
+latency and a limited number of connections (as a client's maxPoolSize), once
+inserting each task on its own and once with the insert coalescer. Prints
+creates per second, the commands issued per create and the mean batch size.
+
+Usage (from src/):
+    python -m benchmarks.bench_write_coalescing --concurrency 1 8 32 128 --latency-ms 2 --pool-size 10
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from core.entities.task import Task
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.database.mongo_repositories import MongoTaskRepository
+
+
+async def run(repository: MongoTaskRepository, creates: int, concurrency: int, users: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await repository.create_task(Task(title=f"Task {i}", user_email=f"user{i % users}@example.com"))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(creates)))
+    return creates / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--creates", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--users", type=int, default=50, help="distinct task owners")
+    parser.add_argument("--delay-ms", type=float, default=2.0, help="TASK_INSERT_COALESCE_MS")
+    parser.add_argument("--max-batch", type=int, default=64, help="TASK_INSERT_COALESCE_MAX")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{args.creates} creates, {args.latency_ms} ms/command, {args.pool_size} connections, {args.users} users")
+    for concurrency in args.concurrency:
+        for label, delay_ms in (("insert_one", 0), (f"coalesced {args.delay_ms:g} ms", args.delay_ms)):
+            db = InMemoryDatabase(latency=args.latency_ms / 1000, max_in_flight=args.pool_size)
+            MongoConnection.use_database(db)
+            repository = MongoTaskRepository(insert_delay_ms=delay_ms, insert_max_batch=args.max_batch)
+            rate = asyncio.run(run(repository, args.creates, concurrency, args.users))
+            coalescer = repository.insert_coalescer
+            batch = f"{coalescer.items / coalescer.batches:6.1f}" if coalescer and coalescer.batches else "     -"
+            print(f"concurrency {concurrency:>4}  {label:>18}: {rate:9.1f} creates/s  "
+                  f"{len(db.commands) / args.creates:5.2f} commands/create  mean batch {batch}")
+
+
+if __name__ == "__main__":
+    main()
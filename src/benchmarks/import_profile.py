@@ -0,0 +1,129 @@
+"""
+Per-module import cost of lambda_handler.
+
+Imports lambda_handler in a fresh interpreter under `python -X importtime` and
+reports the total, the slowest modules (by self and cumulative time) and the
+self time summed per top-level package. With --invoke it also sends a first
+GET /tasks event (against the in-memory Mongo stand-in) and reports the
+imports that happen during that invocation separately, which is where
+STARTUP_MODE=lazy moves them.
+
+Usage (from src/):
+    python -m benchmarks.import_profile --startup-mode lazy --invoke
+    python -m benchmarks.import_profile --entrypoint mangum --top 30
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+MARKER = "---- first invocation ----"
+
+# The event is built by the parent so that no application module is imported
+# before the invocation except by lambda_handler itself. The in-memory Mongo
+# stand-in is imported after the marker; its own module is left out of the
+# report, while the pymongo modules it shares with the application are kept.
+SCRIPT = """
+import json, os, sys
+import lambda_handler
+if {invoke!r}:
+    print({marker!r}, file=sys.stderr, flush=True)
+    from infrastructure.database.in_memory_mongo import InMemoryDatabase
+    from infrastructure.database.mongo_connection import MongoConnection
+    MongoConnection.use_database(InMemoryDatabase())
+    lambda_handler.handler(json.loads(os.environ["IMPORT_PROFILE_EVENT"]), {{}})
+"""
+STAND_IN_MODULES = {"infrastructure.database.in_memory_mongo"}
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(lines: List[str]) -> List[ImportTime]:
+    """Parses `-X importtime` lines ("import time: self | cumulative | name")."""
+    records = []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        records.append(ImportTime(name.strip(), int(self_us), int(cumulative_us), (len(name) - len(name.lstrip()) - 1) // 2))
+    return records
+
+
+def profile(entrypoint: str, startup_mode: str, invoke: bool) -> Dict[str, List[ImportTime]]:
+    """Runs the import in a subprocess; returns the records for the init phase and the first invocation."""
+    from benchmarks.bench_lambda_entrypoints import api_event, USER_EMAIL
+    from core.entities.user import User
+    from infrastructure.auth.jwt_provider import get_jwt_provider
+
+    token = get_jwt_provider().generate_token(User(email=USER_EMAIL, password_hash="x"))
+    env = dict(os.environ, LAMBDA_ENTRYPOINT=entrypoint, STARTUP_MODE=startup_mode, MONGO_PRECONNECT="false",
+               IMPORT_PROFILE_EVENT=json.dumps(api_event("GET", "/tasks", token)))
+    stderr = subprocess.run(
+        [sys.executable, "-W", "ignore", "-X", "importtime", "-c", SCRIPT.format(invoke=invoke, marker=MARKER)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stderr.splitlines()
+    if MARKER in stderr:
+        split = stderr.index(MARKER)
+        init_lines, invoke_lines = stderr[:split], stderr[split + 1:]
+    else:
+        init_lines, invoke_lines = stderr, []
+
+    init = parse_importtime(init_lines)
+    # -X importtime prints a module after its imports, so lambda_handler's
+    # subtree is the run of nested records just before it; earlier top-level
+    # records are interpreter startup (site, encodings, ...).
+    end = next(i for i, r in enumerate(init) if r.module == "lambda_handler")
+    start = end
+    while start > 0 and init[start - 1].depth > 0:
+        start -= 1
+    invocation = [r for r in parse_importtime(invoke_lines) if r.module not in STAND_IN_MODULES]
+    return {"init": init[start:end + 1], "first invocation": invocation}
+
+
+def report(title: str, records: List[ImportTime], top: int) -> None:
+    total = sum(r.self_us for r in records)
+    print(f"\n{title}: {len(records)} modules, {total / 1000:.1f} ms")
+    if not records:
+        return
+    print(f"  slowest by self time:")
+    for r in sorted(records, key=lambda r: r.self_us, reverse=True)[:top]:
+        print(f"    {r.self_us / 1000:8.1f} ms  {r.module}")
+    print(f"  slowest by cumulative time (including the modules they import):")
+    for r in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+        print(f"    {r.cumulative_us / 1000:8.1f} ms  {r.module}")
+    packages: Dict[str, int] = defaultdict(int)
+    for r in records:
+        packages[r.module.split(".")[0]] += r.self_us
+    print(f"  self time by package:")
+    for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"    {self_us / 1000:8.1f} ms  {package}")
+
+
+def main():
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret-at-least-32-bytes-long")
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost/benchmark")
+    os.environ.setdefault("DATABASE_NAME", "benchmark")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entrypoint", choices=("direct", "mangum"), default="direct")
+    parser.add_argument("--startup-mode", choices=("eager", "lazy"), default="eager")
+    parser.add_argument("--invoke", action="store_true", help="also profile imports made by the first invocation")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    phases = profile(args.entrypoint, args.startup_mode, args.invoke)
+    print(f"lambda_handler (LAMBDA_ENTRYPOINT={args.entrypoint}, STARTUP_MODE={args.startup_mode})")
+    report("init (import lambda_handler)", phases["init"], args.top)
+    if args.invoke:
+        report("first invocation (GET /tasks)", phases["first invocation"], args.top)
+
+
+if __name__ == "__main__":
+    main()
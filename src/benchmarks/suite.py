@@ -0,0 +1,303 @@
+"""
+End-to-end benchmark suite covering every endpoint.
+
+Each endpoint is driven through both entry points against the in-memory Mongo
+stand-in (infrastructure.database.in_memory_mongo), so runs are reproducible
+without a database:
+
+    fastapi  the ASGI app in main.py, in process through httpx
+    lambda   lambda_handler.handler with API Gateway proxy events
+
+The task endpoints run once per task-list size: the user owns that many tasks
+and GET /tasks asks for a page of that size. The /tasks:batch endpoints send
+BATCH_ITEMS tasks per request. For every (entry point, endpoint,
+size) the suite records p50/p95/p99 latency and sequential throughput.
+
+Results can be saved as a baseline (benchmarks/baseline.json by default) and
+later runs compared against it: --compare prints the change per row and exits
+with status 1 when a p50 regressed by more than --threshold.
+
+Usage (from src/):
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite --compare
+    python -m benchmarks.suite --sizes 10 100 --iterations 100 --output results.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-at-least-32-bytes-long")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost/benchmark")
+os.environ.setdefault("DATABASE_NAME", "benchmark")
+# The stand-in is installed after the import; there is no MongoDB to pre-connect to
+os.environ.setdefault("MONGO_PRECONNECT", "false")
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = (10, 100, 500)
+BATCH_ITEMS = 10
+TARGETS = ("fastapi", "lambda")
+PASSWORD = "benchmark-password"
+
+Response = Tuple[int, Any]
+
+
+class FastApiTarget:
+    """Sends requests to the FastAPI app in process, one at a time, on the Lambda event loop."""
+
+    name = "fastapi"
+
+    def __init__(self):
+        import httpx
+        from api.routes.dispatcher import event_loop
+        from main import app
+
+        self.loop = event_loop()
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+
+    def request(self, method: str, path: str, token: Optional[str] = None, body: Any = None,
+                query: Optional[Dict[str, str]] = None) -> Response:
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = self.loop.run_until_complete(self.client.request(method, path, headers=headers, json=body, params=query))
+        return response.status_code, response.json() if response.content else None
+
+    def close(self) -> None:
+        self.loop.run_until_complete(self.client.aclose())
+
+
+class LambdaTarget:
+    """Invokes lambda_handler.handler with API Gateway (REST, payload v1) proxy events."""
+
+    name = "lambda"
+
+    def __init__(self):
+        import lambda_handler
+
+        self.handler = lambda_handler.handler
+
+    def request(self, method: str, path: str, token: Optional[str] = None, body: Any = None,
+                query: Optional[Dict[str, str]] = None) -> Response:
+        headers = {"Host": "api.example.com", "Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        event = {
+            "resource": "/{proxy+}",
+            "path": path,
+            "httpMethod": method,
+            "headers": headers,
+            "multiValueHeaders": {key: [value] for key, value in headers.items()},
+            "queryStringParameters": query,
+            "multiValueQueryStringParameters": {key: [value] for key, value in query.items()} if query else None,
+            "pathParameters": {"proxy": path.lstrip("/")},
+            "requestContext": {"stage": "benchmark", "httpMethod": method, "path": path, "requestId": "benchmark"},
+            "body": json.dumps(body) if body is not None else None,
+            "isBase64Encoded": False,
+        }
+        response = self.handler(event, {})
+        return response["statusCode"], json.loads(response["body"]) if response["body"] else None
+
+    def close(self) -> None:
+        pass
+
+
+def measure(call: Callable[[int], Response], iterations: int, warmup: int, expected_status: int) -> Dict[str, float]:
+    """Runs call(i) sequentially and summarizes the latency of the timed iterations."""
+    for i in range(warmup):
+        call(-1 - i)
+    timings = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        call_start = time.perf_counter()
+        status, body = call(i)
+        timings.append(time.perf_counter() - call_start)
+        if status != expected_status:
+            raise AssertionError(f"expected {expected_status}, got {status}: {body}")
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": _percentile(timings, 50) * 1000,
+        "p95_ms": _percentile(timings, 95) * 1000,
+        "p99_ms": _percentile(timings, 99) * 1000,
+        "mean_ms": statistics.mean(timings) * 1000,
+        "throughput_rps": iterations / elapsed,
+    }
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+class Suite:
+    def __init__(self, sizes=DEFAULT_SIZES, iterations: int = 200, auth_iterations: int = 10, warmup: int = 10,
+                 db_latency_ms: float = 0.0):
+        self.sizes = sizes
+        self.iterations = iterations
+        self.auth_iterations = auth_iterations
+        self.warmup = warmup
+        self.db_latency_ms = db_latency_ms
+        self.db = None
+
+    def seed(self, email: str, count: int) -> List[str]:
+        """Inserts tasks straight into the stand-in, without latency, and returns their ids."""
+        from api.routes.dispatcher import event_loop
+
+        latency, self.db.latency = self.db.latency, 0
+
+        async def insert():
+            ids = []
+            for i in range(count):
+                result = await self.db.tasks.insert_one(
+                    {"title": f"Task {i}", "description": "Benchmark task", "completed": "to do", "user_email": email})
+                ids.append(str(result.inserted_id))
+            return ids
+        try:
+            return event_loop().run_until_complete(insert())
+        finally:
+            self.db.latency = latency
+
+    def run_target(self, target) -> List[Dict[str, Any]]:
+        from core.entities.user import User
+        from infrastructure.auth.jwt_provider import get_jwt_provider
+        from infrastructure.database.in_memory_mongo import InMemoryDatabase
+        from infrastructure.database.mongo_connection import MongoConnection
+
+        # Every target starts from an empty database, so earlier runs do not grow its collections
+        self.db = InMemoryDatabase(latency=self.db_latency_ms / 1000)
+        MongoConnection.use_database(self.db)
+        results = []
+
+        def record(endpoint: str, size: Optional[int], call, iterations: int, expected_status: int, warmup=None):
+            stats = measure(call, iterations, self.warmup if warmup is None else warmup, expected_status)
+            results.append(dict(target=target.name, endpoint=endpoint, size=size, **stats))
+            print(f"  {target.name:<8} {endpoint:<24} {'-' if size is None else size:>5} "
+                  f"p50 {stats['p50_ms']:8.3f}  p95 {stats['p95_ms']:8.3f}  p99 {stats['p99_ms']:8.3f} ms  "
+                  f"{stats['throughput_rps']:9.1f} req/s", flush=True)
+
+        # Authentication is dominated by bcrypt and does not depend on the task-list size
+        prefix = f"{target.name}-{time.monotonic_ns()}"
+        record("POST /auth/register", None, lambda i: target.request(
+            "POST", "/auth/register", body={"email": f"{prefix}-{i + 10}@example.com", "password": PASSWORD}),
+            self.auth_iterations, 201, warmup=1)
+        login = {"email": f"{prefix}-10@example.com", "password": PASSWORD}
+        record("POST /auth/login", None, lambda i: target.request("POST", "/auth/login", body=login),
+               self.auth_iterations, 200, warmup=1)
+
+        for size in self.sizes:
+            email = f"{prefix}-owner-{size}@example.com"
+            token = get_jwt_provider().generate_token(User(email=email, password_hash="x"))
+            task_ids = self.seed(email, size)
+            query = {"limit": str(size)}
+
+            record("GET /tasks", size, lambda i: target.request("GET", "/tasks", token, query=query), self.iterations, 200)
+            # A first sync: every task of the list, as one page of changes
+            record("GET /tasks/changes", size, lambda i: target.request("GET", "/tasks/changes", token, query=query),
+                   self.iterations, 200)
+            record("POST /tasks", size, lambda i: target.request(
+                "POST", "/tasks", token, body={"title": f"Created {i}", "description": "Benchmark task"}), self.iterations, 201)
+            record("PUT /tasks/{task_id}", size, lambda i: target.request(
+                "PUT", f"/tasks/{task_ids[0]}", token, body={"title": f"Renamed {i}", "completed": "in progress"}),
+                self.iterations, 200)
+            doomed = self.seed(email, self.iterations + self.warmup)
+            record("DELETE /tasks/{task_id}", size, lambda i: target.request(
+                "DELETE", f"/tasks/{doomed[i]}", token), self.iterations, 204)
+
+            record("POST /tasks:batch", size, lambda i: target.request("POST", "/tasks:batch", token, body={
+                "tasks": [{"title": f"Batch {i}.{n}", "description": "Benchmark task"} for n in range(BATCH_ITEMS)]}),
+                self.iterations, 200)
+            record("PATCH /tasks:batch", size, lambda i: target.request("PATCH", "/tasks:batch", token, body={
+                "tasks": [{"id": task_id, "title": f"Renamed {i}"} for task_id in task_ids[:BATCH_ITEMS]]}),
+                self.iterations, 200)
+            doomed = self.seed(email, (self.iterations + self.warmup) * BATCH_ITEMS)
+            batches = [doomed[start:start + BATCH_ITEMS] for start in range(0, len(doomed), BATCH_ITEMS)]
+            record("DELETE /tasks:batch", size, lambda i: target.request(
+                "DELETE", "/tasks:batch", token, body={"ids": batches[i]}), self.iterations, 200)
+        return results
+
+    def run(self, targets=TARGETS) -> Dict[str, Any]:
+        factories = {"fastapi": FastApiTarget, "lambda": LambdaTarget}
+        results = []
+        for name in targets:
+            target = factories[name]()
+            try:
+                results.extend(self.run_target(target))
+            finally:
+                target.close()
+        return {
+            "meta": {
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "sizes": list(self.sizes),
+                "iterations": self.iterations,
+                "auth_iterations": self.auth_iterations,
+                "db_latency_ms": self.db_latency_ms,
+            },
+            "results": results,
+        }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Prints each row's p50/p99 next to the baseline.
+
+    Returns:
+        One description per row whose p50 grew by more than threshold (a fraction).
+    """
+    key = lambda row: (row["target"], row["endpoint"], row["size"])
+    previous = {key(row): row for row in baseline["results"]}
+    regressions = []
+    print(f"{'target':<8} {'endpoint':<24} {'size':>5} {'p50 (ms)':>20} {'p99 (ms)':>20}")
+    for row in current["results"]:
+        before = previous.get(key(row))
+        if before is None:
+            continue
+        change = row["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        size = "-" if row["size"] is None else row["size"]
+        print(f"{row['target']:<8} {row['endpoint']:<24} {size:>5} "
+              f"{before['p50_ms']:8.3f} -> {row['p50_ms']:8.3f} {before['p99_ms']:8.3f} -> {row['p99_ms']:8.3f}  "
+              f"{change:+7.1%}")
+        if change > threshold:
+            regressions.append(f"{row['target']} {row['endpoint']} (size {size}): p50 {change:+.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--auth-iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="simulated MongoDB round trip")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--compare", action="store_true", help="compare the results with --baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="p50 growth counted as a regression")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    results = Suite(args.sizes, args.iterations, args.auth_iterations, args.warmup, args.db_latency_ms).run(args.targets)
+    for path in filter(None, (args.output, args.baseline if args.save_baseline else None)):
+        with open(path, "w") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+        print(f"results written to {path}")
+
+    if args.compare:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print("regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
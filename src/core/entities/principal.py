@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+class Principal(BaseModel):
+    """The authenticated caller of a request, resolved once from its bearer token."""
+    email: str
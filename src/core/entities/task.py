@@ -1,5 +1,10 @@
 from pydantic import BaseModel
-from typing import Optional, Literal
+from datetime import datetime, timedelta
+from typing import List, Optional, Literal
+
+# How long the tombstones of deleted tasks are kept; a sync token older than
+# this cannot list every deletion and the client must fetch the full list again
+TOMBSTONE_RETENTION = timedelta(days=30)
 
 class TaskUpdate(BaseModel):
     """Model for optional fields when updating a task."""
@@ -15,4 +20,30 @@ class Task(BaseModel):
     user_email: str  # Associated user email
 
     class Config:
-        allow_mutation = True  # Allows changes to the fields
\ No newline at end of file
+        allow_mutation = True  # Allows changes to the fields
+
+class TaskPage(BaseModel):
+    """A page of a user's tasks, ordered by id."""
+    items: List[Task]  # Tasks in this page
+    next_cursor: Optional[str] = None  # Opaque cursor for the next page, None on the last page
+
+class TaskChange(BaseModel):
+    """A task as of its last write, or its tombstone when it was deleted."""
+    id: str  # Id of the changed task
+    updated_at: Optional[datetime] = None  # Time of the write; None for a task last written before it was recorded
+    task: Optional[Task] = None  # The task after the write, None if it was deleted
+
+class TaskChanges(BaseModel):
+    """The changes to a user's tasks since a sync token, oldest first."""
+    tasks: List[Task]  # Tasks created or updated since the token
+    deleted: List[str]  # Ids of the tasks deleted since the token
+    sync_token: str  # Token to pass as `since` on the next call
+    has_more: bool = False  # True if more changes follow; call again with sync_token right away
+
+class TaskBatchResult(BaseModel):
+    """The outcome of one item of a batch request."""
+    index: int  # Position of the item in the request
+    status: int  # HTTP status the item would have had as a single request (424: not applied after an earlier failure)
+    id: Optional[str] = None  # Id of the task the item concerned, when known
+    task: Optional[Task] = None  # The task after a create or update
+    error: Optional[str] = None  # Why the item failed
@@ -7,5 +7,9 @@ class InvalidCredentialsError(Exception):
         super().__init__("Invalid email or password")
         
 class AuthenticationError(Exception):
+    def __init__(self, message: str = "Authentication Error"):
+        super().__init__(message)
+
+class PasswordHashingUnavailableError(Exception):
     def __init__(self):
-        super().__init__("Authentication Error")
\ No newline at end of file
+        super().__init__("Authentication service is busy, please retry shortly")
\ No newline at end of file
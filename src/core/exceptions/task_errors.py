@@ -8,4 +8,20 @@ class TaskPermissionError(Exception):
         
 class TaskOwnershipError(Exception):
     def __init__(self):
-        super().__init__("You are not the owner of this task")
\ No newline at end of file
+        super().__init__("You are not the owner of this task")
+
+class InvalidCursorError(Exception):
+    def __init__(self):
+        super().__init__("Invalid pagination cursor")
+
+class InvalidSyncTokenError(Exception):
+    def __init__(self):
+        super().__init__("Invalid sync token")
+
+class SyncTokenExpiredError(Exception):
+    def __init__(self):
+        super().__init__("Sync token is older than the deletion history; fetch the full task list again")
+
+class BatchTooLargeError(Exception):
+    def __init__(self, max_size: int):
+        super().__init__(f"A batch may hold at most {max_size} items")
@@ -0,0 +1,44 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence, Tuple
+from ..entities.task import Task
+
+class TaskListEntry:
+    """
+    A user's complete task list in ascending id order, as held by a TaskListCache,
+    and the list version (TaskRepository.get_list_version) it is current at.
+
+    tasks is None for a user with more tasks than the cache keeps; the entry
+    then only records that their lists must be read from the repository.
+    """
+
+    __slots__ = ("tasks", "ids", "version")
+
+    def __init__(self, tasks: Optional[Sequence[Task]], version: Optional[int] = None):
+        self.tasks: Optional[Tuple[Task, ...]] = tuple(tasks) if tasks is not None else None
+        self.version = version
+        self.ids: Tuple[str, ...] = tuple(task.id for task in self.tasks) if self.tasks is not None else ()
+
+class TaskListCache(ABC):
+    """
+    Stores task lists per user email. Implementations decide where the entries
+    live (in the process, or in a store shared by every instance) and how long
+    they are kept.
+
+    shared is True when processes other than this one write the entries too.
+    A read-modify-write of an entry could then lose another process's change,
+    so CachedTaskRepository drops the entry on a write instead of patching it.
+    """
+
+    shared = False
+
+    @abstractmethod
+    async def get(self, user_email: str) -> Optional[TaskListEntry]:
+        pass
+
+    @abstractmethod
+    async def set(self, user_email: str, entry: TaskListEntry) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, user_email: str) -> None:
+        pass
@@ -1,24 +1,59 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from ..entities.task import Task
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from ..entities.task import TOMBSTONE_RETENTION, Task, TaskChange
 
 class TaskRepository(ABC):
     @abstractmethod
-    def create_task(self, task: Task) -> Task:
+    async def create_task(self, task: Task) -> Task:
         pass
     
     @abstractmethod
-    def get_task_by_id(self, task_id: str) -> Optional[Task]:
+    async def get_task_by_id(self, task_id: str) -> Optional[Task]:
         pass
     
     @abstractmethod
-    def get_user_tasks(self, user_email: str) -> List[Task]:
+    async def get_user_tasks(self, user_email: str, limit: Optional[int] = None, after_id: Optional[str] = None,
+                             version: Optional[int] = None) -> List[Task]:
         pass
     
     @abstractmethod
-    def update_task(self, task_id: str, updates: dict) -> Optional[Task]:
+    async def update_task(self, task_id: str, updates: dict) -> Optional[Task]:
         pass
     
     @abstractmethod
-    def delete_task(self, task_id: str) -> bool:
-        pass
\ No newline at end of file
+    async def update_user_task(self, task_id: str, user_email: str, updates: dict) -> Optional[Task]:
+        pass
+    
+    @abstractmethod
+    async def delete_task(self, task_id: str, retention: timedelta = TOMBSTONE_RETENTION) -> bool:
+        pass
+    
+    @abstractmethod
+    async def delete_user_task(self, task_id: str, user_email: str, retention: timedelta = TOMBSTONE_RETENTION) -> bool:
+        pass
+    
+    @abstractmethod
+    async def get_list_version(self, user_email: str) -> int:
+        pass
+    
+    @abstractmethod
+    async def get_user_changes(self, user_email: str, since: Optional[datetime], after_id: Optional[str], limit: int) -> List[TaskChange]:
+        pass
+    
+    @abstractmethod
+    async def create_tasks(self, tasks: List[Task], ordered: bool = False) -> List[Optional[Task]]:
+        pass
+    
+    @abstractmethod
+    async def get_tasks_by_ids(self, task_ids: List[str]) -> List[Task]:
+        pass
+    
+    @abstractmethod
+    async def update_user_tasks(self, user_email: str, updates: List[Tuple[str, dict]], ordered: bool = False) -> List[bool]:
+        pass
+    
+    @abstractmethod
+    async def delete_user_tasks(self, user_email: str, task_ids: List[str], ordered: bool = False,
+                                retention: timedelta = TOMBSTONE_RETENTION) -> List[bool]:
+        pass
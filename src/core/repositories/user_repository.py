@@ -4,9 +4,9 @@ from ..entities.user import User
 
 class UserRepository(ABC):
     @abstractmethod
-    def find_by_email(self, email: str) -> Optional[User]:
+    async def find_by_email(self, email: str) -> Optional[User]:
         pass
     
     @abstractmethod
-    def register_user(self, user: User) -> User:
+    async def register_user(self, user: User) -> User:
         pass
\ No newline at end of file
@@ -1,23 +1,27 @@
-from bcrypt import gensalt, hashpw, checkpw
+from typing import Optional
 from ..entities.user import User
 from ..repositories.user_repository import UserRepository
-from ..exceptions.auth_errors import UserAlreadyExistsError, InvalidCredentialsError
+from ..exceptions.auth_errors import InvalidCredentialsError
+from .password_hasher import PasswordHasher, InlineBcryptHasher
 
 class AuthService:
     """
     Service class for handling user authentication and registration logic.
     """
 
-    def __init__(self, repository: UserRepository):
+    def __init__(self, repository: UserRepository, password_hasher: Optional[PasswordHasher] = None):
         """
         Initializes the AuthService with a user repository.
 
         Args:
             repository: An instance of UserRepository to interact with the user data store.
+            password_hasher: Where bcrypt runs. Defaults to the calling thread; servers
+                should pass a worker pool so hashing does not block the event loop.
         """
         self.repository = repository
+        self.password_hasher = password_hasher or InlineBcryptHasher()
     
-    def register_user(self, email: str, password: str) -> User:
+    async def register_user(self, email: str, password: str) -> User:
         """
         Registers a new user with the provided email and password.
 
@@ -29,20 +33,18 @@ class AuthService:
             A User object representing the newly registered user.
 
         Raises:
-            UserAlreadyExistsError: If a user with the given email already exists.
+            UserAlreadyExistsError: If a user with the given email already exists
+                (raised by the repository, which enforces unique emails on insert).
+            PasswordHashingUnavailableError: If the password hasher is saturated.
         """
-        # Check if the user already exists in the repository
-        if self.repository.find_by_email(email):
-            raise UserAlreadyExistsError()
-        
         # Hash the password securely using bcrypt
-        hashed_pw = hashpw(password.encode(), gensalt()).decode()
+        hashed_pw = await self.password_hasher.hash_password(password)
 
         # Create a new User object and register it in the repository
         user = User(email=email, password_hash=hashed_pw)
-        return self.repository.register_user(user)
+        return await self.repository.register_user(user)
     
-    def authenticate_user(self, email: str, password: str) -> User:
+    async def authenticate_user(self, email: str, password: str) -> User:
         """
         Authenticates a user with the provided email and password.
 
@@ -55,12 +57,13 @@ class AuthService:
 
         Raises:
             InvalidCredentialsError: If the email does not exist or the password is incorrect.
+            PasswordHashingUnavailableError: If the password hasher is saturated.
         """
         # Retrieve the user from the repository by email
-        user = self.repository.find_by_email(email)
+        user = await self.repository.find_by_email(email)
         
         # Check if the user exists and the password matches the stored hash
-        if not user or not checkpw(password.encode(), user.password_hash.encode()):
+        if not user or not await self.password_hasher.verify_password(password, user.password_hash):
             raise InvalidCredentialsError()
         
         return user
\ No newline at end of file
@@ -0,0 +1,29 @@
+from abc import ABC, abstractmethod
+from bcrypt import gensalt, hashpw, checkpw
+
+class PasswordHasher(ABC):
+    """
+    Hashes and verifies passwords. Implementations decide where the (deliberately
+    slow) bcrypt work runs.
+    """
+
+    @abstractmethod
+    async def hash_password(self, password: str) -> str:
+        pass
+
+    @abstractmethod
+    async def verify_password(self, password: str, password_hash: str) -> bool:
+        pass
+
+class InlineBcryptHasher(PasswordHasher):
+    """
+    Runs bcrypt on the calling thread. Simple, but it blocks the event loop for the
+    whole hash; servers should use a worker pool such as
+    infrastructure.auth.password_hasher.BcryptWorkerPool instead.
+    """
+
+    async def hash_password(self, password: str) -> str:
+        return hashpw(password.encode(), gensalt()).decode()
+
+    async def verify_password(self, password: str, password_hash: str) -> bool:
+        return checkpw(password.encode(), password_hash.encode())
@@ -1,23 +1,44 @@
-from typing import List
-from ..entities.task import Task
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel, ValidationError
+from ..entities.task import TOMBSTONE_RETENTION, Task, TaskBatchResult, TaskChanges, TaskPage, TaskUpdate
 from ..repositories.task_repository import TaskRepository
-from ..exceptions.task_errors import TaskNotFoundError, TaskPermissionError
+from ..exceptions.task_errors import (TaskNotFoundError, TaskPermissionError, InvalidCursorError,
+                                      InvalidSyncTokenError, SyncTokenExpiredError, BatchTooLargeError)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# A write is assumed to be visible within this time of the updated_at it
+# carries (app clocks and in-flight writes); sync tokens are set back by it,
+# so clients may receive a change twice but never miss one
+SYNC_OVERLAP = timedelta(seconds=2)
+
+# Most items a batch request may hold (TASK_BATCH_MAX_ITEMS)
+DEFAULT_MAX_BATCH_SIZE = 100
 
 class TaskService:
     """
     Service class for handling task-related operations.
     """
 
-    def __init__(self, repository: TaskRepository):
+    def __init__(self, repository: TaskRepository, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 tombstone_retention: timedelta = TOMBSTONE_RETENTION):
         """
         Initializes the TaskService with a task repository.
 
         Args:
             repository: An instance of TaskRepository to interact with the task data store.
+            max_batch_size: Most items accepted by the batch operations.
+            tombstone_retention: How long deleted tasks are remembered for delta sync.
         """
         self.repository = repository
+        self.max_batch_size = max_batch_size
+        self.tombstone_retention = tombstone_retention
             
-    def create_task(self, title: str, user_email: str, description: str) -> Task:
+    async def create_task(self, title: str, user_email: str, description: str) -> Task:
         """
         Creates a new task for a user.
 
@@ -30,9 +51,9 @@ class TaskService:
             The created Task object.
         """
         task = Task(title=title, user_email=user_email, description=description)
-        return self.repository.create_task(task)
+        return await self.repository.create_task(task)
             
-    def complete_task(self, task_id: str) -> Task:
+    async def complete_task(self, task_id: str) -> Task:
         """
         Marks a task as completed.
 
@@ -45,65 +66,388 @@ class TaskService:
         Raises:
             TaskNotFoundError: If the task with the given ID does not exist.
         """
-        task = self.repository.get_task_by_id(task_id)
+        task = await self.repository.get_task_by_id(task_id)
         if not task:
             raise TaskNotFoundError()
         task.mark_completed()
-        return self.repository.update_task(task_id, task.dict())
+        return await self.repository.update_task(task_id, task.dict())
             
-    def get_user_tasks(self, user_email: str) -> List[Task]:
+    async def get_list_version(self, user_email: str) -> int:
+        """
+        Returns the version of a user's task list, which changes with every
+        write to their tasks.
+
+        Args:
+            user_email: The email of the user whose list version is wanted.
+
+        Returns:
+            The version, 0 for a user who never had tasks.
+        """
+        return await self.repository.get_list_version(user_email)
+
+    async def get_user_tasks(self, user_email: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                             version: Optional[int] = None) -> TaskPage:
         """
-        Retrieves all tasks for a specific user.
+        Retrieves one page of tasks for a specific user.
 
         Args:
             user_email: The email of the user whose tasks are to be retrieved.
+            limit: Maximum number of tasks in the page (capped at MAX_PAGE_SIZE).
+            cursor: Opaque cursor returned with the previous page, or None for the first page.
+            version: The list version the caller read beforehand, if any; a cached list at another version is not used.
 
         Returns:
-            A list of Task objects belonging to the user.
+            A TaskPage with the tasks and the cursor for the next page, if any.
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed.
         """
-        return self.repository.get_user_tasks(user_email)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        after_id = _decode_cursor(cursor) if cursor else None
+        # Fetch one extra task to know whether another page follows
+        tasks = await self.repository.get_user_tasks(user_email, limit=limit + 1, after_id=after_id, version=version)
+        if len(tasks) <= limit:
+            return TaskPage(items=tasks)
+        tasks = tasks[:limit]
+        return TaskPage(items=tasks, next_cursor=_encode_cursor(tasks[-1].id))
+
+    async def get_user_changes(self, user_email: str, since: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                               now: Optional[datetime] = None) -> TaskChanges:
+        """
+        Retrieves the changes to a user's tasks since a sync token.
+
+        Without a token this is the initial sync: every live task, in id order.
+        With one, it is the tasks created or updated after the token and the
+        ids of those deleted after it, oldest change first. Either way
+        has_more tells whether to call again at once with the returned token;
+        once it is False the token is the checkpoint for the next sync.
+
+        Args:
+            user_email: The email of the user whose changes are wanted.
+            since: sync_token from the previous call, or None for the initial sync.
+            limit: Maximum number of changes returned (capped at MAX_PAGE_SIZE).
+            now: The current time; for tests.
+
+        Returns:
+            A TaskChanges with the changed tasks, the deleted ids and the next token.
+
+        Raises:
+            InvalidSyncTokenError: If the token is malformed.
+            SyncTokenExpiredError: If the token is older than the tombstone retention.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        now = now or datetime.now(timezone.utc)
+        initial, since_at, after_id = _decode_sync_token(since) if since else (True, now, None)
+        if since_at < now - self.tombstone_retention:
+            raise SyncTokenExpiredError()
+
+        changes = await self.repository.get_user_changes(user_email, None if initial else since_at, after_id, limit + 1)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        if has_more:
+            # Resume after the last change returned; an initial sync keeps its start time
+            last = changes[-1]
+            token = _encode_sync_token(initial, since_at if initial else last.updated_at, last.id)
+        else:
+            checkpoint = since_at if initial else now
+            token = _encode_sync_token(False, checkpoint - SYNC_OVERLAP, None)
+        return TaskChanges(
+            tasks=[change.task for change in changes if change.task is not None],
+            deleted=[change.id for change in changes if change.task is None],
+            sync_token=token,
+            has_more=has_more,
+        )
 
-    def update_task(self, task_id: str, updates: dict, user_email: str) -> Task:
+    async def update_task(self, task_id: str, updates: dict, user_email: str) -> Task:
         """
-        Updates a task with the given updates.
+        Updates a task owned by the user with the given updates.
+
+        Ownership is part of the update filter, so the common case is a single
+        repository call; the task is only looked up again when nothing matched.
 
         Args:
             task_id: The ID of the task to update.
             updates: A dictionary containing the fields to update.
+            user_email: The email of the user making the change.
 
         Returns:
             The updated Task object.
 
         Raises:
             TaskNotFoundError: If the task with the given ID does not exist.
+            TaskPermissionError: If the task belongs to another user.
         """
-        task = self.repository.get_task_by_id(task_id)
-        if not task:
-            raise TaskNotFoundError()
-        if task.user_email != user_email:
-            raise TaskPermissionError()
-        updated_task = self.repository.update_task(task_id, updates)
+        updated_task = await self.repository.update_user_task(task_id, user_email, updates)
         if not updated_task:
-            raise TaskNotFoundError()
+            await self._raise_for_missing_task(task_id)
         return updated_task
 
 
-    def delete_task(self, task_id: str, user_email: str) -> bool:
+    async def delete_task(self, task_id: str, user_email: str) -> bool:
         """
-        Deletes a task by its ID.
+        Deletes a task owned by the user.
 
         Args:
             task_id: The ID of the task to delete.
+            user_email: The email of the user making the change.
 
         Returns:
-            True if the task was successfully deleted, False otherwise.
+            True if the task was successfully deleted.
 
         Raises:
             TaskNotFoundError: If the task with the given ID does not exist.
+            TaskPermissionError: If the task belongs to another user.
         """
-        task = self.repository.get_task_by_id(task_id)
-        if not task:
+        if not await self.repository.delete_user_task(task_id, user_email, self.tombstone_retention):
+            await self._raise_for_missing_task(task_id)
+        return True
+
+    async def create_tasks(self, user_email: str, items: List[Any], ordered: bool = False) -> List[TaskBatchResult]:
+        """
+        Creates many tasks for a user with one repository write.
+
+        Every item is validated first. In an unordered batch the valid items
+        are created and the invalid ones reported; in an ordered batch nothing
+        after the first failed item is applied (status 424).
+
+        Args:
+            user_email: The email of the user who owns the tasks.
+            items: The tasks to create, as dicts with the fields of a single create.
+            ordered: Stop at the first failure instead of applying every valid item.
+
+        Returns:
+            One TaskBatchResult per item, in the order given: 201 with the task,
+            400 for an invalid item, 500 for a failed write or 424.
+
+        Raises:
+            BatchTooLargeError: If there are more than max_batch_size items.
+        """
+        self._check_batch_size(items)
+        results: List[Optional[TaskBatchResult]] = [None] * len(items)
+        planned: List[Tuple[int, Task]] = []
+        for index, item in enumerate(items):
+            task, message = _parse_item(Task, item, id=None, user_email=user_email)
+            if message:
+                results[index] = TaskBatchResult(index=index, status=400, error=message)
+            else:
+                planned.append((index, task))
+
+        planned = _applicable(planned, results, ordered)
+        created = await self.repository.create_tasks([task for _, task in planned], ordered) if planned else []
+        failed = []
+        for (index, _), task in zip(planned, created):
+            if task is None:
+                failed.append(index)
+            else:
+                results[index] = TaskBatchResult(index=index, status=201, id=task.id, task=task)
+        return _settle(results, failed, ordered)
+
+    async def update_tasks(self, user_email: str, items: List[Any], ordered: bool = False) -> List[TaskBatchResult]:
+        """
+        Updates many tasks owned by the user with one read and one repository write.
+
+        Items are validated, and the tasks they name looked up, before anything
+        is written; updates naming the same task apply in order. See
+        create_tasks for the ordered and unordered behavior.
+
+        Args:
+            user_email: The email of the user making the changes.
+            items: Dicts with the id of the task and the fields of a single update.
+            ordered: Stop at the first failure instead of applying every valid item.
+
+        Returns:
+            One TaskBatchResult per item: 200 with the updated task, 400 for an
+            invalid item, 404 for a missing task, 403 for another user's task,
+            500 for a failed write or 424.
+
+        Raises:
+            BatchTooLargeError: If there are more than max_batch_size items.
+        """
+        self._check_batch_size(items)
+        results: List[Optional[TaskBatchResult]] = [None] * len(items)
+        parsed: List[Tuple[int, str, Dict[str, Any]]] = []
+        for index, item in enumerate(items):
+            update, message = _parse_item(TaskUpdate, item)
+            task_id = item.get("id") if isinstance(item, dict) else None
+            if not message and not isinstance(task_id, str):
+                message = "Task ID missing"
+            if message:
+                results[index] = TaskBatchResult(index=index, status=400, error=message)
+            else:
+                parsed.append((index, task_id, update.model_dump(exclude_unset=True)))
+
+        current = await self._current_tasks([task_id for _, task_id, _ in parsed])
+        planned: List[Tuple[int, Tuple[str, Dict[str, Any]], Task]] = []
+        for index, task_id, fields in parsed:
+            failure = _ownership_failure(index, task_id, current.get(task_id), user_email)
+            if failure:
+                results[index] = failure
+                continue
+            # The state the task will have once this and the earlier updates to it are applied
+            current[task_id] = current[task_id].model_copy(update=fields)
+            planned.append((index, (task_id, fields), current[task_id]))
+
+        planned = _applicable(planned, results, ordered)
+        applied = await self.repository.update_user_tasks(user_email, [update for _, update, _ in planned], ordered) if planned else []
+        failed = []
+        for (index, (task_id, _), task), ok in zip(planned, applied):
+            if ok:
+                results[index] = TaskBatchResult(index=index, status=200, id=task_id, task=task)
+            else:
+                failed.append(index)
+        return _settle(results, failed, ordered)
+
+    async def delete_tasks(self, user_email: str, task_ids: List[Any], ordered: bool = False) -> List[TaskBatchResult]:
+        """
+        Deletes many tasks owned by the user with one read and one repository
+        write. See update_tasks; a task named twice is 404 the second time.
+
+        Args:
+            user_email: The email of the user making the changes.
+            task_ids: The ids of the tasks to delete.
+            ordered: Stop at the first failure instead of applying every valid item.
+
+        Returns:
+            One TaskBatchResult per id: 204, 400 for an id that is not a string,
+            404, 403, 500 or 424 as for update_tasks.
+
+        Raises:
+            BatchTooLargeError: If there are more than max_batch_size ids.
+        """
+        self._check_batch_size(task_ids)
+        results: List[Optional[TaskBatchResult]] = [None] * len(task_ids)
+        for index, task_id in enumerate(task_ids):
+            if not isinstance(task_id, str):
+                results[index] = TaskBatchResult(index=index, status=400, error="Task ID must be a string")
+
+        parsed = [(index, task_id) for index, task_id in enumerate(task_ids) if results[index] is None]
+        current = await self._current_tasks([task_id for _, task_id in parsed])
+        planned: List[Tuple[int, str]] = []
+        for index, task_id in parsed:
+            failure = _ownership_failure(index, task_id, current.get(task_id), user_email)
+            if failure:
+                results[index] = failure
+                continue
+            del current[task_id]
+            planned.append((index, task_id))
+
+        planned = _applicable(planned, results, ordered)
+        deleted = (await self.repository.delete_user_tasks(user_email, [task_id for _, task_id in planned], ordered,
+                                                           self.tombstone_retention) if planned else [])
+        failed = []
+        for (index, task_id), ok in zip(planned, deleted):
+            if ok:
+                results[index] = TaskBatchResult(index=index, status=204, id=task_id)
+            else:
+                failed.append(index)
+        return _settle(results, failed, ordered)
+
+    def _check_batch_size(self, items: List[Any]) -> None:
+        if len(items) > self.max_batch_size:
+            raise BatchTooLargeError(self.max_batch_size)
+
+    async def _current_tasks(self, task_ids: List[str]) -> Dict[str, Task]:
+        """Looks up the live tasks with the given ids, of any owner, in one read."""
+        if not task_ids:
+            return {}
+        tasks = await self.repository.get_tasks_by_ids(list(dict.fromkeys(task_ids)))
+        return {task.id: task for task in tasks}
+
+    async def _raise_for_missing_task(self, task_id: str) -> None:
+        """
+        Tells a missing task apart from one owned by someone else after an
+        ownership-filtered write matched nothing.
+        """
+        if await self.repository.get_task_by_id(task_id) is None:
             raise TaskNotFoundError()
-        if task.user_email != user_email:
-            raise TaskPermissionError()
-        return self.repository.delete_task(task_id)
\ No newline at end of file
+        raise TaskPermissionError()
+
+
+def _parse_item(model: type, item: Any, **fields: Any) -> Tuple[Optional[BaseModel], Optional[str]]:
+    """
+    Validates one batch item as the model, with fields overriding the item's
+    own, and returns (value, None) or (None, the reason it is invalid).
+    """
+    if not isinstance(item, dict):
+        return None, "Item must be an object"
+    try:
+        return model(**{**item, **fields}), None
+    except ValidationError as e:
+        return None, f"Validation Error: {e.errors()}"
+
+
+def _ownership_failure(index: int, task_id: str, task: Optional[Task], user_email: str) -> Optional[TaskBatchResult]:
+    """Returns the result of a batch item naming a missing task or another user's, None if the user owns it."""
+    if task is None:
+        return TaskBatchResult(index=index, status=404, id=task_id, error=str(TaskNotFoundError()))
+    if task.user_email != user_email:
+        return TaskBatchResult(index=index, status=403, id=task_id, error=str(TaskPermissionError()))
+    return None
+
+
+def _applicable(planned: List[tuple], results: List[Optional[TaskBatchResult]], ordered: bool) -> List[tuple]:
+    """
+    Keeps the planned writes (tuples starting with the item index) an ordered
+    batch still applies: those before its first invalid item.
+    """
+    failures = [index for index, result in enumerate(results) if result is not None]
+    if not ordered or not failures:
+        return planned
+    return [write for write in planned if write[0] < failures[0]]
+
+
+def _settle(results: List[Optional[TaskBatchResult]], failed: List[int], ordered: bool) -> List[TaskBatchResult]:
+    """
+    Reports the items whose write failed, and marks the items of an ordered
+    batch left unapplied after its first failure as 424.
+    """
+    for position, index in enumerate(failed):
+        # An ordered write stops at its first error; the later items were never tried
+        if ordered and position:
+            break
+        results[index] = TaskBatchResult(index=index, status=500, error="Write failed")
+    return [result or TaskBatchResult(index=index, status=424, error="Not applied after an earlier item failed")
+            for index, result in enumerate(results)]
+
+
+def _encode_cursor(task_id: str) -> str:
+    """Encodes a task id as an opaque, URL-safe cursor."""
+    return base64.urlsafe_b64encode(bytes.fromhex(task_id)).rstrip(b"=").decode()
+
+
+def _decode_cursor(cursor: str) -> str:
+    """Decodes a cursor produced by _encode_cursor back into a task id."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    except (binascii.Error, ValueError):
+        raise InvalidCursorError()
+    if len(raw) != 12:
+        raise InvalidCursorError()
+    return raw.hex()
+
+
+def _encode_sync_token(initial: bool, at: datetime, after_id: Optional[str]) -> str:
+    """
+    Encodes a sync position as an opaque, URL-safe token: the phase ("i" while
+    an initial sync is paging, "d" for deltas), a time in epoch milliseconds and
+    the id of the last change returned, if the position is within a page.
+    """
+    raw = f"{'i' if initial else 'd'}.{int(at.timestamp() * 1000)}.{after_id or ''}"
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def _decode_sync_token(token: str) -> Tuple[bool, datetime, Optional[str]]:
+    """Decodes a token produced by _encode_sync_token into (initial, time, after id)."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        phase, milliseconds, after_id = raw.split(".")
+        at = datetime.fromtimestamp(int(milliseconds) / 1000, timezone.utc)
+    except (binascii.Error, ValueError, UnicodeDecodeError, OverflowError, OSError):
+        raise InvalidSyncTokenError()
+    if phase not in ("i", "d") or (after_id and len(after_id) != 24) or (phase == "i" and not after_id):
+        raise InvalidSyncTokenError()
+    try:
+        bytes.fromhex(after_id)
+    except ValueError:
+        raise InvalidSyncTokenError()
+    return phase == "i", at, after_id or None
@@ -1,19 +1,35 @@
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
 import jwt
 from datetime import datetime, timedelta, timezone # Import timezone
-from core.entities.user import User # Assuming User model is defined correctly
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core.entities.user import User
 
 class JWTProvider:
-    def __init__(self):
+    def __init__(self, cache_size: int | None = None):
         # It's safer to raise an error if the secret is missing
         self.secret = os.getenv("JWT_SECRET")
         if not self.secret:
             raise ValueError("JWT_SECRET environment variable not set.")
         self.algorithm = "HS256"
         self.expiry_hours = 24
+        # Verified tokens, keyed by SHA-256 digest: digest -> (claims, exp timestamp)
+        self.cache_size = cache_size if cache_size is not None else int(os.getenv("JWT_CACHE_SIZE", 1024))
+        self._cache: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
 
-    def generate_token(self, user: User) -> str:
+    def generate_token(self, user: "User") -> str:
         """Generates a JWT token for the given user."""
+        # Imported here so verifying tokens does not load the User model
+        # (and the email validator behind EmailStr)
+        from core.entities.user import User
         if not isinstance(user, User):
              raise TypeError("Input must be a User object")
 
@@ -32,7 +48,26 @@ class JWTProvider:
             raise # Re-raise the exception to indicate failure
 
     def decode_token(self, token: str) -> dict | None:
-        """Decodes a JWT token and returns the payload or None if invalid."""
+        """
+        Decodes a JWT token and returns the payload or None if invalid.
+
+        Tokens that verified before are answered from a bounded LRU cache until
+        their 'exp', skipping the HMAC check and claim parsing. Only valid tokens
+        are cached, keyed by their SHA-256 digest.
+        """
+        digest = hashlib.sha256(token.encode()).digest() if self.cache_size else None
+        if digest is not None:
+            with self._cache_lock:
+                entry = self._cache.get(digest)
+                if entry is not None:
+                    claims, expires_at = entry
+                    if expires_at > time.time():
+                        self._cache.move_to_end(digest)
+                        self._hits += 1
+                        return dict(claims)
+                    del self._cache[digest]
+                self._misses += 1
+
         try:
             # Decode the token
             payload = jwt.decode(
@@ -40,8 +75,6 @@ class JWTProvider:
                 self.secret,
                 algorithms=[self.algorithm]
             )
-            # 'sub' will be a string here, which is usually fine
-            return payload
         except jwt.ExpiredSignatureError:
             return None
         except jwt.InvalidTokenError as e:
@@ -49,3 +82,38 @@ class JWTProvider:
         except Exception as e:
             # Catch any other unexpected errors during decoding
             return None
+
+        expires_at = payload.get("exp")
+        if digest is not None and isinstance(expires_at, (int, float)):
+            with self._cache_lock:
+                self._cache[digest] = (dict(payload), float(expires_at))
+                self._cache.move_to_end(digest)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        # 'sub' will be a string here, which is usually fine
+        return payload
+
+    def cache_stats(self) -> dict:
+        """Returns hit/miss counters, the hit rate and the current size of the verified-token cache."""
+        with self._cache_lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "size": len(self._cache),
+                "max_size": self.cache_size,
+            }
+
+
+_provider: JWTProvider | None = None
+_provider_lock = threading.Lock()
+
+def get_jwt_provider() -> JWTProvider:
+    """Returns the process-wide JWTProvider, so every caller shares one verified-token cache."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = JWTProvider()
+    return _provider
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from bcrypt import gensalt, hashpw, checkpw
+
+from core.exceptions.auth_errors import PasswordHashingUnavailableError
+from core.services.password_hasher import PasswordHasher
+from infrastructure.monitoring.histogram import Histogram
+
+logger = logging.getLogger(__name__)
+
+class BcryptWorkerPool(PasswordHasher):
+    """
+    Runs bcrypt hashing and verification in a dedicated, size-bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so the event loop keeps serving other
+    requests in the meantime. At most max_workers hashes run at once and at most
+    max_queue more wait for a worker; beyond that calls fail immediately with
+    PasswordHashingUnavailableError instead of piling up behind a long queue.
+
+    Args:
+        max_workers: Worker threads (PASSWORD_HASH_WORKERS, default min(4, CPU count)).
+        max_queue: Calls allowed to wait for a worker (PASSWORD_HASH_QUEUE_LIMIT, default 16).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", 16))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._started = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        # Time calls spent waiting for a worker, in milliseconds
+        self.wait_histogram = Histogram()
+
+    async def hash_password(self, password: str) -> str:
+        return (await self._run(hashpw, password.encode(), gensalt())).decode()
+
+    async def verify_password(self, password: str, password_hash: str) -> bool:
+        return await self._run(checkpw, password.encode(), password_hash.encode())
+
+    async def _run(self, fn: Callable, *args: Any) -> Any:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                logger.warning("Password hashing pool saturated (%d in flight), rejecting request", self._in_flight)
+                raise PasswordHashingUnavailableError()
+            self._in_flight += 1
+        submitted = time.perf_counter()
+
+        def job():
+            waited = time.perf_counter() - submitted
+            with self._lock:
+                self._running += 1
+                self._started += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+            self.wait_histogram.observe(waited * 1000)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the pool's current metrics: queue depth (calls waiting for a worker),
+        active workers, completed and rejected calls, and the average and maximum
+        time calls spent waiting for a worker, in milliseconds.
+        """
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_limit": self.max_queue,
+                "queue_depth": self._in_flight - self._running,
+                "active": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "wait_ms_avg": (self._total_wait / self._started * 1000) if self._started else 0.0,
+                "wait_ms_max": self._max_wait * 1000,
+            }
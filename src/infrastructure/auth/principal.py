@@ -0,0 +1,48 @@
+from typing import Any, Dict, Optional
+from core.entities.principal import Principal
+from core.exceptions.auth_errors import AuthenticationError
+from infrastructure.auth.jwt_provider import get_jwt_provider
+from infrastructure.monitoring.server_timing import timed
+
+def resolve_principal(authorization: Optional[str]) -> Principal:
+    """
+    Resolves the caller from the value of an Authorization header.
+
+    Args:
+        authorization: The raw header value, expected as "Bearer <token>".
+
+    Returns:
+        The authenticated Principal.
+
+    Raises:
+        AuthenticationError: If the header is missing or malformed, the token is
+            invalid or expired, or its payload has no email.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise AuthenticationError("Authorization header missing or invalid")
+
+    with timed("auth"):
+        claims = get_jwt_provider().decode_token(authorization[7:])
+    if claims is None:
+        raise AuthenticationError("Invalid or expired token")
+
+    email = claims.get("email")
+    if not email:
+        raise AuthenticationError("Invalid token payload")
+    return Principal(email=email)
+
+def get_current_user(event: Dict[str, Any]) -> Principal:
+    """
+    Extracts the current user from the JWT token in Lambda events.
+
+    Args:
+        event: The Lambda event containing the request headers.
+
+    Returns:
+        The authenticated Principal.
+
+    Raises:
+        AuthenticationError: If the token is missing or invalid.
+    """
+    headers = event.get("headers") or {}
+    return resolve_principal(headers.get("authorization", headers.get("Authorization")))
@@ -0,0 +1,209 @@
+import bisect
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.entities.task import TOMBSTONE_RETENTION, Task, TaskChange
+from core.repositories.task_list_cache import TaskListCache, TaskListEntry
+from core.repositories.task_repository import TaskRepository
+
+DEFAULT_MAX_TASKS = 500
+
+# Number of write counters users are hashed onto (see _generation)
+_GENERATION_BUCKETS = 256
+
+
+class CachedTaskRepository(TaskRepository):
+    """
+    TaskRepository serving get_user_tasks from a per-user cache of complete
+    task lists, in front of another TaskRepository.
+
+    A miss loads the user's first max_tasks + 1 tasks in one query. When that
+    is the whole list it is cached and every page (any limit and cursor) is
+    sliced from it; a user with more tasks is cached as "too large" and read
+    from the repository as before. Writes go to the repository first and then
+    patch the cached list in place (create inserts, update replaces, delete
+    removes), so a user always reads their own writes.
+
+    Entries carry the list version they were loaded at. A caller passing the
+    version it just read (as the conditional GET does) gets a reloaded list
+    when the entry is at another version, e.g. after a write on another
+    instance; each write here advances the entry's version along with the patch.
+
+    Batch writes, and every write with a shared cache (TaskListCache.shared),
+    drop the users' entries instead, to be reloaded by their next read.
+
+    A list loaded while the same user wrote is not cached: the write may have
+    patched the cache before the stale list would overwrite it. That guard only
+    sees this process; a stale list another instance stores in a shared cache
+    keeps the older version it was loaded at, so it is reloaded all the same.
+
+    Args:
+        repository: The repository the cache sits in front of.
+        cache: Where the lists are kept (see infrastructure.cache.task_list_cache).
+        max_tasks: Longest list cached per user (TASK_CACHE_MAX_TASKS, default 500).
+    """
+
+    def __init__(self, repository: TaskRepository, cache: TaskListCache, max_tasks: int = DEFAULT_MAX_TASKS):
+        self.repository = repository
+        self.cache = cache
+        self.max_tasks = max_tasks
+        self._generations = [0] * _GENERATION_BUCKETS
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+
+    def _bucket(self, user_email: str) -> int:
+        return zlib.crc32(user_email.encode()) % _GENERATION_BUCKETS
+
+    def _generation(self, user_email: str) -> int:
+        return self._generations[self._bucket(user_email)]
+
+    def _count(self, result: str) -> None:
+        with self._lock:
+            if result == "hit":
+                self._hits += 1
+            elif result == "miss":
+                self._misses += 1
+            else:
+                self._bypassed += 1
+
+    async def get_user_tasks(self, user_email: str, limit: Optional[int] = None, after_id: Optional[str] = None,
+                             version: Optional[int] = None) -> List[Task]:
+        entry = await self.cache.get(user_email)
+        if entry is None or (entry.tasks is not None and version is not None and entry.version != version):
+            self._count("miss")
+            entry = await self._load(user_email, version)
+        elif entry.tasks is not None:
+            self._count("hit")
+        if entry.tasks is None:
+            self._count("bypass")
+            return await self.repository.get_user_tasks(user_email, limit=limit, after_id=after_id)
+
+        start = bisect.bisect_right(entry.ids, after_id) if after_id else 0
+        end = start + limit if limit else len(entry.tasks)
+        return list(entry.tasks[start:end])
+
+    async def _load(self, user_email: str, version: Optional[int]) -> TaskListEntry:
+        generation = self._generation(user_email)
+        # The version is read before the list, so the list is at least as new as the version
+        if version is None:
+            version = await self.repository.get_list_version(user_email)
+        tasks = await self.repository.get_user_tasks(user_email, limit=self.max_tasks + 1)
+        entry = TaskListEntry(tasks if len(tasks) <= self.max_tasks else None, version)
+        if self._generation(user_email) == generation:
+            await self.cache.set(user_email, entry)
+        return entry
+
+    async def _patch(self, user_email: str, task_id: str, task: Optional[Task]) -> None:
+        """Replaces (or inserts, or with task=None removes) one task in the user's cached list."""
+        if self.cache.shared:
+            await self._invalidate(user_email)
+            return
+        self._generations[self._bucket(user_email)] += 1
+        entry = await self.cache.get(user_email)
+        if entry is None:
+            return
+        if entry.tasks is None:
+            # A delete may bring a "too large" user under the limit
+            if task is None:
+                await self.cache.delete(user_email)
+            return
+        tasks = list(entry.tasks)
+        index = bisect.bisect_left(entry.ids, task_id)
+        found = index < len(tasks) and entry.ids[index] == task_id
+        if task is None:
+            if not found:
+                return
+            del tasks[index]
+        elif found:
+            tasks[index] = task
+        else:
+            tasks.insert(index, task)
+        # The write bumped the stored version once; if others wrote in between the entry ends up
+        # behind it and is reloaded by the next read that passes the version
+        version = entry.version + 1 if entry.version is not None else None
+        if len(tasks) > self.max_tasks:
+            await self.cache.set(user_email, TaskListEntry(None))
+        else:
+            await self.cache.set(user_email, TaskListEntry(tasks, version))
+
+    async def _invalidate(self, user_email: str) -> None:
+        """Drops the user's cached list, e.g. after a batch write touching many of its tasks."""
+        self._generations[self._bucket(user_email)] += 1
+        await self.cache.delete(user_email)
+
+    async def create_task(self, task: Task) -> Task:
+        created = await self.repository.create_task(task)
+        await self._patch(created.user_email, created.id, created)
+        return created
+
+    async def get_task_by_id(self, task_id: str) -> Optional[Task]:
+        return await self.repository.get_task_by_id(task_id)
+
+    async def update_task(self, task_id: str, updates: Dict[str, Any]) -> Optional[Task]:
+        updated = await self.repository.update_task(task_id, updates)
+        if updated is not None:
+            await self._patch(updated.user_email, updated.id, updated)
+        return updated
+
+    async def update_user_task(self, task_id: str, user_email: str, updates: Dict[str, Any]) -> Optional[Task]:
+        updated = await self.repository.update_user_task(task_id, user_email, updates)
+        if updated is not None:
+            await self._patch(user_email, updated.id, updated)
+        return updated
+
+    async def delete_task(self, task_id: str, retention: timedelta = TOMBSTONE_RETENTION) -> bool:
+        # The cached list to patch is the owner's, which only the task itself tells
+        task = await self.repository.get_task_by_id(task_id)
+        deleted = await self.repository.delete_task(task_id, retention)
+        if deleted and task is not None:
+            await self._patch(task.user_email, task.id, None)
+        return deleted
+
+    async def delete_user_task(self, task_id: str, user_email: str, retention: timedelta = TOMBSTONE_RETENTION) -> bool:
+        deleted = await self.repository.delete_user_task(task_id, user_email, retention)
+        if deleted:
+            await self._patch(user_email, task_id, None)
+        return deleted
+
+    async def create_tasks(self, tasks: List[Task], ordered: bool = False) -> List[Optional[Task]]:
+        created = await self.repository.create_tasks(tasks, ordered)
+        for user_email in dict.fromkeys(task.user_email for task in created if task is not None):
+            await self._invalidate(user_email)
+        return created
+
+    async def get_tasks_by_ids(self, task_ids: List[str]) -> List[Task]:
+        return await self.repository.get_tasks_by_ids(task_ids)
+
+    async def update_user_tasks(self, user_email: str, updates: List[Tuple[str, dict]], ordered: bool = False) -> List[bool]:
+        applied = await self.repository.update_user_tasks(user_email, updates, ordered)
+        if any(applied):
+            await self._invalidate(user_email)
+        return applied
+
+    async def delete_user_tasks(self, user_email: str, task_ids: List[str], ordered: bool = False,
+                                retention: timedelta = TOMBSTONE_RETENTION) -> List[bool]:
+        deleted = await self.repository.delete_user_tasks(user_email, task_ids, ordered, retention)
+        if any(deleted):
+            await self._invalidate(user_email)
+        return deleted
+
+    async def get_user_changes(self, user_email: str, since: Optional[datetime], after_id: Optional[str], limit: int) -> List[TaskChange]:
+        return await self.repository.get_user_changes(user_email, since, after_id, limit)
+
+    async def get_list_version(self, user_email: str) -> int:
+        return await self.repository.get_list_version(user_email)
+
+    def cache_stats(self) -> dict:
+        """Returns the list lookups answered from the cache (hits), loaded into it (misses) or read past it (bypassed)."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "bypassed": self._bypassed,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,189 @@
+"""
+Backends of the per-user task-list cache (see CachedTaskRepository).
+
+TASK_CACHE selects the backend:
+    local   (default) an LRU in the process, bounded by TASK_CACHE_MAX_USERS
+            entries; on Lambda each warm container keeps its own
+    shared  a key-value store every instance reads; a write on any instance
+            drops the user's entry there, so every instance reloads it on its
+            next read; TASK_CACHE_URL points at a Redis server (needs the
+            redis package)
+    off     no cache; the repository is used directly
+
+Entries expire TASK_CACHE_TTL_S (default 60) seconds after they were stored.
+Lists read for a conditional GET are also checked against the stored list
+version (see CachedTaskRepository), so a write on another instance is not
+hidden behind a local entry.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from core.entities.task import Task
+from core.repositories.task_list_cache import TaskListCache, TaskListEntry
+
+DEFAULT_TTL_S = 60.0
+DEFAULT_MAX_USERS = 1024
+
+
+class LocalTaskListCache(TaskListCache):
+    """Entries in a size- and TTL-bounded LRU, shared by everything in the process."""
+
+    def __init__(self, max_users: int = DEFAULT_MAX_USERS, ttl_s: float = DEFAULT_TTL_S):
+        self.max_users = max_users
+        self.ttl_s = ttl_s
+        # user email -> (entry, monotonic expiry)
+        self._entries: OrderedDict[str, Tuple[TaskListEntry, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, user_email: str) -> Optional[TaskListEntry]:
+        with self._lock:
+            item = self._entries.get(user_email)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._entries[user_email]
+                return None
+            self._entries.move_to_end(user_email)
+            return entry
+
+    async def set(self, user_email: str, entry: TaskListEntry) -> None:
+        with self._lock:
+            self._entries[user_email] = (entry, time.monotonic() + self.ttl_s)
+            self._entries.move_to_end(user_email)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    async def delete(self, user_email: str) -> None:
+        with self._lock:
+            self._entries.pop(user_email, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class KeyValueStore(ABC):
+    """The few operations SharedTaskListCache needs from a shared store."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_s: float) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
+
+
+class InMemoryKeyValueStore(KeyValueStore):
+    """
+    Local stand-in for a shared store, for tests and local runs. Values are
+    bytes, so callers go through the same encoding as with a real store.
+
+    Args:
+        latency: Simulated round trip in seconds per operation.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.values: Dict[str, Tuple[bytes, float]] = {}
+        self.operations = 0
+
+    async def _round_trip(self) -> None:
+        self.operations += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        await self._round_trip()
+        item = self.values.get(key)
+        if item is None or item[1] <= time.monotonic():
+            self.values.pop(key, None)
+            return None
+        return item[0]
+
+    async def set(self, key: str, value: bytes, ttl_s: float) -> None:
+        await self._round_trip()
+        self.values[key] = (value, time.monotonic() + ttl_s)
+
+    async def delete(self, key: str) -> None:
+        await self._round_trip()
+        self.values.pop(key, None)
+
+
+class RedisKeyValueStore(KeyValueStore):
+    """KeyValueStore on a Redis server, through the asyncio client of the redis package."""
+
+    def __init__(self, url: str):
+        # Imported here: redis is only needed when the shared backend is configured
+        try:
+            import redis.asyncio
+        except ImportError as e:
+            raise RuntimeError("TASK_CACHE=shared needs the redis package (see requirements.txt)") from e
+        self.client = redis.asyncio.Redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl_s: float) -> None:
+        await self.client.set(key, value, px=max(1, int(ttl_s * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+
+class SharedTaskListCache(TaskListCache):
+    """Entries encoded as JSON in a KeyValueStore, under "<prefix><user email>"."""
+
+    shared = True
+
+    def __init__(self, store: KeyValueStore, ttl_s: float = DEFAULT_TTL_S, prefix: str = "task-list:"):
+        self.store = store
+        self.ttl_s = ttl_s
+        self.prefix = prefix
+
+    async def get(self, user_email: str) -> Optional[TaskListEntry]:
+        value = await self.store.get(self.prefix + user_email)
+        if value is None:
+            return None
+        document = json.loads(value)
+        tasks = document["tasks"]
+        return TaskListEntry([Task.model_validate(task) for task in tasks] if tasks is not None else None,
+                             document.get("version"))
+
+    async def set(self, user_email: str, entry: TaskListEntry) -> None:
+        tasks = [task.model_dump() for task in entry.tasks] if entry.tasks is not None else None
+        value = json.dumps({"tasks": tasks, "version": entry.version}, separators=(",", ":")).encode()
+        await self.store.set(self.prefix + user_email, value, self.ttl_s)
+
+    async def delete(self, user_email: str) -> None:
+        await self.store.delete(self.prefix + user_email)
+
+
+def task_list_cache_from_env() -> Optional[TaskListCache]:
+    """The backend selected by TASK_CACHE, or None when the cache is off."""
+    backend = os.getenv("TASK_CACHE", "local").lower()
+    ttl_s = float(os.getenv("TASK_CACHE_TTL_S", DEFAULT_TTL_S))
+    if backend == "off":
+        return None
+    if backend == "shared":
+        url = os.getenv("TASK_CACHE_URL")
+        if not url:
+            raise ValueError("TASK_CACHE_URL must be set for the shared task cache")
+        return SharedTaskListCache(RedisKeyValueStore(url), ttl_s)
+    if backend != "local":
+        raise ValueError(f"Unknown TASK_CACHE backend: {backend}")
+    return LocalTaskListCache(int(os.getenv("TASK_CACHE_MAX_USERS", DEFAULT_MAX_USERS)), ttl_s)
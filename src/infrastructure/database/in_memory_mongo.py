@@ -0,0 +1,395 @@
+import asyncio
+import copy
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.operations import DeleteOne, UpdateOne
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+
+class InMemoryCursor:
+    """
+    Minimal stand-in for pymongo's AsyncCursor.
+
+    Supports the chaining and iteration styles used by the repositories:
+    sort(), limit(), to_list() and `async for`.
+    """
+
+    def __init__(self, collection: "InMemoryCollection", filter: Dict[str, Any], projection: Optional[Dict[str, Any]] = None):
+        self._collection = collection
+        self._filter = filter or {}
+        self._projection = projection
+        self._sort: List[Tuple[str, int]] = []
+        self._limit = 0
+        self._results: Optional[List[Dict[str, Any]]] = None
+
+    def sort(self, key_or_list, direction: int = 1) -> "InMemoryCursor":
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction)]
+        else:
+            self._sort = list(key_or_list)
+        return self
+
+    def limit(self, limit: int) -> "InMemoryCursor":
+        self._limit = limit
+        return self
+
+    async def _fetch(self) -> List[Dict[str, Any]]:
+        if self._results is None:
+            await self._collection._command("find", filter=self._filter)
+            docs = [doc for doc in self._collection._documents if _matches(doc, self._filter)]
+            for key, direction in reversed(self._sort):
+                docs.sort(key=lambda d: _sort_key(d.get(key)), reverse=direction < 0)
+            if self._limit:
+                docs = docs[:self._limit]
+            self._results = [_project(doc, self._projection) for doc in docs]
+        return self._results
+
+    async def explain(self) -> Dict[str, Any]:
+        await self._collection._command("explain")
+        return {"queryPlanner": {"winningPlan": self._collection._winning_plan(self._filter)}}
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        results = await self._fetch()
+        return list(results if length is None else results[:length])
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in await self._fetch():
+            yield doc
+
+
+# The write command pymongo sends for each kind of bulk write request
+_BULK_COMMANDS = {UpdateOne: "update", DeleteOne: "delete"}
+
+
+class InMemoryCollection:
+    """
+    Minimal asyncio stand-in for a PyMongo collection, backed by a list of dicts.
+
+    Every awaited call counts as one command against the owning database, so tests
+    can assert round trips, and each command waits `latency` seconds to mimic the
+    network (blocking the event loop when the database is created with blocking=True).
+    """
+
+    def __init__(self, database: "InMemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self._documents: List[Dict[str, Any]] = []
+        self.indexes: Dict[str, Dict[str, Any]] = {}
+
+    async def _command(self, name: str, **spec: Any) -> None:
+        await self.database._execute(name, self.name, spec)
+
+    async def insert_one(self, document: Dict[str, Any]) -> InsertOneResult:
+        await self._command("insert")
+        document.setdefault("_id", ObjectId())
+        self._check_unique(document)
+        self._documents.append(copy.deepcopy(document))
+        return InsertOneResult(document["_id"], acknowledged=True)
+
+    async def insert_many(self, documents: List[Dict[str, Any]], ordered: bool = True) -> InsertManyResult:
+        await self._command("insert", documents=len(documents), ordered=ordered)
+        inserted, errors = [], []
+        for index, document in enumerate(documents):
+            document.setdefault("_id", ObjectId())
+            try:
+                self._check_unique(document)
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+                continue
+            self._documents.append(copy.deepcopy(document))
+            inserted.append(document["_id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted), "nMatched": 0, "nModified": 0,
+                                  "nRemoved": 0, "nUpserted": 0, "upserted": [], "writeConcernErrors": []})
+        return InsertManyResult(inserted, acknowledged=True)
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True) -> BulkWriteResult:
+        """
+        Applies UpdateOne and DeleteOne requests, recording the commands pymongo
+        sends for them: one "update" or "delete" command per run of requests of
+        that kind (consecutive runs when ordered, one per kind when unordered).
+        """
+        kinds = [_BULK_COMMANDS.get(type(request)) for request in requests]
+        if None in kinds:
+            raise TypeError(f"Unsupported bulk write request: {requests[kinds.index(None)]!r}")
+        if ordered:
+            runs = [(kind, len(list(group))) for kind, group in itertools.groupby(kinds)]
+        else:
+            runs = [(kind, kinds.count(kind)) for kind in ("update", "delete") if kind in kinds]
+        for kind, count in runs:
+            await self._command(kind, operations=count, ordered=ordered)
+        matched = modified = removed = 0
+        upserted = []
+        for position, request in enumerate(requests):
+            for index, doc in enumerate(self._documents):
+                if _matches(doc, request._filter):
+                    if isinstance(request, UpdateOne):
+                        _apply_update(doc, request._doc)
+                        matched += 1
+                        modified += 1
+                    elif isinstance(request, DeleteOne):
+                        del self._documents[index]
+                        removed += 1
+                    break
+            else:
+                if isinstance(request, UpdateOne) and request._upsert:
+                    doc = _upsert_document(request._filter, request._doc)
+                    self._documents.append(doc)
+                    upserted.append({"index": position, "_id": doc["_id"]})
+        return BulkWriteResult({"nInserted": 0, "nMatched": matched, "nModified": modified, "nRemoved": removed,
+                                "nUpserted": len(upserted), "upserted": upserted, "writeErrors": [],
+                                "writeConcernErrors": []}, acknowledged=True)
+
+    def _check_unique(self, document: Dict[str, Any]) -> None:
+        """Raises DuplicateKeyError, like the server, if the document collides on _id or a unique index."""
+        unique_keys = [["_id"]] + [[key for key, _ in index["key"]] for index in self.indexes.values() if index["unique"]]
+        for keys in unique_keys:
+            values = [document.get(key) for key in keys]
+            for existing in self._documents:
+                if [existing.get(key) for key in keys] == values:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} dup key: {dict(zip(keys, values))}", 11000)
+
+    async def find_one(self, filter: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        await self._command("find", filter=filter or {})
+        for doc in self._documents:
+            if _matches(doc, filter or {}):
+                return _project(doc, projection)
+        return None
+
+    def find(self, filter: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None) -> InMemoryCursor:
+        return InMemoryCursor(self, filter, projection)
+
+    async def find_one_and_update(self, filter: Dict[str, Any], update: Dict[str, Any], projection: Optional[Dict[str, Any]] = None, return_document: bool = False, upsert: bool = False) -> Optional[Dict[str, Any]]:
+        await self._command("findAndModify", query=filter, update=update)
+        for doc in self._documents:
+            if _matches(doc, filter):
+                before = copy.deepcopy(doc)
+                _apply_update(doc, update)
+                return _project(doc if return_document else before, projection)
+        if upsert:
+            doc = _upsert_document(filter, update)
+            self._documents.append(doc)
+            return _project(doc, projection) if return_document else None
+        return None
+
+    async def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> UpdateResult:
+        await self._command("update", updates=[{"q": filter, "u": update}])
+        for doc in self._documents:
+            if _matches(doc, filter):
+                _apply_update(doc, update)
+                return UpdateResult({"n": 1, "nModified": 1}, acknowledged=True)
+        if upsert:
+            doc = _upsert_document(filter, update)
+            self._documents.append(doc)
+            return UpdateResult({"n": 1, "nModified": 0, "upserted": doc["_id"]}, acknowledged=True)
+        return UpdateResult({"n": 0, "nModified": 0}, acknowledged=True)
+
+    async def find_one_and_delete(self, filter: Dict[str, Any], projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        await self._command("findAndModify", query=filter, remove=True)
+        for index, doc in enumerate(self._documents):
+            if _matches(doc, filter):
+                del self._documents[index]
+                return _project(doc, projection)
+        return None
+
+    async def delete_one(self, filter: Dict[str, Any]) -> DeleteResult:
+        await self._command("delete", deletes=[{"q": filter, "limit": 1}])
+        for index, doc in enumerate(self._documents):
+            if _matches(doc, filter):
+                del self._documents[index]
+                return DeleteResult({"n": 1}, acknowledged=True)
+        return DeleteResult({"n": 0}, acknowledged=True)
+
+    async def create_index(self, keys, name: Optional[str] = None, unique: bool = False, **kwargs) -> str:
+        await self._command("createIndexes")
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        name = name or "_".join(f"{key}_{direction}" for key, direction in keys)
+        self.indexes[name] = {"key": list(keys), "unique": unique, **kwargs}
+        return name
+
+    async def create_indexes(self, indexes: List[Any]) -> List[str]:
+        await self._command("createIndexes")
+        names = []
+        for model in indexes:
+            spec = dict(model.document)
+            keys = list(spec.pop("key").items())
+            name = spec.pop("name")
+            self.indexes[name] = {"key": keys, "unique": spec.pop("unique", False), **spec}
+            names.append(name)
+        return names
+
+    def _winning_plan(self, filter: Dict[str, Any]) -> Dict[str, Any]:
+        """Approximates the query planner: an index is usable if the filter constrains its first key."""
+        if "_id" in filter and not isinstance(filter["_id"], dict):
+            return {"stage": "IDHACK"}
+        for name, index in self.indexes.items():
+            if index["key"][0][0] in filter:
+                return {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": name}}
+        if "_id" in filter:
+            return {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "_id_"}}
+        return {"stage": "COLLSCAN"}
+
+    async def count_documents(self, filter: Dict[str, Any]) -> int:
+        await self._command("count", query=filter)
+        return sum(1 for doc in self._documents if _matches(doc, filter))
+
+
+class InMemoryDatabase:
+    """
+    Local stand-in for an AsyncDatabase, used by tests and benchmarks in place of a
+    real MongoDB server. Install it with MongoConnection.use_database().
+
+    Args:
+        latency: Seconds each command waits before completing, mimicking a network round trip.
+        blocking: If True the wait uses time.sleep, reproducing a synchronous driver
+                  that stalls the event loop.
+        event_listeners: pymongo CommandListeners to notify of each command, as the
+                  client does (with duck-typed events carrying the same attributes).
+        max_in_flight: Most commands waiting at once, like a client's maxPoolSize
+                  connections; the others queue. None for no limit.
+    """
+
+    def __init__(self, latency: float = 0.0, blocking: bool = False, event_listeners: Optional[List[Any]] = None,
+                 max_in_flight: Optional[int] = None):
+        self.latency = latency
+        self.blocking = blocking
+        self.max_in_flight = max_in_flight
+        self._connections: Optional[asyncio.Semaphore] = None
+        self._connections_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.event_listeners = list(event_listeners or [])
+        self.commands: List[Tuple[str, str]] = []
+        self._request_ids = itertools.count(1)
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, command: str) -> Dict[str, Any]:
+        # Database commands carry a value, not a collection name, e.g. {"ping": 1}
+        await self._execute(command, "admin", {}, target=1)
+        return {"ok": 1.0}
+
+    async def _execute(self, name: str, collection: str, spec: Dict[str, Any], target: Any = None) -> None:
+        self.commands.append((name, collection))
+        if not self.event_listeners:
+            await self._wait()
+            return
+        event = _CommandEvent(name, dict({name: collection if target is None else target}, **spec), next(self._request_ids))
+        for listener in self.event_listeners:
+            listener.started(event)
+        start = time.perf_counter()
+        await self._wait()
+        event.duration_micros = int((time.perf_counter() - start) * 1e6)
+        for listener in self.event_listeners:
+            listener.succeeded(event)
+
+    async def _wait(self) -> None:
+        if not self.latency:
+            return
+        if self.blocking:
+            time.sleep(self.latency)
+        elif self.max_in_flight:
+            loop = asyncio.get_running_loop()
+            if self._connections_loop is not loop:
+                self._connections, self._connections_loop = asyncio.Semaphore(self.max_in_flight), loop
+            async with self._connections:
+                await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+
+
+class _CommandEvent:
+    """The attributes of pymongo's command monitoring events that listeners read."""
+
+    def __init__(self, command_name: str, command: Dict[str, Any], request_id: int):
+        self.command_name = command_name
+        self.command = command
+        self.request_id = request_id
+        self.connection_id = ("in-memory", 0)
+        self.database_name = "in-memory"
+        self.duration_micros = 0
+
+
+def _sort_key(value: Any):
+    # Missing fields sort first, as in MongoDB
+    return (value is not None, value)
+
+
+def _matches(doc: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    for key, condition in filter.items():
+        if key == "$or":
+            if not any(_matches(doc, branch) for branch in condition):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+            for op, operand in condition.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$exists" and (key in doc) != bool(operand):
+                    return False
+                if op in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if op == "$gt" and not value > operand:
+                        return False
+                    if op == "$gte" and not value >= operand:
+                        return False
+                    if op == "$lt" and not value < operand:
+                        return False
+                    if op == "$lte" and not value <= operand:
+                        return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _apply_update(doc: Dict[str, Any], update: Dict[str, Any]) -> None:
+    for key, value in update.get("$set", {}).items():
+        doc[key] = copy.deepcopy(value)
+    for key, value in update.get("$inc", {}).items():
+        doc[key] = doc.get(key, 0) + value
+    for key in update.get("$unset", {}):
+        doc.pop(key, None)
+
+
+def _upsert_document(filter: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    doc = {k: copy.deepcopy(v) for k, v in filter.items() if not isinstance(v, dict)}
+    for key, value in update.get("$setOnInsert", {}).items():
+        doc[key] = copy.deepcopy(value)
+    _apply_update(doc, update)
+    doc.setdefault("_id", ObjectId())
+    return doc
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(doc)
+    included = {k for k, v in projection.items() if v}
+    if included:
+        result = {k: copy.deepcopy(v) for k, v in doc.items() if k in included}
+        if projection.get("_id", 1):
+            result["_id"] = doc.get("_id")
+        return result
+    return {k: copy.deepcopy(v) for k, v in doc.items() if k not in projection}
@@ -0,0 +1,192 @@
+"""
+Declarative MongoDB index registry.
+
+Repositories declare the indexes their queries need (INDEXES, a list of
+pymongo IndexModel) and one representative QueryShape per query they issue
+(QUERY_SHAPES), and register themselves with @register_indexes. At startup
+provision_indexes() creates every declared index and, in verification mode
+(MONGO_VERIFY_INDEXES=true), runs explain() on every query shape and fails if
+any of them would scan the whole collection.
+
+Verification can also be run against a live database from the command line:
+    python -m infrastructure.database.indexes --verify
+"""
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import ConnectionFailure
+
+from .mongo_connection import MongoConnection
+
+logger = logging.getLogger(__name__)
+
+_registered_repositories: List[type] = []
+_provisioned = False
+
+
+class QueryShape:
+    """
+    A representative query issued by a repository method. Only the field names
+    and operators matter; the values are placeholders used for explain().
+    """
+
+    def __init__(self, method: str, filter: Dict[str, Any], sort: Optional[List[tuple]] = None):
+        self.method = method
+        self.filter = filter
+        self.sort = sort
+
+    def __repr__(self) -> str:
+        return f"QueryShape({self.method!r})"
+
+
+class IndexVerificationError(Exception):
+    def __init__(self, failures: List[str]):
+        self.failures = failures
+        super().__init__("Queries without a usable index: " + "; ".join(failures))
+
+
+def register_indexes(repository_cls: type) -> type:
+    """Class decorator adding a repository's INDEXES and QUERY_SHAPES to the registry."""
+    if repository_cls not in _registered_repositories:
+        _registered_repositories.append(repository_cls)
+    return repository_cls
+
+
+def registered_repositories() -> List[type]:
+    return list(_registered_repositories)
+
+
+def verification_enabled() -> bool:
+    """Verification runs at startup when MONGO_VERIFY_INDEXES is set to a true value."""
+    return os.getenv("MONGO_VERIFY_INDEXES", "").lower() in ("1", "true", "yes")
+
+
+async def provision_indexes() -> bool:
+    """
+    Startup hook: creates the registered indexes and, when verification is enabled,
+    checks every query plan. Runs once per process, since Mangum replays the ASGI
+    lifespan on every Lambda invocation. If MongoDB cannot be reached, or a unique
+    index could not be created, it is tried again on the next call (subject to
+    the connection backoff).
+
+    Returns:
+        True once provisioning has run, False if MongoDB was unreachable or a
+        unique index is still missing.
+
+    Raises:
+        IndexVerificationError: In verification mode, if a query plan is a COLLSCAN.
+    """
+    global _provisioned
+    if _provisioned:
+        return True
+    try:
+        await ensure_indexes()
+    except ConnectionFailure as e:
+        logger.error("Could not ensure MongoDB indexes, database unreachable: %s", e)
+        return False
+    except Exception as e:
+        # Only a collection with a unique index gets here (see ensure_indexes)
+        logger.error("Could not ensure a unique MongoDB index, will retry: %s", e)
+        return False
+    if verification_enabled():
+        await verify_query_plans()
+    _provisioned = True
+    return True
+
+
+async def ensure_indexes() -> None:
+    """
+    Creates every registered index with one createIndexes command per collection (idempotent).
+
+    A collection whose indexes cannot be created is logged and skipped, since
+    its queries still work without them, only slower, unless one of them is
+    unique: that one enforces a constraint (e.g. one account per email), so
+    the error is raised.
+
+    Raises:
+        ConnectionFailure: If MongoDB cannot be reached.
+        Exception: If a collection with a unique index could not get its indexes.
+    """
+    db = await MongoConnection.get_db()
+    for repository_cls in _registered_repositories:
+        if not repository_cls.INDEXES:
+            continue
+        try:
+            names = await db[repository_cls.COLLECTION].create_indexes(repository_cls.INDEXES)
+        except ConnectionFailure:
+            raise
+        except Exception as e:
+            if any(index.document.get("unique") for index in repository_cls.INDEXES):
+                raise
+            logger.error("Could not create the indexes on '%s': %s", repository_cls.COLLECTION, e)
+            continue
+        logger.info("Indexes ready on '%s': %s", repository_cls.COLLECTION, names)
+
+
+async def verify_query_plans() -> Dict[str, List[str]]:
+    """
+    Runs explain() on every registered query shape.
+
+    Returns:
+        A mapping of "collection.method" to the plan stages of its winning plan.
+
+    Raises:
+        IndexVerificationError: If any winning plan contains a COLLSCAN stage.
+    """
+    db = await MongoConnection.get_db()
+    plans: Dict[str, List[str]] = {}
+    failures: List[str] = []
+    for repository_cls in _registered_repositories:
+        collection = db[repository_cls.COLLECTION]
+        for shape in repository_cls.QUERY_SHAPES:
+            cursor = collection.find(shape.filter)
+            if shape.sort:
+                cursor = cursor.sort(shape.sort)
+            explanation = await cursor.explain()
+            stages = plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+            key = f"{repository_cls.COLLECTION}.{shape.method}"
+            plans[key] = stages
+            if "COLLSCAN" in stages:
+                failures.append(f"{key} ({' <- '.join(stages)})")
+    if failures:
+        raise IndexVerificationError(failures)
+    return plans
+
+
+def plan_stages(plan: Any) -> List[str]:
+    """Flattens an explain() plan tree (including sharded and SBE layouts) into its stage names."""
+    stages: List[str] = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for key in ("queryPlan", "inputStage", "inputStages", "shards", "winningPlan"):
+            if key in plan:
+                stages.extend(plan_stages(plan[key]))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    # Import through the package so the repositories register with the same
+    # module object whose functions are called below (not this __main__ copy).
+    from . import mongo_repositories  # noqa: F401
+    from .indexes import ensure_indexes, verify_query_plans
+
+    parser = argparse.ArgumentParser(description="Create the registered MongoDB indexes and optionally verify query plans.")
+    parser.add_argument("--verify", action="store_true", help="fail if any repository query plan is a COLLSCAN")
+    args = parser.parse_args()
+
+    async def run():
+        await ensure_indexes()
+        if args.verify:
+            for key, stages in (await verify_query_plans()).items():
+                print(f"{key}: {' <- '.join(stages)}")
+        await MongoConnection.close_connection()
+
+    asyncio.run(run())
@@ -1,111 +1,312 @@
+import asyncio
 import os
-from pymongo import MongoClient
-from pymongo.database import Database
+import time
+from typing import Any, Dict, List, Optional
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
 # Import OperationFailure as well
 from pymongo.errors import ConnectionFailure, ConfigurationError, OperationFailure
+from infrastructure.monitoring.mongo_commands import command_metrics
+from infrastructure.monitoring.mongo_pool import pool_metrics
 # from dotenv import load_dotenv # Not needed in Lambda
 import logging
 
-# --- Lambda Logging Configuration ---
-# Get the root logger used by Lambda
-logger = logging.getLogger()
-# Set the level to INFO to see your messages
-logger.setLevel(logging.INFO)
-# ------------------------------------------
+logger = logging.getLogger(__name__)
 
 # load_dotenv() # Commented out
 
+# Connection pool defaults per deployment profile (MONGO_POOL_PROFILE). A Lambda
+# container serves one invocation at a time, so it needs few connections and
+# should fail fast when they are all busy; a long-running worker serves many
+# concurrent requests from one pool.
+POOL_PROFILES: Dict[str, Dict[str, Any]] = {
+    "lambda": {
+        "maxPoolSize": 10,
+        "minPoolSize": 1,
+        # Replace connections left idle across long freezes instead of finding
+        # them dead on the next request
+        "maxIdleTimeMS": 60000,
+        "waitQueueTimeoutMS": 1000,
+        "maxConnecting": 2,
+    },
+    "server": {
+        "maxPoolSize": 100,
+        "minPoolSize": 10,
+        "maxIdleTimeMS": 600000,
+        "waitQueueTimeoutMS": 5000,
+        "maxConnecting": 2,
+    },
+}
+
+# Environment variable overriding each pool option
+_POOL_SETTINGS = {
+    "maxPoolSize": "MONGO_MAX_POOL_SIZE",
+    "minPoolSize": "MONGO_MIN_POOL_SIZE",
+    "maxIdleTimeMS": "MONGO_MAX_IDLE_TIME_MS",
+    "waitQueueTimeoutMS": "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+    "maxConnecting": "MONGO_MAX_CONNECTING",
+}
+
+def pool_options() -> Dict[str, Any]:
+    """
+    Client keyword arguments for the connection pool.
+
+    Starts from the MONGO_POOL_PROFILE defaults ("lambda" when running in AWS
+    Lambda, "server" otherwise) and applies the individual overrides, e.g.
+    MONGO_MAX_POOL_SIZE. MONGO_COMPRESSORS is a comma-separated list of wire
+    compressors ("zstd", "snappy", "zlib"); compression is off by default.
+
+    Raises:
+        ValueError: If the profile is unknown or an override is not an integer.
+    """
+    profile = os.getenv("MONGO_POOL_PROFILE") or ("lambda" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "server")
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"Unknown MONGO_POOL_PROFILE: {profile}")
+    options = dict(POOL_PROFILES[profile])
+    for option, variable in _POOL_SETTINGS.items():
+        value = os.getenv(variable)
+        if value:
+            options[option] = int(value)
+    compressors = os.getenv("MONGO_COMPRESSORS")
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
 class MongoConnection:
-    _client: MongoClient = None
-    _db: Database = None
+    """
+    Process-wide MongoDB client.
+
+    The client is created and pinged once, ideally during the Lambda init phase
+    (see lambda_handler.py). After that get_db() returns the cached database
+    without touching the network: the successful ping is trusted for
+    MONGO_HEALTH_TTL_SECONDS, after which it is repeated in the background while
+    requests carry on. A failed connect starts an exponential backoff
+    (MONGO_CONNECT_BACKOFF_SECONDS, doubling up to MONGO_CONNECT_BACKOFF_MAX_SECONDS)
+    during which get_db() fails immediately instead of every request waiting
+    for server selection to time out.
+
+    A failed health check only marks the connection unhealthy and delays the
+    next check by the same backoff. The client stays in place: other requests
+    may be using it, and pymongo's server monitoring reconnects it on its own.
+    """
+    _client: AsyncMongoClient = None
+    _db: AsyncDatabase = None
+    _healthy_until: float = 0.0
+    _retry_at: float = 0.0
+    _failures: int = 0
+    _last_error: Optional[str] = None
+    _health_check: Optional[asyncio.Task] = None
+    _connect_lock: Optional[asyncio.Lock] = None
+    _connect_lock_loop: Optional[asyncio.AbstractEventLoop] = None
 
     @classmethod
-    def get_db(cls) -> Database:
-        if cls._db is None:
-            try:
-                # Get variables from Lambda environment
-                mongo_uri = os.getenv("MONGO_URI")
-                database_name = os.getenv("DATABASE_NAME")
-
-                # --- Log before checking variables ---
-                logger.info("Inside get_db method.")
-                # -------------------------------------------
-
-                if not mongo_uri:
-                    logger.error("MONGO_URI environment variable not set.")
-                    raise ValueError("MONGO_URI environment variable not set.")
-                if not database_name:
-                     logger.error("DATABASE_NAME environment variable not set.")
-                     raise ValueError("DATABASE_NAME environment variable not set.")
-
-                # --- Log the URI being used (last 30 chars) ---
-                # Use logger.info, not print
-                logger.info(f"Attempting to connect using MONGO_URI ending with: ...{mongo_uri[-30:]}")
-                logger.info(f"Attempting to connect to database: {database_name}")
-                # ---------------------------------------------
-
-                # Set serverSelectionTimeoutMS to fail faster if server is down
-                # connectTimeoutMS might also be useful
-                cls._client = MongoClient(
-                    mongo_uri,
-                    serverSelectionTimeoutMS=5000,
-                    connectTimeoutMS=5000 # Added connection timeout
-                )
-
-                # The ping command requires authentication after initial connection
-                # This is where the AuthenticationFailed error happens
-                logger.info("Pinging MongoDB admin database...") # Log before ping
-                cls._client.admin.command('ping')
-                logger.info("MongoDB ping successful (authentication successful).")
-
-                cls._db = cls._client[database_name]
-                logger.info(f"Accessed database: {database_name}")
-
-            except (ValueError, ConfigurationError) as config_err:
-                logger.exception(f"MongoDB configuration error: {config_err}")
-                cls._client = None # Ensure client is None on error
-                cls._db = None
-                raise # Re-raise config errors
-            except OperationFailure as auth_err: # Catch authentication errors specifically
-                # Log details from the OperationFailure
-                logger.exception(f"MongoDB authentication/operation failed: {auth_err.details.get('errmsg', auth_err)}, full error: {auth_err.details}")
-                cls._client = None
-                cls._db = None
-                raise auth_err # Re-raise the specific error
-            except ConnectionFailure as conn_err:
-                logger.exception(f"MongoDB connection failed (network/server issue?): {conn_err}")
-                cls._client = None
-                cls._db = None
-                raise conn_err # Re-raise connection errors
-            except Exception as e: # Catch any other unexpected errors
-                logger.exception(f"An unexpected error occurred during MongoDB setup: {e}")
-                cls._client = None
-                cls._db = None
-                raise
+    async def get_db(cls) -> AsyncDatabase:
+        """
+        Returns the database, connecting first if needed.
+
+        Raises:
+            ConnectionFailure: If the last connection attempt failed and the
+                backoff has not elapsed, or if connecting fails now.
+            ValueError, ConfigurationError, OperationFailure: On configuration
+                or authentication errors while connecting.
+        """
+        if cls._db is not None:
+            now = time.monotonic()
+            if cls._client is not None and now >= cls._healthy_until and now >= cls._retry_at and cls._health_check is None:
+                cls._health_check = asyncio.ensure_future(cls._check_health())
+            return cls._db
+
+        retry_in = cls._retry_at - time.monotonic()
+        if retry_in > 0:
+            raise ConnectionFailure(f"MongoDB unavailable, next connection attempt in {retry_in:.1f}s: {cls._last_error}")
+
+        async with cls._lock():
+            # Another request may have connected (or failed) while we waited
+            if cls._db is None:
+                if cls._retry_at > time.monotonic():
+                    raise ConnectionFailure(f"MongoDB unavailable: {cls._last_error}")
+                await cls._connect()
         return cls._db
 
     @classmethod
-    def close_connection(cls):
+    async def _connect(cls) -> None:
+        try:
+            # Get variables from Lambda environment
+            mongo_uri = os.getenv("MONGO_URI")
+            database_name = os.getenv("DATABASE_NAME")
+
+            if not mongo_uri:
+                logger.error("MONGO_URI environment variable not set.")
+                raise ValueError("MONGO_URI environment variable not set.")
+            if not database_name:
+                 logger.error("DATABASE_NAME environment variable not set.")
+                 raise ValueError("DATABASE_NAME environment variable not set.")
+
+            # --- Log the URI being used (last 30 chars) ---
+            # Use logger.info, not print
+            logger.info("Attempting to connect using MONGO_URI ending with: ...%s", mongo_uri[-30:])
+            logger.info("Attempting to connect to database: %s", database_name)
+            # ---------------------------------------------
+
+            # Set serverSelectionTimeoutMS to fail faster if server is down
+            # connectTimeoutMS might also be useful
+            options = pool_options()
+            logger.info("MongoDB pool options: %s", options)
+            client = AsyncMongoClient(
+                mongo_uri,
+                serverSelectionTimeoutMS=5000,
+                connectTimeoutMS=5000, # Added connection timeout
+                event_listeners=[pool_metrics, command_metrics],
+                **options
+            )
+            cls._client = client
+
+            # The ping command requires authentication after initial connection
+            # This is where the AuthenticationFailed error happens
+            logger.info("Pinging MongoDB admin database...") # Log before ping
+            await client.admin.command('ping')
+            logger.info("MongoDB ping successful (authentication successful).")
+
+            cls._db = client[database_name]
+            cls._mark_healthy()
+            logger.info("Accessed database: %s", database_name)
+
+        except (ValueError, ConfigurationError) as config_err:
+            logger.exception("MongoDB configuration error: %s", config_err)
+            await cls._mark_failed(config_err)
+            raise # Re-raise config errors
+        except OperationFailure as auth_err: # Catch authentication errors specifically
+            # Log details from the OperationFailure
+            logger.exception("MongoDB authentication/operation failed: %s, full error: %s", auth_err.details.get('errmsg', auth_err), auth_err.details)
+            await cls._mark_failed(auth_err)
+            raise auth_err # Re-raise the specific error
+        except ConnectionFailure as conn_err:
+            logger.exception("MongoDB connection failed (network/server issue?): %s", conn_err)
+            await cls._mark_failed(conn_err)
+            raise conn_err # Re-raise connection errors
+        except Exception as e: # Catch any other unexpected errors
+            logger.exception("An unexpected error occurred during MongoDB setup: %s", e)
+            await cls._mark_failed(e)
+            raise
+
+    @classmethod
+    async def _check_health(cls) -> None:
+        """Background ping once the cached health state has expired."""
+        client = cls._client
+        try:
+            await client.admin.command('ping')
+            if client is cls._client:
+                cls._mark_healthy()
+        except Exception as e:
+            logger.warning("MongoDB health check failed: %s", e)
+            if client is cls._client:
+                cls._mark_unhealthy(e)
+        finally:
+            cls._health_check = None
+
+    @classmethod
+    def _mark_healthy(cls) -> None:
+        cls._healthy_until = time.monotonic() + float(os.getenv("MONGO_HEALTH_TTL_SECONDS", 300))
+        cls._retry_at = 0.0
+        cls._failures = 0
+        cls._last_error = None
+
+    @classmethod
+    def _mark_unhealthy(cls, error: Exception) -> None:
+        """Records a failure and backs off the next connection attempt or health check."""
+        cls._healthy_until = 0.0
+        cls._failures += 1
+        initial = float(os.getenv("MONGO_CONNECT_BACKOFF_SECONDS", 1))
+        limit = float(os.getenv("MONGO_CONNECT_BACKOFF_MAX_SECONDS", 30))
+        cls._retry_at = time.monotonic() + min(limit, initial * 2 ** (cls._failures - 1))
+        cls._last_error = str(error)
+
+    @classmethod
+    async def _mark_failed(cls, error: Exception) -> None:
+        """Drops a client that failed to connect, which nothing else uses yet, and backs off."""
+        client, cls._client, cls._db = cls._client, None, None
+        cls._mark_unhealthy(error)
+        if client is not None:
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+    @classmethod
+    def _lock(cls) -> asyncio.Lock:
+        """One connect at a time; the lock belongs to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if cls._connect_lock is None or cls._connect_lock_loop is not loop:
+            cls._connect_lock, cls._connect_lock_loop = asyncio.Lock(), loop
+        return cls._connect_lock
+
+    @classmethod
+    def health(cls) -> Dict[str, Any]:
+        """Cached connection state, without contacting the server."""
+        now = time.monotonic()
+        return {
+            "connected": cls._db is not None,
+            "healthy": cls._db is not None and (cls._client is None or now < cls._healthy_until),
+            "consecutive_failures": cls._failures,
+            "retry_in_s": max(0.0, cls._retry_at - now),
+            "last_error": cls._last_error,
+        }
+
+    @classmethod
+    def pool_stats(cls) -> Dict[str, Any]:
+        """Live connection pool metrics (see infrastructure.monitoring.mongo_pool)."""
+        return pool_metrics.snapshot()
+
+    @classmethod
+    def command_stats(cls) -> List[Dict[str, Any]]:
+        """Per-command latency histograms (see infrastructure.monitoring.mongo_commands)."""
+        return command_metrics.snapshot()
+
+    @classmethod
+    def use_database(cls, db) -> None:
+        """
+        Installs an already connected database (or a local stand-in such as
+        InMemoryDatabase) so that get_db() skips connecting. Meant for tests,
+        benchmarks and local runs.
+        """
+        cls._client = None
+        cls._db = db
+        cls._healthy_until = cls._retry_at = 0.0
+        cls._failures = 0
+        cls._last_error = None
+
+    @classmethod
+    async def close_connection(cls):
         if cls._client:
             logger.info("Closing MongoDB connection.")
-            cls._client.close()
+            await cls._client.close()
             cls._client = None
             cls._db = None
+            cls._healthy_until = 0.0
 
 
-def get_task_collection():
+async def get_task_collection():
     """Gets the 'tasks' collection from MongoDB."""
     try:
-        db = MongoConnection.get_db()
+        db = await MongoConnection.get_db()
         return db.tasks
     except Exception as e:
         logger.exception("Failed to get 'tasks' collection due to DB connection error.")
         raise
 
-def get_user_collection():
+async def get_task_list_version_collection():
+    """Gets the 'task_list_versions' collection from MongoDB."""
+    try:
+        db = await MongoConnection.get_db()
+        return db.task_list_versions
+    except Exception as e:
+        logger.exception("Failed to get 'task_list_versions' collection due to DB connection error.")
+        raise
+
+async def get_user_collection():
     """Gets the 'users' collection from MongoDB."""
     try:
-        db = MongoConnection.get_db()
+        db = await MongoConnection.get_db()
         return db.users
     except Exception as e:
         logger.exception("Failed to get 'users' collection due to DB connection error.")
@@ -1,76 +1,156 @@
-from typing import List, Optional, Dict, Any
-from core.entities.task import Task
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Dict, Any, Tuple, Union
+from core.entities.task import TOMBSTONE_RETENTION, Task, TaskChange
 from core.entities.user import User
 from core.repositories.task_repository import TaskRepository
 from core.repositories.user_repository import UserRepository
-from .mongo_connection import get_task_collection, get_user_collection
+from core.exceptions.auth_errors import UserAlreadyExistsError
+from .mongo_connection import get_task_collection, get_task_list_version_collection, get_user_collection
+from .indexes import QueryShape, provision_indexes, register_indexes
+from .write_coalescer import DEFAULT_MAX_ITEMS, WriteCoalescer
+from infrastructure.monitoring.mongo_commands import tag_repository_methods
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError, WriteError
+import asyncio
 import logging
 logger = logging.getLogger(__name__)
 
+@register_indexes
+@tag_repository_methods
 class MongoTaskRepository(TaskRepository):
     """
     MongoDB implementation of the TaskRepository interface.
-    Handles CRUD operations for tasks in the MongoDB database.
+    Handles CRUD operations for tasks in the MongoDB database using the
+    asyncio PyMongo driver, so queries never block the event loop.
+
+    Every write also bumps the owner's task-list version, a counter kept in
+    the task_list_versions collection ({_id: user email, version}), so a
+    client can tell whether a user's tasks changed with one point read on _id.
+
+    Every write also stamps the task with updated_at, and deleting a task
+    turns it into a tombstone ({_id, user_email, updated_at, deleted: true})
+    that the TTL index removes after the retention window, so the changes
+    since any recent point in time can be listed (get_user_changes).
+    Tombstones are invisible to every other method. How long they are kept is
+    the caller's policy (TaskService passes its retention to every delete).
+
+    With insert_delay_ms set, concurrent create_task calls are grouped into
+    one insert_many and one version bump per batch (see write_coalescer).
+
+    Args:
+        insert_delay_ms: Longest a create waits for others to share its insert (TASK_INSERT_COALESCE_MS); 0 inserts each task at once.
+        insert_max_batch: Most tasks per grouped insert (TASK_INSERT_COALESCE_MAX).
     """
 
-    def create_task(self, task: Task) -> Task:
+    # Indexes and representative query shapes, read by the index registry
+    # (infrastructure.database.indexes) to provision and verify them.
+    COLLECTION = "tasks"
+    INDEXES = [
+        # Keyset-paginated task list: equality on user_email, range/sort on _id
+        IndexModel([("user_email", ASCENDING), ("_id", ASCENDING)], name="user_email_id"),
+        # Delta sync: equality on user_email, range/sort on (updated_at, _id)
+        IndexModel([("user_email", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)], name="user_email_updated_at"),
+        # Tombstones carry expires_at (live tasks do not) and are removed once it passes
+        IndexModel([("expires_at", ASCENDING)], name="tombstone_ttl", expireAfterSeconds=0),
+    ]
+    QUERY_SHAPES = [
+        QueryShape("get_task_by_id", {"_id": ObjectId(), "deleted": {"$ne": True}}),
+        QueryShape("get_user_tasks", {"user_email": "", "_id": {"$gt": ObjectId()}, "deleted": {"$ne": True}},
+                   sort=[("_id", ASCENDING)]),
+        QueryShape("get_user_changes", {"user_email": "", "updated_at": {"$gt": datetime.now(timezone.utc)}},
+                   sort=[("updated_at", ASCENDING), ("_id", ASCENDING)]),
+        QueryShape("update_task", {"_id": ObjectId(), "deleted": {"$ne": True}}),
+        QueryShape("update_user_task", {"_id": ObjectId(), "user_email": "", "deleted": {"$ne": True}}),
+        QueryShape("delete_task", {"_id": ObjectId(), "deleted": {"$ne": True}}),
+        QueryShape("delete_user_task", {"_id": ObjectId(), "user_email": "", "deleted": {"$ne": True}}),
+        QueryShape("get_tasks_by_ids", {"_id": {"$in": [ObjectId()]}, "deleted": {"$ne": True}}),
+    ]
+
+    def __init__(self, insert_delay_ms: float = 0, insert_max_batch: int = DEFAULT_MAX_ITEMS):
+        self.insert_coalescer: Optional[WriteCoalescer] = (
+            WriteCoalescer(self._insert_batch, insert_delay_ms / 1000, insert_max_batch) if insert_delay_ms > 0 else None)
+
+    async def create_task(self, task: Task) -> Task:
         """
         Creates a new task in the database.
 
+        The returned task is built from the inserted document and the id assigned
+        by the driver, so creation costs a single round trip.
+
         Args:
             task: The Task object to be created.
 
         Returns:
             The created Task object with the assigned ID.
-
-        Raises:
-            Exception: If the task cannot be retrieved after creation.
         """
-        collection = get_task_collection()
         # Convert the Task object to a dictionary for MongoDB insertion
-        task_dict = task.model_dump() if hasattr(task, 'model_dump') else task.dict()
-        logger.debug(f"Inserting task data: {task_dict}")
-        result = collection.insert_one(task_dict)
-        # Retrieve the created task to include the assigned _id
-        created_task_data = collection.find_one({"_id": result.inserted_id})
-        if created_task_data:
-            return Task(**created_task_data)
-        logger.error("Failed to retrieve task after creation")
-        raise Exception("Failed to retrieve task after creation")
-
-    def get_task_by_id(self, task_id: str) -> Optional[Task]:
+        task_dict = task.model_dump(exclude={"id"})
+        task_dict["updated_at"] = _now()
+        logger.debug("Inserting task data: %s", task_dict)
+        if self.insert_coalescer is not None:
+            task_dict["_id"] = ObjectId()
+            inserted_id = await self.insert_coalescer.submit(task_dict)
+        else:
+            collection = await get_task_collection()
+            inserted_id = (await collection.insert_one(task_dict)).inserted_id
+            await self._bump_list_version(task.user_email)
+        return task.model_copy(update={"id": str(inserted_id)})
 
+    async def get_task_by_id(self, task_id: str) -> Optional[Task]:
+        """
+        Finds a task by its ID.
+
+        Args:
+            task_id: The ID of the task to find.
+
+        Returns:
+            The Task object if found, or None if not found or the ID is malformed.
+        """
+        if not ObjectId.is_valid(task_id):
+            logger.warning("Invalid task_id format: %s", task_id)
+            return None
         obj_id = ObjectId(task_id)
-        collection = get_task_collection()
-        logger.debug(f"Finding task by id (string): {task_id}")
-        task_data = collection.find_one({"_id": obj_id})
+        collection = await get_task_collection()
+        logger.debug("Finding task by id (string): %s", task_id)
+        task_data = await collection.find_one({"_id": obj_id, "deleted": _LIVE})
         if not task_data:
-            logger.info(f"Task with id {task_id} not found.")
+            logger.info("Task with id %s not found.", task_id)
             return None
-        return Task(**task_data)
+        return _document_to_task(task_data)
 
-    def get_user_tasks(self, user_email: str) -> List[Task]:
+    async def get_user_tasks(self, user_email: str, limit: Optional[int] = None, after_id: Optional[str] = None,
+                             version: Optional[int] = None) -> List[Task]:
         """
-        Retrieves all tasks for a specific user.
+        Retrieves tasks for a specific user in ascending id order.
+
+        The query is keyed on _id and served by the (user_email, _id) index, so
+        fetching any page costs the same regardless of how many tasks the user has.
 
         Args:
             user_email: The email of the user whose tasks are to be retrieved.
+            limit: Maximum number of tasks to return (None for no limit).
+            after_id: Only return tasks whose id is greater than this one.
+            version: The list version the caller read; the database is always current, so it is not used.
 
         Returns:
             A list of Task objects belonging to the user.
         """
-        collection = get_task_collection()
-        logger.debug(f"Finding tasks for user: {user_email}")
-        tasks_cursor = collection.find({"user_email": user_email})
+        collection = await get_task_collection()
+        logger.debug("Finding tasks for user: %s", user_email)
+        query: Dict[str, Any] = {"user_email": user_email, "deleted": _LIVE}
+        if after_id:
+            query["_id"] = {"$gt": ObjectId(after_id)}
+        tasks_cursor = collection.find(query).sort("_id", ASCENDING)
+        if limit:
+            tasks_cursor = tasks_cursor.limit(limit)
         tasks = []
-        for task_data in tasks_cursor:
+        async for task_data in tasks_cursor:
             if '_id' in task_data:
-                task_data['id'] = str(task_data.pop('_id'))
-                tasks.append(Task(**task_data))
+                tasks.append(_document_to_task(task_data))
         return tasks
 
-    def update_task(self, task_id: str, updates: Dict[str, Any]) -> Optional[Task]:
+    async def update_task(self, task_id: str, updates: Dict[str, Any]) -> Optional[Task]:
         """
         Updates a task with the given updates.
 
@@ -81,61 +161,361 @@ class MongoTaskRepository(TaskRepository):
         Returns:
             The updated Task object if successful, or None if the task is not found.
         """
-        collection = get_task_collection()
+        collection = await get_task_collection()
         try:
             obj_id = ObjectId(task_id)
         except Exception:
-            logger.warning(f"Invalid task_id format for update: {task_id}")
+            logger.warning("Invalid task_id format for update: %s", task_id)
             return None
 
-        logger.debug(f"Updating task {task_id} with data: {updates}")
-        result = collection.find_one_and_update(
-            {"_id": obj_id},
-            {"$set": updates},
+        logger.debug("Updating task %s with data: %s", task_id, updates)
+        result = await collection.find_one_and_update(
+            {"_id": obj_id, "deleted": _LIVE},
+            {"$set": dict(updates, updated_at=_now())},
             return_document=True
         )
 
         if not result:
-            logger.warning(f"Task with id {task_id} not found for update.")
+            logger.warning("Task with id %s not found for update.", task_id)
+            return None
+
+        logger.info("Task %s updated successfully.", task_id)
+        await self._bump_list_version(result["user_email"])
+        return _document_to_task(result)
+
+    async def update_user_task(self, task_id: str, user_email: str, updates: Dict[str, Any]) -> Optional[Task]:
+        """
+        Updates a task only if it belongs to the given user, in a single command.
+
+        Args:
+            task_id: The ID of the task to update.
+            user_email: The email of the user who must own the task.
+            updates: A dictionary containing the fields to update.
+
+        Returns:
+            The updated Task object, or None if no task with that ID is owned by the user.
+        """
+        if not ObjectId.is_valid(task_id):
+            logger.warning("Invalid task_id format for update: %s", task_id)
             return None
+        collection = await get_task_collection()
+        owned_task = {"_id": ObjectId(task_id), "user_email": user_email, "deleted": _LIVE}
 
-        logger.info(f"Task {task_id} updated successfully.")
-        return Task(**result)
+        logger.debug("Updating task %s of %s with data: %s", task_id, user_email, updates)
+        if updates:
+            result = await collection.find_one_and_update(owned_task, {"$set": dict(updates, updated_at=_now())},
+                                                          return_document=ReturnDocument.AFTER)
+        else:
+            # An empty $set is rejected by the server; there is nothing to change anyway
+            result = await collection.find_one(owned_task)
 
-    def delete_task(self, task_id: str) -> bool:
+        if not result:
+            return None
+        if updates:
+            await self._bump_list_version(user_email)
+        return _document_to_task(result)
+
+    async def delete_task(self, task_id: str, retention: timedelta = TOMBSTONE_RETENTION) -> bool:
         """
-        Deletes a task by its ID.
+        Deletes a task by its ID, leaving a tombstone.
 
         Args:
             task_id: The ID of the task to delete.
+            retention: How long the tombstone is kept.
 
         Returns:
             True if the task was successfully deleted, False otherwise.
         """
-        collection = get_task_collection()
+        collection = await get_task_collection()
         try:
             obj_id = ObjectId(task_id)
         except Exception:
-            logger.warning(f"Invalid task_id format for delete: {task_id}")
+            logger.warning("Invalid task_id format for delete: %s", task_id)
             return False
 
-        logger.debug(f"Deleting task with id: {task_id}")
-        result = collection.delete_one({"_id": obj_id})
+        logger.debug("Deleting task with id: %s", task_id)
+        # The owner's list version is bumped too, so the tombstone tells whose task it was
+        result = await collection.find_one_and_update({"_id": obj_id, "deleted": _LIVE}, _tombstone(retention),
+                                                      projection={"user_email": 1})
 
-        if result.deleted_count == 1:
-            logger.info(f"Task {task_id} deleted successfully.")
+        if result:
+            logger.info("Task %s deleted successfully.", task_id)
+            await self._bump_list_version(result["user_email"])
             return True
         else:
-            logger.warning(f"Task with id {task_id} not found for deletion.")
+            logger.warning("Task with id %s not found for deletion.", task_id)
             return False
 
+    async def delete_user_task(self, task_id: str, user_email: str, retention: timedelta = TOMBSTONE_RETENTION) -> bool:
+        """
+        Deletes a task only if it belongs to the given user, in a single command,
+        leaving a tombstone.
+
+        Args:
+            task_id: The ID of the task to delete.
+            user_email: The email of the user who must own the task.
+            retention: How long the tombstone is kept.
+
+        Returns:
+            True if the task was deleted, False if no task with that ID is owned by the user.
+        """
+        if not ObjectId.is_valid(task_id):
+            logger.warning("Invalid task_id format for delete: %s", task_id)
+            return False
+        collection = await get_task_collection()
+        result = await collection.update_one({"_id": ObjectId(task_id), "user_email": user_email, "deleted": _LIVE},
+                                             _tombstone(retention))
+        if result.matched_count != 1:
+            return False
+        await self._bump_list_version(user_email)
+        return True
+
+    async def create_tasks(self, tasks: List[Task], ordered: bool = False) -> List[Optional[Task]]:
+        """
+        Creates many tasks with a single insert_many. The tasks may belong to
+        different users; every owner's list version is bumped once.
+
+        Args:
+            tasks: The Task objects to create.
+            ordered: Stop at the first failed insert instead of trying every task.
+
+        Returns:
+            The created tasks with their ids, in the order given, and None for
+            each task that was not inserted.
+        """
+        if not tasks:
+            return []
+        collection = await get_task_collection()
+        now = _now()
+        documents = [dict(task.model_dump(exclude={"id"}), _id=ObjectId(), updated_at=now) for task in tasks]
+        failed = await _bulk_failures(collection.insert_many(documents, ordered=ordered), len(documents), ordered)
+        created = [None if index in failed else task.model_copy(update={"id": str(document["_id"])})
+                   for index, (task, document) in enumerate(zip(tasks, documents))]
+        await self._bump_list_versions([task.user_email for task in created if task is not None])
+        return created
+
+    async def get_tasks_by_ids(self, task_ids: List[str]) -> List[Task]:
+        """
+        Finds the live tasks with the given IDs, of any owner, in one query.
+        Malformed IDs are skipped.
+        """
+        ids = [ObjectId(task_id) for task_id in task_ids if ObjectId.is_valid(task_id)]
+        if not ids:
+            return []
+        collection = await get_task_collection()
+        return [_document_to_task(document) async for document in collection.find({"_id": {"$in": ids}, "deleted": _LIVE})]
+
+    async def update_user_tasks(self, user_email: str, updates: List[Tuple[str, dict]], ordered: bool = False) -> List[bool]:
+        """
+        Applies many updates to tasks owned by the user with a single bulk_write,
+        each update filtered on ownership like update_user_task.
+
+        Args:
+            user_email: The email of the user who must own the tasks.
+            updates: (task id, fields to set) pairs, applied in this order.
+            ordered: Stop at the first failed update instead of trying every one.
+
+        Returns:
+            For each update, whether it was applied without error. The server
+            only counts the matches of a bulk write, so an update whose task
+            vanished in the meantime is not told apart; callers check ownership
+            beforehand (get_tasks_by_ids).
+        """
+        if not updates:
+            return []
+        collection = await get_task_collection()
+        now = _now()
+        requests = [UpdateOne({"_id": ObjectId(task_id), "user_email": user_email, "deleted": _LIVE},
+                              {"$set": dict(fields, updated_at=now)}) for task_id, fields in updates]
+        failed = await _bulk_failures(collection.bulk_write(requests, ordered=ordered), len(requests), ordered)
+        if len(failed) < len(requests):
+            await self._bump_list_version(user_email)
+        return [index not in failed for index in range(len(requests))]
+
+    async def delete_user_tasks(self, user_email: str, task_ids: List[str], ordered: bool = False,
+                                retention: timedelta = TOMBSTONE_RETENTION) -> List[bool]:
+        """
+        Deletes many tasks owned by the user with a single bulk_write, leaving
+        tombstones; see update_user_tasks for the ordering and the results.
+        """
+        if not task_ids:
+            return []
+        collection = await get_task_collection()
+        tombstone = _tombstone(retention)
+        requests = [UpdateOne({"_id": ObjectId(task_id), "user_email": user_email, "deleted": _LIVE}, tombstone)
+                    for task_id in task_ids]
+        failed = await _bulk_failures(collection.bulk_write(requests, ordered=ordered), len(requests), ordered)
+        if len(failed) < len(requests):
+            await self._bump_list_version(user_email)
+        return [index not in failed for index in range(len(requests))]
+
+    async def get_user_changes(self, user_email: str, since: Optional[datetime], after_id: Optional[str], limit: int) -> List[TaskChange]:
+        """
+        Lists the tasks of a user that changed after a point in time, including
+        tombstones, ordered by (updated_at, _id). Served by the
+        (user_email, updated_at, _id) index.
+
+        Args:
+            user_email: The email of the user whose changes are wanted.
+            since: Only changes after this time; None lists every live task in id
+                order instead (the initial sync, which also covers tasks written
+                before updated_at was maintained).
+            after_id: Resume within a page: with since, changes at exactly `since`
+                with a greater id; without, live tasks with a greater id.
+            limit: Maximum number of changes to return.
+
+        Returns:
+            One TaskChange per task, with task=None for deleted tasks.
+        """
+        collection = await get_task_collection()
+        query: Dict[str, Any] = {"user_email": user_email}
+        if since is None:
+            query["deleted"] = _LIVE
+            if after_id:
+                query["_id"] = {"$gt": ObjectId(after_id)}
+            cursor = collection.find(query).sort("_id", ASCENDING)
+        else:
+            if after_id:
+                query["$or"] = [{"updated_at": {"$gt": since}}, {"updated_at": since, "_id": {"$gt": ObjectId(after_id)}}]
+            else:
+                query["updated_at"] = {"$gt": since}
+            cursor = collection.find(query).sort([("updated_at", ASCENDING), ("_id", ASCENDING)])
+        changes = []
+        async for document in cursor.limit(limit):
+            updated_at = document.get("updated_at")
+            if updated_at is not None and updated_at.tzinfo is None:
+                # The driver returns naive datetimes in UTC
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            task_id = str(document["_id"])
+            task = None if document.get("deleted") else _document_to_task(document)
+            changes.append(TaskChange(id=task_id, updated_at=updated_at, task=task))
+        return changes
+
+    async def get_list_version(self, user_email: str) -> int:
+        """
+        Returns the version of a user's task list: a counter bumped by every
+        write to their tasks, 0 if they never had any. One point read on _id.
+        """
+        collection = await get_task_list_version_collection()
+        document = await collection.find_one({"_id": user_email}, projection={"version": 1})
+        return document["version"] if document else 0
+
+    async def _bump_list_version(self, user_email: str) -> None:
+        """Increments the version of a user's task list, after the write it accounts for."""
+        await self._bump_list_versions([user_email])
+
+    async def _bump_list_versions(self, user_emails: List[str]) -> None:
+        """
+        Increments the list version of each distinct user once, with a single write for several users.
+
+        The write it accounts for has already been applied, so a failed bump
+        does not fail it: a client told the write failed would retry it and
+        create a task twice. The bump is tried BUMP_ATTEMPTS times and then
+        given up with an error logged; until the user's next write their
+        conditional GETs may still be answered with the old list.
+        """
+        user_emails = list(dict.fromkeys(user_emails))
+        if not user_emails:
+            return
+        for attempt in range(1, BUMP_ATTEMPTS + 1):
+            try:
+                collection = await get_task_list_version_collection()
+                if len(user_emails) == 1:
+                    await collection.update_one({"_id": user_emails[0]}, {"$inc": {"version": 1}}, upsert=True)
+                else:
+                    await collection.bulk_write([UpdateOne({"_id": user_email}, {"$inc": {"version": 1}}, upsert=True)
+                                                 for user_email in user_emails], ordered=False)
+                return
+            except PyMongoError as e:
+                if attempt == BUMP_ATTEMPTS:
+                    logger.error("Giving up on the task-list version bump of %s after %d attempts: %s",
+                                 ", ".join(user_emails), attempt, e)
+                    return
+                logger.warning("Task-list version bump failed (attempt %d), retrying: %s", attempt, e)
+                await asyncio.sleep(BUMP_RETRY_DELAY_S * attempt)
+
+    async def _insert_batch(self, documents: List[Dict[str, Any]]) -> List[Union[ObjectId, Exception]]:
+        """
+        Flushes the creates grouped by the insert coalescer: one unordered
+        insert_many, then the owners' version bumps. Each document's outcome is
+        its _id, or the error insert_one would have raised for it.
+        """
+        collection = await get_task_collection()
+        errors: Dict[int, Exception] = {}
+        try:
+            await collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                error_cls = DuplicateKeyError if error.get("code") in (11000, 11001) else WriteError
+                errors[error["index"]] = error_cls(error.get("errmsg"), error.get("code"), error)
+        await self._bump_list_versions([document["user_email"] for index, document in enumerate(documents) if index not in errors])
+        return [errors.get(index, document["_id"]) for index, document in enumerate(documents)]
+
+# Matches live tasks: tombstones have deleted: true, tasks written before soft deletes have no field
+_LIVE = {"$ne": True}
+
+# Tries at a task-list version bump, and the delay before the n-th retry (n times this)
+BUMP_ATTEMPTS = 3
+BUMP_RETRY_DELAY_S = 0.05
+
+
+async def _bulk_failures(write, count: int, ordered: bool) -> set:
+    """
+    Awaits an insert_many or bulk_write and returns the indexes of the
+    operations that were not applied: those with a write error and, in an
+    ordered write, every operation after the first error.
+    """
+    try:
+        await write
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        for error in errors:
+            logger.warning("Bulk write operation %d failed: %s", error.get("index"), error.get("errmsg"))
+        failed = {error["index"] for error in errors}
+        if ordered and failed:
+            failed.update(range(min(failed), count))
+        return failed
+    return set()
+
+
+def _tombstone(retention: timedelta) -> Dict[str, Any]:
+    """The update turning a task into a tombstone: its content goes, its id and owner stay."""
+    now = _now()
+    return {
+        "$set": {"deleted": True, "updated_at": now, "expires_at": now + retention},
+        "$unset": {"title": "", "description": "", "completed": ""},
+    }
+
+
+def _now() -> datetime:
+    """The current time at the millisecond precision MongoDB stores, so tokens round-trip exactly."""
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def _document_to_task(document: Dict[str, Any]) -> Task:
+    """Builds a Task from a MongoDB document, exposing _id as the string id."""
+    document['id'] = str(document.pop('_id'))
+    return Task(**document)
+
+@register_indexes
+@tag_repository_methods
 class MongoUserRepository(UserRepository):
     """
     MongoDB implementation of the UserRepository interface.
-    Handles CRUD operations for users in the MongoDB database.
+    Handles CRUD operations for users in the MongoDB database using the
+    asyncio PyMongo driver.
     """
 
-    def find_by_email(self, email: str) -> Optional[User]:
+    COLLECTION = "users"
+    INDEXES = [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ]
+    QUERY_SHAPES = [
+        QueryShape("find_by_email", {"email": ""}),
+    ]
+
+    async def find_by_email(self, email: str) -> Optional[User]:
         """
         Finds a user by their email address.
 
@@ -145,16 +525,21 @@ class MongoUserRepository(UserRepository):
         Returns:
             The User object if found, or None if not found.
         """
-        collection = get_user_collection()
-        user_data = collection.find_one({"email": email})
+        collection = await get_user_collection()
+        user_data = await collection.find_one({"email": email})
         if not user_data:
             return None
         return User(**user_data)
 
-    def register_user(self, user: User) -> User:
+    async def register_user(self, user: User) -> User:
         """
         Registers a new user in the database.
 
+        Duplicates are detected by the unique index on email, so registration is
+        a single insert with no existence check or read-back. Until the index is
+        known to exist (provision_indexes) each registration first tries to
+        create it, and fails rather than risk a duplicate account.
+
         Args:
             user: The User object to be registered.
 
@@ -162,18 +547,17 @@ class MongoUserRepository(UserRepository):
             The registered User object.
 
         Raises:
-            Exception: If the user cannot be inserted or retrieved.
+            UserAlreadyExistsError: If a user with the same email already exists.
+            Exception: If the user cannot be inserted, or the unique index on email is missing.
         """
-        collection = get_user_collection()
-        user_dict = user.dict()
+        if not await provision_indexes():
+            raise Exception("Failed to insert user: the unique index on email is not in place")
+        collection = await get_user_collection()
+        user_dict = user.model_dump()
         try:
-            result = collection.insert_one(user_dict)
+            await collection.insert_one(user_dict)
+        except DuplicateKeyError:
+            raise UserAlreadyExistsError()
         except Exception as e:
             raise Exception(f"Failed to insert user: {e}")
-
-        created_user_data = collection.find_one({"email": user.email})
-        if not created_user_data:
-            raise Exception(f"Failed to retrieve user with email: {user.email}")
-
-        created_user = User(**created_user_data)
-        return created_user
\ No newline at end of file
+        return user
\ No newline at end of file
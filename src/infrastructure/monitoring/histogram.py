@@ -0,0 +1,85 @@
+"""
+Fixed-bucket latency histogram shared by the runtime metrics collectors.
+
+Observations are counted into cumulative-style buckets (the layout Prometheus
+uses), so recording is O(log buckets) with constant memory however many values
+are observed, and percentiles are estimated by linear interpolation within the
+bucket that contains them.
+"""
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds in milliseconds, from sub-millisecond pool checkouts up to
+# server-selection timeouts
+DEFAULT_BOUNDS_MS: Tuple[float, ...] = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+)
+
+
+class Histogram:
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS_MS):
+        self.bounds: Tuple[float, ...] = tuple(sorted(bounds))
+        # One count per bound plus the overflow bucket (+Inf)
+        self._counts: List[int] = [0] * (len(self.bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimated q-th percentile (0-100), or None if nothing was observed."""
+        with self._lock:
+            return self._percentile(q)
+
+    def _percentile(self, q: float) -> Optional[float]:
+        if not self._count:
+            return None
+        rank = q / 100 * self._count
+        seen = 0
+        for index, count in enumerate(self._counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self._max
+                estimate = lower + (upper - lower) * (rank - seen) / count
+                return min(estimate, self._max)
+            seen += count
+        return self._max
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Cumulative (upper bound, count) pairs, ending with (inf, total)."""
+        with self._lock:
+            cumulative, total = [], 0
+            for bound, count in zip(self.bounds + (float("inf"),), self._counts):
+                total += count
+                cumulative.append((bound, total))
+            return cumulative
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """Count, sum, mean, max and the p50/p90/p99 estimates."""
+        with self._lock:
+            return {
+                "count": self._count,
+                "sum": self._sum,
+                "mean": self._sum / self._count if self._count else None,
+                "max": self._max if self._count else None,
+                "p50": self._percentile(50),
+                "p90": self._percentile(90),
+                "p99": self._percentile(99),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.bounds) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._max = 0.0
@@ -0,0 +1,180 @@
+"""
+Per-command MongoDB latency metrics and slow-command log.
+
+CommandMetrics is a pymongo CommandListener registered on the client by
+MongoConnection. Every command's latency goes into a histogram keyed by
+(command name, collection, repository method). The repository method comes
+from the current_operation context variable, which repository classes
+decorated with @tag_repository_methods set around each public method, so a
+sample can be traced back to e.g. MongoTaskRepository.get_user_tasks.
+
+Commands slower than MONGO_SLOW_COMMAND_MS (default 100) are logged as a
+warning with the shape of their filter: field names and operators are kept,
+values are replaced by "?".
+"""
+import functools
+import inspect
+import logging
+import os
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from .histogram import Histogram
+from .prometheus import Exposition
+from .server_timing import timed
+
+logger = logging.getLogger(__name__)
+
+# Repository method issuing the current MongoDB command, e.g. "MongoTaskRepository.create_task"
+current_operation: ContextVar[Optional[str]] = ContextVar("mongo_operation", default=None)
+
+_CommandKey = Tuple[str, Optional[str], Optional[str]]
+
+# Command fields whose values are user data and are redacted in the slow log
+_REDACTED_FIELDS = ("filter", "query", "update", "pipeline")
+# Command fields that describe the query and are logged as is
+_KEPT_FIELDS = ("sort", "projection", "limit", "skip", "hint", "new", "upsert")
+
+
+def tag_repository_methods(repository_cls: type) -> type:
+    """
+    Class decorator tagging the commands of every public async method with
+    "Class.method". The calls are also timed as the "db" phase of the request
+    (see server_timing).
+    """
+    for name, method in list(vars(repository_cls).items()):
+        if not name.startswith("_") and inspect.iscoroutinefunction(method):
+            setattr(repository_cls, name, _tagged(method, f"{repository_cls.__name__}.{name}"))
+    return repository_cls
+
+
+def _tagged(method, operation: str):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        token = current_operation.set(operation)
+        try:
+            with timed("db"):
+                return await method(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+    return wrapper
+
+
+def redact(value: Any) -> Any:
+    """Keeps the structure (field names, operators) of a filter and replaces values with "?"."""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a command worth logging, with user data redacted."""
+    shape: Dict[str, Any] = {}
+    for field in _REDACTED_FIELDS:
+        if field in command:
+            shape[field] = redact(command[field])
+    for field in _KEPT_FIELDS:
+        if field in command:
+            shape[field] = command[field]
+    # Bulk write commands carry one filter per statement
+    for field, parts in (("deletes", ("q",)), ("updates", ("q", "u"))):
+        if field in command:
+            shape[field] = [
+                {key: redact(value) if key in parts else value for key, value in statement.items()}
+                for statement in command[field]
+            ]
+    if "documents" in command:
+        shape["documents"] = len(command["documents"])
+    return shape
+
+
+class CommandMetrics(monitoring.CommandListener):
+    def __init__(self, slow_ms: Optional[float] = None):
+        self.slow_ms = slow_ms if slow_ms is not None else float(os.getenv("MONGO_SLOW_COMMAND_MS", 100))
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[Any, int], Tuple[_CommandKey, Dict[str, Any]]] = {}
+        self._histograms: Dict[_CommandKey, Histogram] = {}
+        self._failures: Dict[_CommandKey, int] = {}
+        self.slow_commands = 0
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        key = (event.command_name, collection if isinstance(collection, str) else None, current_operation.get())
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (key, event.command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool) -> None:
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+            if pending is None:
+                return
+            key, command = pending
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            if failed:
+                self._failures[key] = self._failures.get(key, 0) + 1
+        duration_ms = event.duration_micros / 1000
+        histogram.observe(duration_ms)
+        if duration_ms >= self.slow_ms:
+            with self._lock:
+                self.slow_commands += 1
+            command_name, collection, operation = key
+            logger.warning(
+                "Slow MongoDB command: %s on %s from %s took %.1f ms%s, shape %s",
+                command_name, collection or "-", operation or "-", duration_ms, " (failed)" if failed else "",
+                command_shape(command_name, command),
+            )
+
+    def histograms(self) -> Dict[_CommandKey, Histogram]:
+        """The live histograms, keyed by (command, collection, repository method)."""
+        with self._lock:
+            return dict(self._histograms)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """One entry per (command, collection, repository method) with its latency summary in ms."""
+        with self._lock:
+            entries = [(key, histogram, self._failures.get(key, 0)) for key, histogram in self._histograms.items()]
+        return [
+            dict(command=command, collection=collection, method=method, failures=failures, **histogram.snapshot())
+            for (command, collection, method), histogram, failures in entries
+        ]
+
+    def collect(self, exposition: Exposition) -> None:
+        """Adds the command latency histograms and failure counts to a Prometheus exposition."""
+        with self._lock:
+            entries = sorted(
+                ((key, histogram, self._failures.get(key, 0)) for key, histogram in self._histograms.items()),
+                key=lambda entry: tuple(part or "" for part in entry[0]),
+            )
+            slow_commands = self.slow_commands
+        exposition.declare("mongodb_command_duration_seconds", "histogram", "MongoDB command latency by repository method.")
+        exposition.declare("mongodb_command_failures_total", "counter", "Failed MongoDB commands by repository method.")
+        for (command, collection, method), histogram, failures in entries:
+            labels = {"command": command, "collection": collection or "", "method": method or ""}
+            exposition.histogram("mongodb_command_duration_seconds", histogram, labels)
+            exposition.sample("mongodb_command_failures_total", failures, labels)
+        exposition.declare("mongodb_slow_commands_total", "counter", "MongoDB commands slower than MONGO_SLOW_COMMAND_MS.")
+        exposition.sample("mongodb_slow_commands_total", slow_commands)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._histograms.clear()
+            self._failures.clear()
+            self.slow_commands = 0
+
+
+# One collector per process, shared by every client MongoConnection creates
+command_metrics = CommandMetrics()
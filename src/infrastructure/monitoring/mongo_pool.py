@@ -0,0 +1,144 @@
+"""
+Connection pool metrics for the MongoDB client.
+
+PoolMetrics is a pymongo ConnectionPoolListener registered on the client by
+MongoConnection. It tracks, per process:
+
+- open and checked-out connections (gauges),
+- checkout wait time and connection establishment time (histograms, ms),
+- churn: connections created and closed (by reason), pool clears, and
+  checkouts that failed (by reason, e.g. "timeout" when the wait queue
+  timeout is hit).
+"""
+import threading
+from collections import Counter
+from typing import Any, Dict, Set, Tuple
+
+from pymongo import monitoring
+
+from .histogram import Histogram
+from .prometheus import Exposition
+
+_ConnectionKey = Tuple[Any, int]
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_wait_ms = Histogram()
+        self.connect_ms = Histogram()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._open: Set[_ConnectionKey] = set()
+            self._checked_out: Set[_ConnectionKey] = set()
+            self.max_checked_out = 0
+            self.checkouts = 0
+            self.checkout_failures: Counter = Counter()
+            self.created = 0
+            self.closed: Counter = Counter()
+            self.pools_cleared = 0
+        self.checkout_wait_ms.reset()
+        self.connect_ms.reset()
+
+    # --- pool events ---
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        with self._lock:
+            self._open = {key for key in self._open if key[0] != event.address}
+            self._checked_out = {key for key in self._checked_out if key[0] != event.address}
+
+    # --- connection events ---
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        with self._lock:
+            self.created += 1
+            self._open.add((event.address, event.connection_id))
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        if event.duration is not None:
+            self.connect_ms.observe(event.duration * 1000)
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        key = (event.address, event.connection_id)
+        with self._lock:
+            self.closed[event.reason] += 1
+            self._open.discard(key)
+            self._checked_out.discard(key)
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        pass
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        with self._lock:
+            self.checkout_failures[event.reason] += 1
+        if event.duration is not None:
+            self.checkout_wait_ms.observe(event.duration * 1000)
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self._checked_out.add((event.address, event.connection_id))
+            self.max_checked_out = max(self.max_checked_out, len(self._checked_out))
+        if event.duration is not None:
+            self.checkout_wait_ms.observe(event.duration * 1000)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        with self._lock:
+            self._checked_out.discard((event.address, event.connection_id))
+
+    # --- reporting ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = {
+                "open": len(self._open),
+                "checked_out": len(self._checked_out),
+                "max_checked_out": self.max_checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "created": self.created,
+                "closed": dict(self.closed),
+                "pools_cleared": self.pools_cleared,
+            }
+        state["checkout_wait_ms"] = self.checkout_wait_ms.snapshot()
+        state["connect_ms"] = self.connect_ms.snapshot()
+        return state
+
+    def collect(self, exposition: Exposition) -> None:
+        """Adds the pool gauges, churn counters and wait histograms to a Prometheus exposition."""
+        state = self.snapshot()
+        for name, kind, help, value in (
+            ("mongodb_pool_connections_open", "gauge", "Open MongoDB connections.", state["open"]),
+            ("mongodb_pool_connections_checked_out", "gauge", "MongoDB connections in use.", state["checked_out"]),
+            ("mongodb_pool_checkouts_total", "counter", "Successful connection checkouts.", state["checkouts"]),
+            ("mongodb_pool_connections_created_total", "counter", "MongoDB connections created.", state["created"]),
+            ("mongodb_pool_cleared_total", "counter", "Times the connection pool was cleared.", state["pools_cleared"]),
+        ):
+            exposition.declare(name, kind, help)
+            exposition.sample(name, value)
+        exposition.declare("mongodb_pool_checkout_failures_total", "counter", "Failed connection checkouts by reason.")
+        for reason, count in sorted(state["checkout_failures"].items()):
+            exposition.sample("mongodb_pool_checkout_failures_total", count, {"reason": reason})
+        exposition.declare("mongodb_pool_connections_closed_total", "counter", "MongoDB connections closed by reason.")
+        for reason, count in sorted(state["closed"].items()):
+            exposition.sample("mongodb_pool_connections_closed_total", count, {"reason": reason})
+        exposition.declare("mongodb_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a connection.")
+        exposition.histogram("mongodb_pool_checkout_wait_seconds", self.checkout_wait_ms)
+        exposition.declare("mongodb_pool_connect_seconds", "histogram", "Time to establish a connection.")
+        exposition.histogram("mongodb_pool_connect_seconds", self.connect_ms)
+
+
+# One collector per process, shared by every client MongoConnection creates
+pool_metrics = PoolMetrics()
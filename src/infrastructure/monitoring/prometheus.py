@@ -0,0 +1,63 @@
+"""
+Prometheus text exposition format (version 0.0.4).
+
+Collectors add their samples to an Exposition, which groups them by metric
+name under one HELP/TYPE header and renders the scrape body. Latency
+histograms are kept in milliseconds (see histogram.Histogram) and exported in
+seconds, as Prometheus conventions expect.
+"""
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .histogram import Histogram
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Optional[Mapping[str, object]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Exposition:
+    def __init__(self):
+        # name -> (type, help, sample lines), in the order the metrics were declared
+        self._metrics: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def declare(self, name: str, kind: str, help: str) -> None:
+        """Declares a metric ("counter", "gauge" or "histogram"); declaring it again is a no-op."""
+        self._metrics.setdefault(name, (kind, help, []))
+
+    def sample(self, name: str, value: float, labels: Optional[Mapping[str, object]] = None, suffix: str = "") -> None:
+        self._metrics[name][2].append(f"{name}{suffix}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, histogram: Histogram, labels: Optional[Mapping[str, object]] = None,
+                  scale: float = 0.001) -> None:
+        """Adds a histogram's cumulative buckets, sum and count; scale converts its unit (ms to seconds by default)."""
+        labels = dict(labels or {})
+        buckets = histogram.buckets()
+        for bound, count in buckets:
+            le = bound if bound == float("inf") else round(bound * scale, 9)
+            self.sample(name, count, dict(labels, le=_number(le)), suffix="_bucket")
+        self.sample(name, histogram.snapshot()["sum"] * scale, labels, suffix="_sum")
+        self.sample(name, buckets[-1][1], labels, suffix="_count")
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, (kind, help, samples) in self._metrics.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,169 @@
+"""
+HTTP request metrics: per-route request counts by status code, latency
+histograms with fixed buckets and in-flight gauges.
+
+METRICS_MODE selects how they leave the process:
+    prometheus  recorded in-process and scraped from GET /metrics (the default)
+    emf         additionally written to stdout as one CloudWatch embedded
+                metric format (EMF) JSON line per request, for Lambda where
+                nothing can scrape the process (the default when
+                AWS_LAMBDA_FUNCTION_NAME is set)
+    off         not recorded
+
+Requests are labelled with the route template ("/tasks/{task_id}"), never the
+raw path, so the number of series stays bounded; requests that match no route
+are labelled "unmatched".
+
+Overhead budget: recording a request must cost under 25 µs on top of the
+request itself (measured by benchmarks/bench_request_metrics.py and enforced
+by tests/test_request_metrics.py through METRICS_OVERHEAD_BUDGET_US).
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from .histogram import Histogram
+from .prometheus import Exposition
+
+# Upper bounds in milliseconds of the request latency buckets
+REQUEST_BOUNDS_MS: Tuple[float, ...] = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def metrics_mode() -> str:
+    mode = os.getenv("METRICS_MODE")
+    if mode is None:
+        return "emf" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "prometheus"
+    return mode.lower()
+
+
+class RequestMetrics:
+    def __init__(self, bounds: Tuple[float, ...] = REQUEST_BOUNDS_MS):
+        self.bounds = bounds
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # (method, route) -> latency in ms
+            self._latency: Dict[Tuple[str, str], Histogram] = {}
+            # (method, route, status code) -> requests
+            self._responses: Counter = Counter()
+            # method -> requests being handled
+            self._in_flight: Counter = Counter()
+
+    def started(self, method: str) -> None:
+        with self._lock:
+            self._in_flight[method] += 1
+
+    def finished(self, method: str, route: str, status_code: int, duration_ms: float) -> None:
+        key = (method, route)
+        with self._lock:
+            self._in_flight[method] -= 1
+            self._responses[(method, route, status_code)] += 1
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(self.bounds)
+        histogram.observe(duration_ms)
+
+    def collect(self, exposition: Exposition) -> None:
+        """Adds the request metrics to a Prometheus exposition."""
+        with self._lock:
+            responses = sorted(self._responses.items())
+            latency = sorted(self._latency.items())
+            in_flight = sorted(self._in_flight.items())
+        exposition.declare("http_requests_total", "counter", "HTTP requests by route and status code.")
+        for (method, route, status_code), count in responses:
+            exposition.sample("http_requests_total", count, {"method": method, "route": route, "status": status_code})
+        exposition.declare("http_request_duration_seconds", "histogram", "HTTP request latency by route.")
+        for (method, route), histogram in latency:
+            exposition.histogram("http_request_duration_seconds", histogram, {"method": method, "route": route})
+        exposition.declare("http_requests_in_flight", "gauge", "HTTP requests currently being handled.")
+        for method, count in in_flight:
+            exposition.sample("http_requests_in_flight", count, {"method": method})
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            responses = dict(self._responses)
+            latency = dict(self._latency)
+            in_flight = dict(self._in_flight)
+        return {
+            "responses": responses,
+            "latency_ms": {key: histogram.snapshot() for key, histogram in latency.items()},
+            "in_flight": in_flight,
+        }
+
+
+def emf_record(method: str, route: str, status_code: int, duration_ms: float,
+               namespace: Optional[str] = None) -> Dict[str, Any]:
+    """One request as a CloudWatch embedded metric format document, with Route and Method as dimensions."""
+    return {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": namespace or os.getenv("METRICS_NAMESPACE", "TaskManagerAPI"),
+                "Dimensions": [["Route", "Method"]],
+                "Metrics": [
+                    {"Name": "Latency", "Unit": "Milliseconds"},
+                    {"Name": "Requests", "Unit": "Count"},
+                    {"Name": "Errors", "Unit": "Count"},
+                ],
+            }],
+        },
+        "Route": route,
+        "Method": method,
+        "StatusCode": status_code,
+        "Latency": round(duration_ms, 3),
+        "Requests": 1,
+        "Errors": 1 if status_code >= 500 else 0,
+    }
+
+
+def flush_emf(method: str, route: str, status_code: int, duration_ms: float) -> None:
+    """Writes one EMF line to stdout, where Lambda hands it to CloudWatch Logs."""
+    sys.stdout.write(json.dumps(emf_record(method, route, status_code, duration_ms), separators=(",", ":")) + "\n")
+    sys.stdout.flush()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording every HTTP request into a RequestMetrics registry."""
+
+    def __init__(self, app: Any, registry: Optional[RequestMetrics] = None, emf: bool = False):
+        self.app = app
+        self.registry = registry or request_metrics
+        self.emf = emf
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.registry.started(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            self.registry.finished(method, route, status_code, duration_ms)
+            if self.emf:
+                flush_emf(method, route, status_code, duration_ms)
+
+
+# One registry per process, shared by the FastAPI middleware and the Lambda dispatcher
+request_metrics = RequestMetrics()
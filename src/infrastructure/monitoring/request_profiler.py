@@ -0,0 +1,310 @@
+"""
+On-demand profiling of single requests, triggered by a request header.
+
+A request carrying X-Debug-Profile runs under a profiler when either:
+
+- the header holds a token signed with PROFILER_SECRET ("<expiry>.<hmac>",
+  minted with `python -m infrastructure.monitoring.request_profiler sign`), or
+- the request comes from a stage listed in PROFILE_STAGES (API Gateway's
+  requestContext.stage, or STAGE for the FastAPI app), where any value works.
+
+X-Profile-Mode picks the profiler:
+    cprofile  (default) deterministic cProfile; stored as a .prof file that
+              snakeviz or flameprof turn into a flame graph
+    sampling  samples the stack of the request's thread every
+              PROFILE_SAMPLE_INTERVAL_MS (default 1); stored in the folded
+              format of flamegraph.pl and speedscope
+
+X-Profile-Output picks where the profile goes:
+    store     (default) written to PROFILE_DIR as <request id>.prof/.folded;
+              the response carries the id in X-Profile-Id
+    body      returned instead of the response body (pstats report or folded
+              stacks), with the original status in X-Profile-Status
+
+When neither PROFILER_SECRET nor PROFILE_STAGES is set, from_env() returns
+None and nothing is installed, so the feature costs nothing. Only one request
+is profiled at a time per process; a concurrent request asking for a profile
+is served normally with "X-Profile: busy". Profiles cover the thread the
+request runs on, so on a server handling concurrent requests they include
+the work of requests interleaved on the same event loop.
+
+The profilers and the signature check are imported when a request first asks
+for a profile, so the module adds nothing to a cold start.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+PROFILE_HEADER = "x-debug-profile"
+MODE_HEADER = "x-profile-mode"
+OUTPUT_HEADER = "x-profile-output"
+
+# Longest validity accepted for a signed token, in seconds
+MAX_TOKEN_TTL = 24 * 3600
+
+_UNSAFE_ID_CHARACTERS = re.compile(r"[^A-Za-z0-9_.-]")
+# One profile at a time: cProfile and the sampler both observe a whole thread
+_active = threading.Lock()
+
+
+def sign_token(secret: str, ttl: int = 900, now: Optional[float] = None) -> str:
+    """Mints an X-Debug-Profile value valid for ttl seconds."""
+    expires = int((now if now is not None else time.time()) + ttl)
+    return f"{expires}.{_signature(secret, expires)}"
+
+
+def _signature(secret: str, expires: int) -> str:
+    import hashlib
+    import hmac
+    return hmac.new(secret.encode(), f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+class ProfileRequest:
+    """What a request asked for: the profiler, where the profile goes and the id it is stored under."""
+
+    __slots__ = ("mode", "output", "request_id")
+
+    def __init__(self, mode: str, output: str, request_id: str):
+        self.mode = mode
+        self.output = output
+        self.request_id = request_id
+
+
+class StackSampler:
+    """Counts the stacks of one thread, sampled at a fixed interval from a background thread."""
+
+    def __init__(self, interval_s: float = 0.001):
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "StackSampler":
+        target = threading.get_ident()
+        self._thread = threading.Thread(target=self._sample, args=(target,), name="request-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self, target: int) -> None:
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(target)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def folded(self) -> str:
+        """The samples in the folded-stacks format: "outer;...;inner count" per line."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class _CProfileSession:
+    extension = ".prof"
+
+    def __init__(self):
+        import cProfile
+        self.profile = cProfile.Profile()
+
+    def __enter__(self) -> "_CProfileSession":
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profile.disable()
+
+    def text(self) -> str:
+        import io
+        import pstats
+        report = io.StringIO()
+        pstats.Stats(self.profile, stream=report).sort_stats("cumulative").print_stats(60)
+        return report.getvalue()
+
+    def save(self, path: str) -> None:
+        self.profile.dump_stats(path)
+
+
+class _SamplingSession(StackSampler):
+    extension = ".folded"
+
+    def text(self) -> str:
+        return self.folded()
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as file:
+            file.write(self.folded())
+
+
+class RequestProfiler:
+    def __init__(self, secret: Optional[str] = None, stages: Tuple[str, ...] = (), directory: Optional[str] = None,
+                 sample_interval_ms: float = 1.0):
+        self.secret = secret
+        self.stages = frozenset(stages)
+        if directory is None:
+            import tempfile
+            directory = os.path.join(tempfile.gettempdir(), "profiles")
+        self.directory = directory
+        self.sample_interval_s = sample_interval_ms / 1000
+
+    @classmethod
+    def from_env(cls) -> Optional["RequestProfiler"]:
+        """The profiler configured by the environment, or None if profiling is not enabled."""
+        secret = os.getenv("PROFILER_SECRET") or None
+        stages = tuple(stage.strip() for stage in os.getenv("PROFILE_STAGES", "").split(",") if stage.strip())
+        if secret is None and not stages:
+            return None
+        return cls(secret, stages, os.getenv("PROFILE_DIR"), float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 1)))
+
+    def requested(self, header: Callable[[str], Optional[str]], stage: Optional[str] = None,
+                  request_id: Optional[str] = None) -> Optional[ProfileRequest]:
+        """
+        Decides whether a request is profiled.
+
+        Args:
+            header: Case-insensitive lookup of a lower-case request header name.
+            stage: The deployment stage the request came through.
+            request_id: Id to store the profile under; a new one if not given.
+
+        Returns:
+            The profiling request, or None if the request is not profiled.
+        """
+        value = header(PROFILE_HEADER)
+        if value is None:
+            return None
+        if (stage or os.getenv("STAGE")) not in self.stages and not self.verify(value):
+            return None
+        mode = (header(MODE_HEADER) or "cprofile").lower()
+        output = (header(OUTPUT_HEADER) or "store").lower()
+        request_id = _UNSAFE_ID_CHARACTERS.sub("_", request_id or "")[:128] or os.urandom(16).hex()
+        return ProfileRequest(mode if mode in ("cprofile", "sampling") else "cprofile",
+                              output if output in ("store", "body") else "store", request_id)
+
+    def verify(self, token: str, now: Optional[float] = None) -> bool:
+        """Checks a signed token: a valid signature and an expiry in the (near) future."""
+        if not self.secret:
+            return False
+        expires, _, signature = token.strip().partition(".")
+        if not expires.isdigit():
+            return False
+        remaining = int(expires) - (now if now is not None else time.time())
+        if not 0 < remaining <= MAX_TOKEN_TTL:
+            return False
+        import hmac
+        return hmac.compare_digest(signature, _signature(self.secret, int(expires)))
+
+    def session(self, request: ProfileRequest):
+        """A context manager running the profiler the request asked for."""
+        if request.mode == "sampling":
+            return _SamplingSession(self.sample_interval_s)
+        return _CProfileSession()
+
+    def store(self, request: ProfileRequest, session) -> str:
+        """Writes a finished profile to the profile directory and returns its path."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, request.request_id + session.extension)
+        session.save(path)
+        return path
+
+    async def run_proxy(self, request: ProfileRequest, call: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Awaits a call producing an API Gateway proxy response under the profiler and attaches the profile."""
+        if not _active.acquire(blocking=False):
+            response = await call
+            response["headers"] = dict(response.get("headers") or {}, **{"X-Profile": "busy"})
+            return response
+        try:
+            with self.session(request) as session:
+                response = await call
+        finally:
+            _active.release()
+
+        headers = dict(response.get("headers") or {})
+        if request.output == "body":
+            headers.update({
+                "Content-Type": "text/plain; charset=utf-8",
+                "X-Profile-Status": str(response.get("statusCode", 500)),
+                "X-Profile-Id": request.request_id,
+            })
+            return dict(response, statusCode=200, headers=headers, body=session.text(), isBase64Encoded=False)
+        self.store(request, session)
+        headers["X-Profile-Id"] = request.request_id
+        return dict(response, headers=headers)
+
+
+class ProfilerMiddleware:
+    """ASGI middleware profiling the requests that ask for it (see RequestProfiler)."""
+
+    def __init__(self, app: Any, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        # Behind Mangum the API Gateway event carries the stage and request id
+        request_context = (scope.get("aws.event") or {}).get("requestContext") or {}
+        request = self.profiler.requested(headers.get, request_context.get("stage"),
+                                          request_context.get("requestId") or headers.get("x-request-id"))
+        if request is None:
+            await self.app(scope, receive, send)
+            return
+        if not _active.acquire(blocking=False):
+            await self.app(scope, receive, _with_headers(send, [(b"x-profile", b"busy")]))
+            return
+
+        messages = []
+
+        async def buffer(message: Dict[str, Any]) -> None:
+            messages.append(message)
+
+        try:
+            with self.profiler.session(request) as session:
+                await self.app(scope, receive, buffer if request.output == "body" else
+                               _with_headers(send, [(b"x-profile-id", request.request_id.encode())]))
+        finally:
+            _active.release()
+
+        if request.output == "store":
+            self.profiler.store(request, session)
+            return
+        status = next((message["status"] for message in messages if message["type"] == "http.response.start"), 500)
+        body = session.text().encode("utf-8")
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            (b"x-profile-status", str(status).encode()),
+            (b"x-profile-id", request.request_id.encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _with_headers(send: Callable, extra: list) -> Callable:
+    async def send_with_headers(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            message = dict(message, headers=list(message.get("headers", [])) + extra)
+        await send(message)
+    return send_with_headers
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mint a signed X-Debug-Profile header value.")
+    parser.add_argument("command", choices=["sign"])
+    parser.add_argument("--ttl", type=int, default=900, help="validity in seconds (at most one day)")
+    args = parser.parse_args()
+    secret = os.getenv("PROFILER_SECRET")
+    if not secret:
+        parser.error("PROFILER_SECRET is not set")
+    print(sign_token(secret, min(args.ttl, MAX_TOKEN_TTL)))
@@ -0,0 +1,144 @@
+"""
+Per-request phase timings, reported as a Server-Timing header and a log line.
+
+Opt-in with SERVER_TIMING=true. While a request is being timed (by the
+ApiGatewayDispatcher or ServerTimingMiddleware), code wrapped in
+timed(phase) adds its wall time to that phase of the request:
+
+    auth           bearer token verification and issuance (JWTProvider)
+    db             repository calls: MongoDB round trips and document decoding
+    validation     pydantic validation of request bodies and entities
+    serialization  JSON encoding of response bodies
+
+The header also carries "total", the time from the start of the request to
+the response. On the FastAPI routes, the body validation FastAPI runs before
+calling the route is part of "total" only.
+
+Outside a timed request timed() costs one ContextVar lookup, so the
+instrumentation can stay in place when the feature is off.
+"""
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("auth", "db", "validation", "serialization")
+
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar("server_timing", default=None)
+
+
+def enabled() -> bool:
+    """Server timing is reported when SERVER_TIMING is set to a true value."""
+    return os.getenv("SERVER_TIMING", "").lower() in ("1", "true", "yes")
+
+
+class RequestTimings:
+    """Wall time per phase of one request, in milliseconds."""
+
+    __slots__ = ("started", "phases", "active")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        # Phases currently being timed; nested timers of the same phase are not counted twice
+        self.active: set = set()
+
+    def add(self, phase: str, duration_ms: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration_ms
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def header(self, total_ms: float) -> str:
+        """The Server-Timing header value, e.g. "auth;dur=0.05, db;dur=2.31, total;dur=3.10"."""
+        entries = [f"{phase};dur={self.phases[phase]:.2f}" for phase in PHASES if phase in self.phases]
+        entries.extend(f"{phase};dur={ms:.2f}" for phase, ms in self.phases.items() if phase not in PHASES)
+        entries.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(entries)
+
+
+class timed:
+    """Context manager adding the time spent in its block to a phase of the current request."""
+
+    __slots__ = ("phase", "timings", "start")
+
+    def __init__(self, phase: str):
+        self.phase = phase
+        self.timings = None
+
+    def __enter__(self) -> "timed":
+        timings = _current.get()
+        if timings is not None and self.phase not in timings.active:
+            timings.active.add(self.phase)
+            self.timings = timings
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        timings = self.timings
+        if timings is not None:
+            timings.add(self.phase, (time.perf_counter() - self.start) * 1000)
+            timings.active.discard(self.phase)
+            self.timings = None
+
+
+class request:
+    """Context manager timing one request; the timed() blocks inside it report to it."""
+
+    __slots__ = ("timings", "token")
+
+    def __enter__(self) -> RequestTimings:
+        self.timings = RequestTimings()
+        self.token = _current.set(self.timings)
+        return self.timings
+
+    def __exit__(self, *exc_info) -> None:
+        _current.reset(self.token)
+
+
+def report(timings: RequestTimings, method: str, path: str, status_code: int) -> str:
+    """
+    Logs the breakdown of a finished request, with the phases as structured
+    fields, and returns its Server-Timing header value.
+    """
+    total_ms = timings.total_ms()
+    logger.info("%s %s %d in %.2f ms", method, path, status_code, total_ms, extra={
+        "server_timing": {phase: round(ms, 3) for phase, ms in timings.phases.items()},
+        "total_ms": round(total_ms, 3),
+        "method": method,
+        "path": path,
+        "status": status_code,
+    })
+    return timings.header(total_ms)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware timing every HTTP request and adding the Server-Timing
+    header (and Timing-Allow-Origin, so cross-origin pages can read it) to the
+    response.
+    """
+
+    def __init__(self, app: Any, allowed_origin: str = "*"):
+        self.app = app
+        self.allowed_origin = allowed_origin.encode("latin-1")
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with request() as timings:
+            async def send_with_timing(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    value = report(timings, scope["method"], scope["path"], message["status"])
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    headers.append((b"timing-allow-origin", self.allowed_origin))
+                    message = dict(message, headers=headers)
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
@@ -0,0 +1,184 @@
+"""
+Central logging setup: JSON lines written by a background thread.
+
+configure_logging() replaces the root logger's handlers with a QueueHandler.
+A request thread only checks the level and the sampling rate and enqueues the
+record; a QueueListener thread renders it (the lazy %-style arguments, the
+traceback and the JSON document) and writes it to stdout, which Lambda ships
+to CloudWatch Logs.
+
+Settings (environment):
+    LOG_LEVEL          root level, default INFO
+    LOG_SAMPLE_RATES   per-logger sampling of INFO and DEBUG records, as
+                       "logger=rate" pairs, e.g.
+                       "infrastructure.database.mongo_repositories=0.1".
+                       A rate applies to the logger and its children; the most
+                       specific name wins. WARNING and above are always kept.
+
+Records are rendered after the call returns, so arguments passed to a logging
+call must not be mutated afterwards.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+_lock = threading.Lock()
+
+
+def parse_sample_rates(value: Optional[str]) -> Dict[str, float]:
+    """Parses "logger=rate,logger=rate" into a mapping, ignoring malformed pairs."""
+    rates: Dict[str, float] = {}
+    for pair in (value or "").split(","):
+        name, _, rate = pair.partition("=")
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the INFO and DEBUG records of the configured loggers."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        # logger name -> rate of its most specific configured ancestor (None: keep all)
+        self._resolved: Dict[str, Optional[float]] = {}
+
+    def rate(self, name: str) -> Optional[float]:
+        rate = self._resolved.get(name, False)
+        if rate is False:
+            rate, candidate = None, name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate(record.name)
+        return rate is None or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON document per record: time, level, logger, message, extra fields and the exception."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        document: Dict[str, Any] = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + ".%03dZ" % record.msecs,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = vars(record)
+        for key in fields.keys() - _RECORD_ATTRIBUTES:
+            if not key.startswith("_"):
+                document[key] = fields[key]
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            document["exception"] = record.exc_text
+        if record.stack_info:
+            document["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(document, default=str, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread instead of doing it on enqueue."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is when a record is emitted (Lambda and test runners swap it)."""
+
+    @property
+    def stream(self) -> TextIO:
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value: TextIO) -> None:
+        pass
+
+
+def configure_logging(level: Optional[str] = None, stream: Optional[TextIO] = None,
+                      sample_rates: Optional[Dict[str, float]] = None, force: bool = False) -> None:
+    """
+    Installs the queue-based JSON logging on the root logger. Calling it again
+    is a no-op unless force=True, which replaces the current setup.
+
+    Args:
+        level: Root level name; defaults to LOG_LEVEL or INFO.
+        stream: Where the listener writes; defaults to the current sys.stdout.
+        sample_rates: Per-logger sampling rates; defaults to LOG_SAMPLE_RATES.
+    """
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None and not force:
+            return
+        _stop()
+
+        output = logging.StreamHandler(stream) if stream is not None else _StdoutHandler()
+        output.setFormatter(JsonFormatter())
+        records: queue.Queue = queue.Queue()
+        handler = _DeferredQueueHandler(records)
+        rates = sample_rates if sample_rates is not None else parse_sample_rates(os.getenv("LOG_SAMPLE_RATES"))
+        if rates:
+            handler.addFilter(SamplingFilter(rates))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+
+        _listener = logging.handlers.QueueListener(records, output)
+        _listener.start()
+        _queue_handler = handler
+
+
+def flush_logs(timeout: float = 1.0) -> None:
+    """Waits (at most timeout seconds) until the listener has written every queued record."""
+    handler = _queue_handler
+    if handler is None:
+        return
+    deadline = time.monotonic() + timeout
+    while handler.queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.0005)
+
+
+def _stop() -> None:
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener = None
+        _queue_handler = None
+
+
+def stop_logging() -> None:
+    """Writes out the queued records, stops the listener thread and removes the queue handler."""
+    with _lock:
+        _stop()
+
+
+atexit.register(stop_logging)
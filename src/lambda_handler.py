@@ -1,7 +1,50 @@
 import os
-from mangum import Mangum
-from main import app
+
+from infrastructure.monitoring.structured_logging import configure_logging, flush_logs
+
+# JSON log lines, written to stdout by a background thread (see structured_logging)
+configure_logging()
 
 stage = os.getenv("API_GATEWAY_BASE_PATH")
 
-handler = Mangum(app)
\ No newline at end of file
+# LAMBDA_ENTRYPOINT selects how API Gateway events reach the handlers:
+# "direct" (default) dispatches them straight from the route table in
+# api/routes/api_routes.py; "mangum" runs them through the FastAPI app in main.py.
+# STARTUP_MODE=lazy (direct only) defers importing the handlers and the code
+# behind them until the first request that needs them; "eager" (default)
+# imports everything during the Lambda init phase.
+lazy = os.getenv("STARTUP_MODE", "eager").lower() == "lazy"
+
+if os.getenv("LAMBDA_ENTRYPOINT", "direct").lower() == "mangum":
+    from mangum import Mangum
+    from main import app
+
+    entrypoint = Mangum(app)
+else:
+    from api.routes.api_routes import routes
+    from api.routes.dispatcher import ApiGatewayDispatcher
+
+    entrypoint = ApiGatewayDispatcher(routes, base_path=stage, lazy=lazy)
+
+
+def handler(event, context):
+    try:
+        return entrypoint(event, context)
+    finally:
+        # Lambda freezes the process once the handler returns, so the log
+        # records of this invocation are written out before that
+        flush_logs()
+
+# MONGO_PRECONNECT (default: on unless STARTUP_MODE=lazy) connects to MongoDB,
+# pings it and creates the indexes during the init phase, on the event loop the
+# invocations run on, so the first request does not pay for it. A failure here
+# is logged and left to the connection backoff; it does not fail the init.
+if os.getenv("MONGO_PRECONNECT", "false" if lazy else "true").lower() == "true":
+    import logging
+    from api.routes.dispatcher import event_loop
+    from infrastructure.database.indexes import provision_indexes
+
+    try:
+        event_loop().run_until_complete(provision_indexes())
+    except Exception as e:
+        logging.getLogger(__name__).error("MongoDB pre-connection failed during init: %s", e)
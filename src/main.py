@@ -1,27 +1,56 @@
-import json
 import logging
-from typing import List
-from fastapi import FastAPI, Request, Response, HTTPException, status, Path, Body, Depends
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import FastAPI, Request, Response, HTTPException, status, Path, Body, Depends, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer
 from bson import ObjectId
 
 from api.handlers import auth_handlers, task_handlers
 from api.schemas.auth_schemas import UserRegisterSchema, UserLoginSchema, AuthResponseSchema, ErrorDetailSchema
-from api.schemas.task_schemas import TaskResponseSchema, TaskCreateSchema, TaskUpdateSchema
+from api.schemas.task_schemas import (TaskResponseSchema, TaskCreateSchema, TaskUpdateSchema, TaskChangesResponseSchema,
+                                      TaskBatchCreateSchema, TaskBatchUpdateSchema, TaskBatchDeleteSchema,
+                                      TaskBatchResponseSchema)
+from api.utils.events import principal_context
+from api.utils.json_response import FastJSONResponse
+from api.utils.responses import error
+from core.entities.principal import Principal
+from core.exceptions.auth_errors import AuthenticationError
+from core.services.task_service import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from infrastructure.auth.auth_middleware import JWTBearer
+from infrastructure.auth.jwt_provider import get_jwt_provider
+from infrastructure.database import indexes
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.monitoring import server_timing
+from infrastructure.monitoring.structured_logging import configure_logging
+from infrastructure.monitoring.mongo_commands import command_metrics
+from infrastructure.monitoring.mongo_pool import pool_metrics
+from infrastructure.monitoring.prometheus import CONTENT_TYPE, Exposition
+from infrastructure.monitoring.request_metrics import MetricsMiddleware, metrics_mode, request_metrics
+from infrastructure.monitoring.request_profiler import ProfilerMiddleware, RequestProfiler
 import os
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-security_scheme = HTTPBearer()
+# Authenticates each task request once and hands the Principal to the route
+require_principal = JWTBearer()
 
 allowed_origin = os.getenv("FRONTEND_ORIGIN", "*")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Creates the registered MongoDB indexes before serving requests and, when
+    MONGO_VERIFY_INDEXES is set, refuses to start if a query plan is a COLLSCAN.
+    """
+    await indexes.provision_indexes()
+    yield
+
 app = FastAPI(
     title="Task Manager API",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     openapi_tags=[
         {
             "name": "Authentication",
@@ -40,8 +69,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Server-Timing", "X-Profile-Id", "X-Profile-Status"],
 )
 
+# SERVER_TIMING=true adds a Server-Timing header with the phase breakdown
+# (auth, db, validation, serialization) of every request and logs it
+if server_timing.enabled():
+    app.add_middleware(server_timing.ServerTimingMiddleware, allowed_origin=allowed_origin)
+
+# Per-route request counts, latency histograms and in-flight gauges, scraped
+# from /metrics or, with METRICS_MODE=emf (the default on Lambda), also written
+# to stdout as one CloudWatch EMF line per request
+if metrics_mode() != "off":
+    app.add_middleware(MetricsMiddleware, emf=metrics_mode() == "emf")
+
+# Requests carrying a signed X-Debug-Profile header (or any such header in a
+# stage listed in PROFILE_STAGES) run under cProfile or a sampling profiler;
+# without PROFILER_SECRET or PROFILE_STAGES the middleware is not installed
+profiler = RequestProfiler.from_env()
+if profiler is not None:
+    app.add_middleware(ProfilerMiddleware, profiler=profiler)
+
 class PyObjectId(ObjectId):
     @classmethod
     def __get_validators__(cls):
@@ -60,34 +108,67 @@ class PyObjectId(ObjectId):
         return json_schema
 
 def process_handler_response(result: dict, success_status: int = status.HTTP_200_OK) -> Response:
-    """Processes the dictionary response from handlers into a FastAPI Response."""
+    """
+    Turns a handler's Lambda-style response into a FastAPI Response.
+
+    The handler has already serialized the body to JSON, so it is sent as is
+    rather than being parsed and encoded a second time.
+    """
     status_code = result.get('statusCode', status.HTTP_500_INTERNAL_SERVER_ERROR)
     headers = result.get('headers', {})
-    body_str = result.get('body')
+    body = result.get('body')
 
-    if status_code == status.HTTP_204_NO_CONTENT:
+    if status_code in (status.HTTP_204_NO_CONTENT, status.HTTP_304_NOT_MODIFIED):
         return Response(status_code=status_code, headers=headers)
 
-    try:
-        body_data = json.loads(body_str) if body_str else {}
-        return JSONResponse(content=body_data, status_code=status_code, headers=headers)
-    except (json.JSONDecodeError, TypeError) as e:
-        logger.error(f"Error parsing handler response: {e}")
-        return JSONResponse(
-            content={"detail": "Internal error in response format"},
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            headers=headers
-        )
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return FastJSONResponse(content=body or b"{}", status_code=status_code, headers=headers)
+
+@app.exception_handler(AuthenticationError)
+async def authentication_exception_handler(request: Request, exc: AuthenticationError):
+    """Rejects requests whose bearer token could not be resolved to a Principal."""
+    return process_handler_response(error(status.HTTP_401_UNAUTHORIZED, str(exc)))
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Handles any unhandled exceptions."""
-    logger.exception(f"Unhandled error: {exc}")
-    return JSONResponse(
+    logger.exception("Unhandled error: %s", exc)
+    return FastJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "Internal server error"}
     )
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Process metrics in the Prometheus text format."""
+    exposition = Exposition()
+    request_metrics.collect(exposition)
+    command_metrics.collect(exposition)
+    pool_metrics.collect(exposition)
+
+    health = MongoConnection.health()
+    exposition.declare("mongodb_up", "gauge", "Whether the cached MongoDB health check passed.")
+    exposition.sample("mongodb_up", int(health["healthy"]))
+    jwt_cache = get_jwt_provider().cache_stats()
+    exposition.declare("jwt_cache_lookups_total", "counter", "Verified-token cache lookups by result.")
+    exposition.sample("jwt_cache_lookups_total", jwt_cache["hits"], {"result": "hit"})
+    exposition.sample("jwt_cache_lookups_total", jwt_cache["misses"], {"result": "miss"})
+    if hasattr(task_handlers.task_repository, "cache_stats"):
+        task_cache = task_handlers.task_repository.cache_stats()
+        exposition.declare("task_list_cache_lookups_total", "counter", "Task-list cache lookups by result.")
+        exposition.sample("task_list_cache_lookups_total", task_cache["hits"], {"result": "hit"})
+        exposition.sample("task_list_cache_lookups_total", task_cache["misses"], {"result": "miss"})
+        exposition.sample("task_list_cache_lookups_total", task_cache["bypassed"], {"result": "bypass"})
+    hasher = auth_handlers.password_hasher.stats()
+    exposition.declare("password_hasher_queue_depth", "gauge", "Password hashing calls waiting for a worker.")
+    exposition.sample("password_hasher_queue_depth", hasher["queue_depth"])
+    exposition.declare("password_hasher_rejected_total", "counter", "Password hashing calls rejected while saturated.")
+    exposition.sample("password_hasher_rejected_total", hasher["rejected"])
+    exposition.declare("password_hasher_wait_seconds", "histogram", "Time password hashing calls waited for a worker.")
+    exposition.histogram("password_hasher_wait_seconds", auth_handlers.password_hasher.wait_histogram)
+    return Response(exposition.render(), media_type=CONTENT_TYPE)
+
 @app.post(
     "/auth/register",
     status_code=status.HTTP_201_CREATED,
@@ -95,17 +176,18 @@ async def global_exception_handler(request: Request, exc: Exception):
     response_model=AuthResponseSchema,
     responses={
         400: {"model": ErrorDetailSchema},
-        500: {"model": ErrorDetailSchema}
+        500: {"model": ErrorDetailSchema},
+        503: {"model": ErrorDetailSchema}
     }
 )
 async def register_user(user_data: UserRegisterSchema):
     """Registers a new user."""
     try:
-        event = {"body": user_data.model_dump_json()}
-        result = auth_handlers.register_user(event, {})
+        event = {"body": user_data.model_dump()}
+        result = await auth_handlers.register_user(event, {})
         return process_handler_response(result, status.HTTP_201_CREATED)
     except Exception as e:
-        logger.error(f"Registration error: {e}")
+        logger.error("Registration error: %s", e)
         raise HTTPException(status_code=500, detail="Registration failed")
 
 @app.post(
@@ -114,17 +196,18 @@ async def register_user(user_data: UserRegisterSchema):
     response_model=AuthResponseSchema,
     responses={
         401: {"model": ErrorDetailSchema},
-        500: {"model": ErrorDetailSchema}
+        500: {"model": ErrorDetailSchema},
+        503: {"model": ErrorDetailSchema}
     }
 )
 async def login_user(credentials: UserLoginSchema):
     """Logs in a user."""
     try:
-        event = {"body": credentials.model_dump_json()}
-        result = auth_handlers.login_user(event, {})
+        event = {"body": credentials.model_dump()}
+        result = await auth_handlers.login_user(event, {})
         return process_handler_response(result)
     except Exception as e:
-        logger.error(f"Login error: {e}")
+        logger.error("Login error: %s", e)
         raise HTTPException(status_code=500, detail="Login failed")
 
 @app.get(
@@ -132,21 +215,65 @@ async def login_user(credentials: UserLoginSchema):
     tags=["Tasks"],
     response_model=List[TaskResponseSchema],
     responses={
+        304: {"description": "The tasks are unchanged since the ETag in If-None-Match"},
         401: {"model": ErrorDetailSchema},
         500: {"model": ErrorDetailSchema}
-    },
-    dependencies=[Depends(security_scheme)]
+    }
 )
-async def get_tasks(request: Request):
-    """Gets all tasks for the authenticated user."""
+async def get_tasks(
+    principal: Principal = Depends(require_principal),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, description=f"Page size (at most {MAX_PAGE_SIZE})"),
+    cursor: Optional[str] = Query(None, description="Value of the X-Next-Cursor header from the previous page"),
+    if_none_match: Optional[str] = Header(None, description="ETag of the page the client already has"),
+):
+    """
+    Gets one page of tasks for the authenticated user. The cursor for the next page is returned in X-Next-Cursor.
+    The page carries an ETag; sending it back in If-None-Match gets a 304 while the user's tasks are unchanged.
+    """
     try:
-        event = {"headers": dict(request.headers)}
-        result = task_handlers.get_tasks(event, {})
+        query = {"limit": str(limit)}
+        if cursor:
+            query["cursor"] = cursor
+        event = {"requestContext": principal_context(principal), "queryStringParameters": query}
+        if if_none_match:
+            event["headers"] = {"If-None-Match": if_none_match}
+        result = await task_handlers.get_tasks(event, {})
         return process_handler_response(result)
     except Exception as e:
-        logger.error(f"Error getting tasks: {e}")
+        logger.error("Error getting tasks: %s", e)
         raise HTTPException(status_code=500, detail="Failed to get tasks")
 
+@app.get(
+    "/tasks/changes",
+    tags=["Tasks"],
+    response_model=TaskChangesResponseSchema,
+    responses={
+        400: {"model": ErrorDetailSchema},
+        401: {"model": ErrorDetailSchema},
+        410: {"model": ErrorDetailSchema},
+        500: {"model": ErrorDetailSchema}
+    }
+)
+async def get_task_changes(
+    principal: Principal = Depends(require_principal),
+    since: Optional[str] = Query(None, description="sync_token from the previous call; omit for the initial sync"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, description=f"Maximum changes per call (at most {MAX_PAGE_SIZE})"),
+):
+    """
+    Gets the tasks created or updated since a sync token and the ids of those deleted since.
+    A 410 means the token is older than the deletion history; fetch the full list and sync from a new token.
+    """
+    try:
+        query = {"limit": str(limit)}
+        if since:
+            query["since"] = since
+        event = {"requestContext": principal_context(principal), "queryStringParameters": query}
+        result = await task_handlers.get_task_changes(event, {})
+        return process_handler_response(result)
+    except Exception as e:
+        logger.error("Error getting task changes: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to get task changes")
+
 @app.post(
     "/tasks",
     status_code=status.HTTP_201_CREATED,
@@ -156,22 +283,61 @@ async def get_tasks(request: Request):
         400: {"model": ErrorDetailSchema},
         401: {"model": ErrorDetailSchema},
         500: {"model": ErrorDetailSchema}
-    },
-    dependencies=[Depends(security_scheme)]
+    }
 )
-async def create_task(request: Request, task_data: TaskCreateSchema):
+async def create_task(task_data: TaskCreateSchema, principal: Principal = Depends(require_principal)):
     """Creates a new task for the authenticated user."""
     try:
         event = {
-            "body": task_data.model_dump_json(),
-            "headers": dict(request.headers)
+            "body": task_data.model_dump(),
+            "requestContext": principal_context(principal)
         }
-        result = task_handlers.create_task(event, {})
+        result = await task_handlers.create_task(event, {})
         return process_handler_response(result, status.HTTP_201_CREATED)
     except Exception as e:
-        logger.error(f"Error creating task: {e}")
+        logger.error("Error creating task: %s", e)
         raise HTTPException(status_code=500, detail="Failed to create task")
 
+_BATCH_RESPONSES = {
+    400: {"model": ErrorDetailSchema},
+    401: {"model": ErrorDetailSchema},
+    413: {"model": ErrorDetailSchema},
+    500: {"model": ErrorDetailSchema}
+}
+
+@app.post("/tasks:batch", tags=["Tasks"], response_model=TaskBatchResponseSchema, responses=_BATCH_RESPONSES)
+async def create_tasks_batch(batch: TaskBatchCreateSchema, principal: Principal = Depends(require_principal)):
+    """Creates many tasks for the authenticated user in one write, reporting each item's outcome."""
+    try:
+        event = {"body": batch.model_dump(), "requestContext": principal_context(principal)}
+        result = await task_handlers.create_tasks_batch(event, {})
+        return process_handler_response(result)
+    except Exception as e:
+        logger.error("Error creating tasks: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to create tasks")
+
+@app.patch("/tasks:batch", tags=["Tasks"], response_model=TaskBatchResponseSchema, responses=_BATCH_RESPONSES)
+async def update_tasks_batch(batch: TaskBatchUpdateSchema, principal: Principal = Depends(require_principal)):
+    """Updates many tasks of the authenticated user in one write, reporting each item's outcome."""
+    try:
+        event = {"body": batch.model_dump(), "requestContext": principal_context(principal)}
+        result = await task_handlers.update_tasks_batch(event, {})
+        return process_handler_response(result)
+    except Exception as e:
+        logger.error("Error updating tasks: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to update tasks")
+
+@app.delete("/tasks:batch", tags=["Tasks"], response_model=TaskBatchResponseSchema, responses=_BATCH_RESPONSES)
+async def delete_tasks_batch(batch: TaskBatchDeleteSchema, principal: Principal = Depends(require_principal)):
+    """Deletes many tasks of the authenticated user in one write, reporting each item's outcome."""
+    try:
+        event = {"body": batch.model_dump(), "requestContext": principal_context(principal)}
+        result = await task_handlers.delete_tasks_batch(event, {})
+        return process_handler_response(result)
+    except Exception as e:
+        logger.error("Error deleting tasks: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to delete tasks")
+
 @app.put(
     "/tasks/{task_id}",
     tags=["Tasks"],
@@ -179,26 +345,26 @@ async def create_task(request: Request, task_data: TaskCreateSchema):
     responses={
         400: {"model": ErrorDetailSchema},
         401: {"model": ErrorDetailSchema},
+        403: {"model": ErrorDetailSchema},
         404: {"model": ErrorDetailSchema},
         500: {"model": ErrorDetailSchema}
-    },
-    dependencies=[Depends(security_scheme)]
+    }
 )
 async def update_task(
     task_id: str = Path(..., example="60d5ecf3a3b4b5b6c7d8e9f0"),
     task_data: TaskUpdateSchema = Body(...),
-    request: Request = None
+    principal: Principal = Depends(require_principal)
 ):
     try:
         event = {
-            "body": task_data.model_dump_json(exclude_unset=True),
+            "body": task_data.model_dump(exclude_unset=True),
             "pathParameters": {"taskId": task_id},
-            "headers": dict(request.headers) if request else {}
+            "requestContext": principal_context(principal)
         }
-        result = task_handlers.update_task(event, {})
+        result = await task_handlers.update_task(event, {})
         return process_handler_response(result)
     except Exception as e:
-        logger.error(f"Error updating task: {e}")
+        logger.error("Error updating task: %s", e)
         raise HTTPException(status_code=500, detail="Failed to update task")
 
 @app.delete(
@@ -208,24 +374,24 @@ async def update_task(
     responses={
         204: {"description": "Task deleted"},
         401: {"model": ErrorDetailSchema},
+        403: {"model": ErrorDetailSchema},
         404: {"model": ErrorDetailSchema},
         500: {"model": ErrorDetailSchema}
-    },
-    dependencies=[Depends(security_scheme)] # Requires authentication
+    }
 )
 async def delete_task(
     task_id: str = Path(..., example="60d5ecf3a3b4b5b6c7d8e9f0"),
-    request: Request = None
+    principal: Principal = Depends(require_principal) # Requires authentication
 ):
     """Deletes a task for the authenticated user."""
     try:
         event = {
             "pathParameters": {"taskId": task_id},
-            "headers": dict(request.headers) if request else {}
+            "requestContext": principal_context(principal)
         }
-        result = task_handlers.delete_task(event, {})
+        result = await task_handlers.delete_task(event, {})
         # Return the response, ensuring 204 code is handled correctly
         return process_handler_response(result, status.HTTP_204_NO_CONTENT)
     except Exception as e:
-        logger.error(f"Error deleting task: {e}")
+        logger.error("Error deleting task: %s", e)
         raise HTTPException(status_code=500, detail="Failed to delete task")
\ No newline at end of file
@@ -19,17 +19,23 @@ def setUpModule():
     print("Setting up module with mock environment variables...")
     environ_patcher.start()
     global app, client
-    from main import app as imported_app
+    from main import app as imported_app, require_principal
+    from core.entities.principal import Principal
     app = imported_app
+    # Route tests mock the handlers, so authenticate every request as a fixed user
+    app.dependency_overrides[require_principal] = lambda: Principal(email=MOCK_USER_EMAIL)
     client = TestClient(app)
     print("Module setup complete.")
 
 def tearDownModule():
     """Clean up environment variables after all tests have run."""
     print("Tearing down module...")
+    app.dependency_overrides.clear()
     environ_patcher.stop()
     print("Module teardown complete.")
 
+MOCK_USER_EMAIL = "user@example.com"
+
 # --- Mock Handler Responses ---
 # Define standard responses that handlers might return
 MOCK_SUCCESS_RESPONSE = {"statusCode": 200, "body": json.dumps({"message": "Success"}), "headers": {"X-Custom-Header": "value"}}
@@ -80,7 +86,7 @@ class TestMainApp(unittest.TestCase):
         # Assert handler call
         call_args, _ = mock_register.call_args
         event_arg = call_args[0]
-        self.assertEqual(json.loads(event_arg.get("body")), user_data)
+        self.assertEqual(event_arg.get("body"), user_data)
 
         # Assert response processing
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -109,7 +115,7 @@ class TestMainApp(unittest.TestCase):
         # Assert handler call
         call_args, _ = mock_login.call_args
         event_arg = call_args[0]
-        self.assertEqual(json.loads(event_arg.get("body")), login_data)
+        self.assertEqual(event_arg.get("body"), login_data)
 
         # Assert response processing
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -169,7 +175,7 @@ class TestMainApp(unittest.TestCase):
         # Assert handler call
         call_args, _ = mock_get_tasks.call_args
         event_arg = call_args[0]
-        self.assertEqual(event_arg.get("headers", {}).get("authorization"), headers["Authorization"])
+        self.assertEqual(event_arg["requestContext"]["authorizer"]["email"], MOCK_USER_EMAIL)
 
         # Assert response processing
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -200,8 +206,8 @@ class TestMainApp(unittest.TestCase):
         # Assert handler call
         call_args, _ = mock_create_task.call_args
         event_arg = call_args[0]
-        self.assertEqual(event_arg.get("headers", {}).get("authorization"), headers["Authorization"])
-        self.assertEqual(json.loads(event_arg.get("body")), task_data)
+        self.assertEqual(event_arg["requestContext"]["authorizer"]["email"], MOCK_USER_EMAIL)
+        self.assertEqual(event_arg.get("body"), task_data)
 
         # Assert response processing
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -221,9 +227,9 @@ class TestMainApp(unittest.TestCase):
         # Assert handler call
         call_args, _ = mock_update_task.call_args
         event_arg = call_args[0]
-        self.assertEqual(event_arg.get("headers", {}).get("authorization"), headers["Authorization"])
+        self.assertEqual(event_arg["requestContext"]["authorizer"]["email"], MOCK_USER_EMAIL)
         self.assertEqual(event_arg.get("pathParameters", {}).get("taskId"), task_id)
-        self.assertEqual(json.loads(event_arg.get("body")), update_data)
+        self.assertEqual(event_arg.get("body"), update_data)
 
         # Assert response processing
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -255,7 +261,7 @@ class TestMainApp(unittest.TestCase):
 
         call_args, _ = mock_delete_task.call_args
         event_arg = call_args[0]
-        self.assertEqual(event_arg.get("headers", {}).get("authorization"), headers["Authorization"])
+        self.assertEqual(event_arg["requestContext"]["authorizer"]["email"], MOCK_USER_EMAIL)
         self.assertEqual(event_arg.get("pathParameters", {}).get("taskId"), task_id)
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from core.entities.user import User
+from core.exceptions.auth_errors import AuthenticationError
+from infrastructure.auth.auth_middleware import get_current_user, resolve_principal
+from infrastructure.auth.jwt_provider import get_jwt_provider
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase()
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+def bearer(email="principal@example.com"):
+    return "Bearer " + get_jwt_provider().generate_token(User(email=email, password_hash="x"))
+
+
+def test_resolve_principal_reads_the_email_claim():
+    assert resolve_principal(bearer()).email == "principal@example.com"
+    assert get_current_user({"headers": {"Authorization": bearer()}}).email == "principal@example.com"
+
+
+@pytest.mark.parametrize("authorization, message", [
+    (None, "Authorization header missing or invalid"),
+    ("Basic abc", "Authorization header missing or invalid"),
+    ("Bearer not-a-token", "Invalid or expired token"),
+])
+def test_resolve_principal_rejects_bad_headers(authorization, message):
+    with pytest.raises(AuthenticationError, match=message):
+        resolve_principal(authorization)
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer not-a-token"}])
+def test_unauthenticated_task_requests_never_reach_the_database(db, headers):
+    for response in (
+        client.get("/tasks", headers=headers),
+        client.post("/tasks", headers=headers, json={"title": "Nope"}),
+        client.put("/tasks/60d5ecf3a3b4b5b6c7d8e9f0", headers=headers, json={"title": "Nope"}),
+        client.delete("/tasks/60d5ecf3a3b4b5b6c7d8e9f0", headers=headers),
+    ):
+        assert response.status_code == 401
+        assert "error" in response.json()
+    assert db.commands == []
+
+
+def test_routes_scope_tasks_to_the_principal(db):
+    owner, other = {"Authorization": bearer("owner@example.com")}, {"Authorization": bearer("other@example.com")}
+    client.post("/tasks", headers=owner, json={"title": "Mine"})
+    assert [t["title"] for t in client.get("/tasks", headers=owner).json()] == ["Mine"]
+    assert client.get("/tasks", headers=other).json() == []
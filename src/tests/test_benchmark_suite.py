@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.suite import BASELINE_PATH, compare
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_suite_covers_every_endpoint_through_both_entry_points(tmp_path):
+    # In a subprocess: the suite installs its own database and drives the shared event loop
+    output = tmp_path / "results.json"
+    subprocess.run([sys.executable, "-W", "ignore", "-m", "benchmarks.suite", "--sizes", "3", "--iterations", "3",
+                    "--auth-iterations", "1", "--warmup", "1", "--output", str(output)],
+                   cwd=SRC, env=dict(os.environ, MONGO_PRECONNECT="false"), capture_output=True, check=True)
+    results = json.loads(output.read_text())["results"]
+    rows = {(row["target"], row["endpoint"], row["size"]) for row in results}
+    for target in ("fastapi", "lambda"):
+        assert {(target, "POST /auth/register", None), (target, "POST /auth/login", None)} <= rows
+        for endpoint in ("GET /tasks", "GET /tasks/changes", "POST /tasks", "PUT /tasks/{task_id}",
+                         "DELETE /tasks/{task_id}", "POST /tasks:batch", "PATCH /tasks:batch", "DELETE /tasks:batch"):
+            assert (target, endpoint, 3) in rows
+    assert all(row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"] and row["throughput_rps"] > 0 for row in results)
+
+
+def test_compare_flags_p50_regressions(capsys):
+    row = {"target": "lambda", "endpoint": "GET /tasks", "size": 10, "p50_ms": 1.0, "p99_ms": 2.0}
+    baseline = {"results": [row]}
+    assert compare({"results": [dict(row, p50_ms=1.2)]}, baseline, threshold=0.25) == []
+    assert compare({"results": [dict(row, p50_ms=1.3)]}, baseline, threshold=0.25) == [
+        "lambda GET /tasks (size 10): p50 +30.0%"
+    ]
+
+
+def test_baseline_is_checked_in():
+    with open(BASELINE_PATH) as file:
+        baseline = json.load(file)
+    assert baseline["meta"]["sizes"] and baseline["results"]
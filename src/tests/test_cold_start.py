@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold import budget for lambda_handler with STARTUP_MODE=lazy, in milliseconds.
+# Override with COLD_START_BUDGET_MS on slower machines.
+COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "250"))
+
+# Only loaded once a request needs them when STARTUP_MODE=lazy
+HEAVY_PACKAGES = {"fastapi", "starlette", "mangum", "pydantic", "pymongo", "bcrypt", "jwt", "email_validator"}
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import lambda_handler
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "packages": sorted({name.split(".")[0] for name in sys.modules})}))
+"""
+
+
+def cold_import(startup_mode):
+    env = dict(os.environ, STARTUP_MODE=startup_mode, LAMBDA_ENTRYPOINT="direct", MONGO_PRECONNECT="false")
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", SCRIPT], cwd=SRC, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_lazy_startup_defers_heavy_imports():
+    loaded = set(cold_import("lazy")["packages"])
+    assert not loaded & HEAVY_PACKAGES
+
+
+def test_eager_startup_loads_the_handlers():
+    loaded = set(cold_import("eager")["packages"])
+    assert {"pymongo", "pydantic", "bcrypt", "jwt"} <= loaded
+    assert not loaded & {"fastapi", "starlette", "mangum"}
+
+
+def test_cold_import_is_within_budget():
+    # Best of three runs, so the first run compiling bytecode does not count
+    elapsed = min(cold_import("lazy")["ms"] for _ in range(3))
+    assert elapsed <= COLD_START_BUDGET_MS, (
+        f"importing lambda_handler took {elapsed:.0f} ms (budget {COLD_START_BUDGET_MS:.0f} ms); "
+        "run `python -m benchmarks.import_profile --startup-mode lazy` to see which modules it loads"
+    )
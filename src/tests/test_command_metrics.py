@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import pytest
+
+from core.entities.task import Task
+from core.entities.user import User
+from infrastructure.database import indexes
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.database.mongo_repositories import MongoTaskRepository, MongoUserRepository
+from infrastructure.monitoring.mongo_commands import CommandMetrics, command_shape, current_operation
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    # Registration would otherwise create the indexes first if no earlier test has
+    monkeypatch.setattr(indexes, "_provisioned", True)
+    metrics = CommandMetrics(slow_ms=1000)
+    MongoConnection.use_database(InMemoryDatabase(event_listeners=[metrics]))
+    yield metrics
+    MongoConnection.use_database(None)
+
+
+def keys(metrics):
+    return {(e["command"], e["collection"], e["method"]): e for e in metrics.snapshot()}
+
+
+def test_samples_are_keyed_by_command_collection_and_repository_method(metrics):
+    tasks, users = MongoTaskRepository(), MongoUserRepository()
+
+    async def run():
+        await users.register_user(User(email="m@example.com", password_hash="x"))
+        await users.find_by_email("m@example.com")
+        task = await tasks.create_task(Task(title="Measured", user_email="m@example.com"))
+        await tasks.get_user_tasks("m@example.com", limit=10)
+        await tasks.get_user_tasks("m@example.com", limit=10)
+        await tasks.update_user_task(task.id, "m@example.com", {"title": "Again"})
+        await tasks.delete_user_task(task.id, "m@example.com")
+    asyncio.run(run())
+
+    samples = keys(metrics)
+    assert set(samples) == {
+        ("insert", "users", "MongoUserRepository.register_user"),
+        ("find", "users", "MongoUserRepository.find_by_email"),
+        ("insert", "tasks", "MongoTaskRepository.create_task"),
+        ("find", "tasks", "MongoTaskRepository.get_user_tasks"),
+        ("findAndModify", "tasks", "MongoTaskRepository.update_user_task"),
+        # Deleting leaves a tombstone for delta sync
+        ("update", "tasks", "MongoTaskRepository.delete_user_task"),
+        # The list-version bump after each write is tagged with the write
+        ("update", "task_list_versions", "MongoTaskRepository.create_task"),
+        ("update", "task_list_versions", "MongoTaskRepository.update_user_task"),
+        ("update", "task_list_versions", "MongoTaskRepository.delete_user_task"),
+    }
+    assert samples[("find", "tasks", "MongoTaskRepository.get_user_tasks")]["count"] == 2
+    assert current_operation.get() is None
+
+
+def test_untagged_commands_have_no_method(metrics):
+    asyncio.run(MongoConnection._db.command("ping"))
+    assert list(keys(metrics)) == [("ping", None, None)]
+
+
+def test_slow_commands_are_logged_with_redacted_filters(caplog):
+    metrics = CommandMetrics(slow_ms=0)
+    MongoConnection.use_database(InMemoryDatabase(event_listeners=[metrics]))
+    try:
+        with caplog.at_level(logging.WARNING, logger="infrastructure.monitoring.mongo_commands"):
+            asyncio.run(MongoTaskRepository().get_user_tasks("secret@example.com", limit=5))
+    finally:
+        MongoConnection.use_database(None)
+    assert metrics.slow_commands == 1
+    message = caplog.records[-1].getMessage()
+    assert "find on tasks from MongoTaskRepository.get_user_tasks" in message
+    assert "'user_email': '?'" in message
+    assert "secret@example.com" not in message
+
+
+def test_command_shape_keeps_structure_but_not_values():
+    assert command_shape("delete", {"delete": "tasks", "deletes": [{"q": {"_id": 1, "user_email": "a@b.c"}, "limit": 1}]}) == {
+        "deletes": [{"q": {"_id": "?", "user_email": "?"}, "limit": 1}]
+    }
+    assert command_shape("find", {"find": "tasks", "filter": {"_id": {"$in": [1, 2]}}, "sort": {"_id": 1}, "limit": 3}) == {
+        "filter": {"_id": {"$in": ["?", "?"]}}, "sort": {"_id": 1}, "limit": 3
+    }
+    assert command_shape("insert", {"insert": "tasks", "documents": [{"title": "x"}] * 3}) == {"documents": 3}
+
+
+def test_failed_commands_are_counted():
+    class Event:
+        command_name, command, request_id, connection_id, duration_micros = "find", {"find": "tasks"}, 7, ("h", 1), 2500
+
+    metrics = CommandMetrics(slow_ms=1000)
+    metrics.started(Event)
+    metrics.failed(Event)
+    [entry] = metrics.snapshot()
+    assert entry["failures"] == 1 and entry["max"] == 2.5
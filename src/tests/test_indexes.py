@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from core.entities.user import User
+
+from infrastructure.database import indexes
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.database.mongo_repositories import MongoTaskRepository, MongoUserRepository
+
+
+@pytest.fixture
+def db(monkeypatch):
+    database = InMemoryDatabase()
+    MongoConnection.use_database(database)
+    monkeypatch.setattr(indexes, "_provisioned", False)
+    yield database
+    MongoConnection.use_database(None)
+
+
+def test_repositories_are_registered():
+    registered = indexes.registered_repositories()
+    assert MongoTaskRepository in registered
+    assert MongoUserRepository in registered
+
+
+def test_provisioning_creates_declared_indexes_once(db):
+    asyncio.run(indexes.provision_indexes())
+    asyncio.run(indexes.provision_indexes())
+    assert db.tasks.indexes["user_email_id"]["key"] == [("user_email", 1), ("_id", 1)]
+    assert db.users.indexes["email_unique"]["unique"] is True
+    assert db.commands.count(("createIndexes", "tasks")) == 1
+
+
+def test_a_missing_unique_index_blocks_registration_until_it_exists(db, monkeypatch):
+    async def fail(models):
+        raise OperationFailure("Index build failed")
+    monkeypatch.setattr(db.users, "create_indexes", fail)
+    assert not asyncio.run(indexes.provision_indexes())
+    with pytest.raises(Exception, match="unique index on email"):
+        asyncio.run(MongoUserRepository().register_user(User(email="a@example.com", password_hash="x")))
+    assert asyncio.run(db.users.count_documents({})) == 0
+
+    monkeypatch.undo()
+    monkeypatch.setattr(indexes, "_provisioned", False)
+    asyncio.run(MongoUserRepository().register_user(User(email="a@example.com", password_hash="x")))
+    assert db.users.indexes["email_unique"]["unique"] is True
+
+
+def test_a_failed_non_unique_index_does_not_block_provisioning(db, monkeypatch):
+    async def fail(models):
+        raise OperationFailure("Index build failed")
+    monkeypatch.setattr(db.tasks, "create_indexes", fail)
+    assert asyncio.run(indexes.provision_indexes())
+    assert db.users.indexes["email_unique"]["unique"] is True
+
+
+def test_verification_passes_with_indexes(db):
+    asyncio.run(indexes.ensure_indexes())
+    plans = asyncio.run(indexes.verify_query_plans())
+    assert "IXSCAN" in plans["tasks.get_user_tasks"]
+    assert "IXSCAN" in plans["users.find_by_email"]
+
+
+def test_verification_fails_on_collscan(db, monkeypatch):
+    monkeypatch.setattr(MongoUserRepository, "INDEXES", [])
+    asyncio.run(indexes.ensure_indexes())
+    with pytest.raises(indexes.IndexVerificationError) as excinfo:
+        asyncio.run(indexes.verify_query_plans())
+    assert excinfo.value.failures == ["users.find_by_email (COLLSCAN)"]
+
+
+def test_verification_mode_blocks_startup(db, monkeypatch):
+    monkeypatch.setenv("MONGO_VERIFY_INDEXES", "true")
+    monkeypatch.setattr(MongoUserRepository, "INDEXES", [IndexModel([("created_at", ASCENDING)], name="created_at")])
+    with pytest.raises(indexes.IndexVerificationError):
+        asyncio.run(indexes.provision_indexes())
+
+
+def test_plan_stages_handles_nested_plans():
+    plan = {"stage": "SHARD_MERGE", "shards": [{"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}]}
+    assert indexes.plan_stages(plan) == ["SHARD_MERGE", "FETCH", "IXSCAN"]
@@ -0,0 +1,56 @@
+import time
+
+from core.entities.user import User
+from infrastructure.auth import jwt_provider as jwt_provider_module
+from infrastructure.auth.jwt_provider import JWTProvider, get_jwt_provider
+
+
+def token_for(provider, email="a@example.com"):
+    return provider.generate_token(User(email=email, password_hash="x"))
+
+
+def test_repeated_tokens_are_served_from_the_cache(monkeypatch):
+    provider = JWTProvider()
+    token = token_for(provider)
+    assert provider.decode_token(token)["email"] == "a@example.com"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached token was verified again")
+
+    monkeypatch.setattr(jwt_provider_module.jwt, "decode", fail)
+    assert provider.decode_token(token)["email"] == "a@example.com"
+    assert provider.cache_stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "size": 1, "max_size": provider.cache_size}
+
+
+def test_cached_entries_expire_with_the_token(monkeypatch):
+    provider = JWTProvider()
+    token = token_for(provider)
+    claims = provider.decode_token(token)
+    monkeypatch.setattr(jwt_provider_module.time, "time", lambda: claims["exp"] + 1)
+    # Past exp the cache entry is dropped and PyJWT rejects the token
+    monkeypatch.setattr(jwt_provider_module.jwt, "decode", lambda *a, **k: (_ for _ in ()).throw(jwt_provider_module.jwt.ExpiredSignatureError()))
+    assert provider.decode_token(token) is None
+    assert provider.cache_stats()["size"] == 0
+
+
+def test_cache_is_bounded_lru():
+    provider = JWTProvider(cache_size=2)
+    tokens = [token_for(provider, f"user{i}@example.com") for i in range(3)]
+    for token in tokens:
+        provider.decode_token(token)
+    assert provider.cache_stats()["size"] == 2
+    provider.decode_token(tokens[0])
+    assert provider.cache_stats()["hits"] == 0
+
+
+def test_invalid_tokens_are_not_cached():
+    provider = JWTProvider()
+    assert provider.decode_token("not.a.token") is None
+    assert provider.decode_token(token_for(provider) + "x") is None
+    assert provider.cache_stats()["size"] == 0
+
+
+def test_provider_is_shared_process_wide():
+    from api.handlers import auth_handlers
+    assert get_jwt_provider() is get_jwt_provider()
+    assert auth_handlers.jwt_provider is get_jwt_provider()
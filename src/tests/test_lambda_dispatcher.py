@@ -0,0 +1,185 @@
+import json
+import pytest
+from mangum import Mangum
+
+from api.routes.api_routes import routes
+from api.routes.dispatcher import ApiGatewayDispatcher
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from main import app
+
+dispatcher = ApiGatewayDispatcher(routes, base_path="v1", allowed_origin="https://app.example.com")
+mangum = Mangum(app, lifespan="off")
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase()
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+def api_event(method, path, body=None, token=None, headers=None, query=None):
+    """A REST API (payload v1) proxy event as API Gateway sends it."""
+    event_headers = {"Host": "api.example.com", "Content-Type": "application/json"}
+    if token:
+        event_headers["Authorization"] = f"Bearer {token}"
+    event_headers.update(headers or {})
+    return {
+        "resource": "/{proxy+}",
+        "path": path,
+        "httpMethod": method,
+        "headers": event_headers,
+        "multiValueHeaders": {k: [v] for k, v in event_headers.items()},
+        "queryStringParameters": query,
+        "multiValueQueryStringParameters": {k: [v] for k, v in query.items()} if query else None,
+        "pathParameters": {"proxy": path.lstrip("/")},
+        "requestContext": {"stage": "dev", "httpMethod": method, "path": "/dev" + path, "requestId": "test"},
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+def call(handler, *args, **kwargs):
+    response = handler(api_event(*args, **kwargs), {})
+    return response["statusCode"], json.loads(response["body"]) if response["body"] else None, response["headers"]
+
+
+def register(handler=dispatcher, email="direct@example.com"):
+    return call(handler, "POST", "/auth/register", {"email": email, "password": "password123"})[1]["token"]
+
+
+def test_task_lifecycle_through_the_route_table(db):
+    token = register()
+    status, task, _ = call(dispatcher, "POST", "/tasks", {"title": "Direct"}, token=token)
+    assert status == 201 and task["title"] == "Direct"
+
+    status, tasks, _ = call(dispatcher, "GET", "/tasks", token=token)
+    assert status == 200 and [t["id"] for t in tasks] == [task["id"]]
+
+    status, updated, _ = call(dispatcher, "PUT", f"/tasks/{task['id']}", {"title": "Renamed"}, token=token)
+    assert status == 200 and updated["title"] == "Renamed"
+
+    status, body, _ = call(dispatcher, "DELETE", f"/tasks/{task['id']}/", token=token)
+    assert status == 204 and body is None
+    assert call(dispatcher, "GET", "/tasks", token=token)[1] == []
+
+
+def test_pagination_header_and_query_parameters(db):
+    token = register()
+    for i in range(3):
+        call(dispatcher, "POST", "/tasks", {"title": f"Task {i}"}, token=token)
+    status, page, headers = call(dispatcher, "GET", "/tasks", token=token, query={"limit": "2"})
+    assert status == 200 and len(page) == 2
+    assert "X-Next-Cursor" in headers
+
+
+def test_base_path_is_stripped(db):
+    token = register()
+    assert call(dispatcher, "GET", "/v1/tasks", token=token)[0] == 200
+
+
+def test_unknown_routes_and_methods(db):
+    assert call(dispatcher, "GET", "/nope")[0] == 404
+    status, _, headers = call(dispatcher, "PATCH", "/tasks")
+    assert status == 405 and headers["Allow"] == "GET, POST"
+
+
+def test_direct_and_mangum_paths_answer_the_same_status(db):
+    token = register(mangum)
+    requests = [
+        # A static path without the method goes on to /tasks/{taskId}, as in FastAPI
+        ("PUT", "/tasks/changes", {"title": "Changes"}),
+        ("DELETE", "/tasks/changes", None),
+        ("PATCH", "/tasks/changes", None),
+        ("POST", "/tasks:batch", {"tasks": [], "ordered": "yes"}),
+        ("DELETE", "/tasks:batch", {"tasks": []}),
+    ]
+    for method, path, body in requests:
+        assert call(dispatcher, method, path, body, token=token)[0] == call(mangum, method, path, body, token=token)[0]
+    assert call(dispatcher, "PUT", "/tasks/changes", {"title": "Changes"}, token=token)[0] == 404
+
+
+def test_handlers_get_the_bodies_main_passes_them(db):
+    from api.schemas.task_schemas import TaskCreateSchema, TaskUpdateSchema
+    direct = ApiGatewayDispatcher(routes)
+    bodies = []
+
+    async def capture(event, context):
+        bodies.append(event["body"])
+        return {"statusCode": 204, "headers": {}, "body": ""}
+    direct.static_routes["/tasks"]["POST"]["handler"] = capture
+    direct.dynamic_routes[0][1]["PUT"]["handler"] = capture
+    token = register(direct)
+    call(direct, "POST", "/tasks", {"title": "Full"}, token=token)
+    call(direct, "PUT", "/tasks/60d5ecf3a3b4b5b6c7d8e9f0", {"title": "Partial"}, token=token)
+    assert bodies == [TaskCreateSchema(title="Full").model_dump(),
+                      TaskUpdateSchema(title="Partial").model_dump(exclude_unset=True)]
+
+
+def test_only_requests_that_reach_a_handler_provision_the_indexes(db, monkeypatch):
+    from infrastructure.database import indexes
+    calls = []
+
+    async def provision():
+        calls.append(True)
+        return False
+    monkeypatch.setattr(indexes, "provision_indexes", provision)
+    fresh = ApiGatewayDispatcher(routes, allowed_origin="https://app.example.com")
+    call(fresh, "GET", "/nope")
+    call(fresh, "PATCH", "/tasks")
+    call(fresh, "GET", "/tasks")
+    call(fresh, "OPTIONS", "/tasks", headers={"Origin": "https://app.example.com", "Access-Control-Request-Method": "GET"})
+    assert calls == []
+    # Until provisioning succeeds, each request that reaches a handler tries again
+    call(fresh, "POST", "/auth/login", {"email": "a@example.com", "password": "x"})
+    call(fresh, "POST", "/auth/login", {"email": "a@example.com", "password": "x"})
+    assert len(calls) == 2
+
+
+def test_protected_routes_require_a_principal(db):
+    assert call(dispatcher, "GET", "/tasks")[0] == 401
+    assert call(dispatcher, "GET", "/tasks", token="forged")[0] == 401
+    assert db.commands == []
+
+
+def test_bodies_are_validated_with_the_route_schemas(db):
+    assert call(dispatcher, "POST", "/auth/register", {"email": "not-an-email", "password": "password123"})[0] == 422
+    assert call(dispatcher, "POST", "/auth/register", {"email": "a@example.com", "password": "short"})[0] == 422
+    token = register()
+    assert call(dispatcher, "POST", "/tasks", {"title": "ab"}, token=token)[0] == 422
+    event = api_event("POST", "/tasks", token=token)
+    event["body"] = "{not json"
+    assert dispatcher(event, {})["statusCode"] == 400
+
+
+def test_cors_headers_match_the_allowed_origin(db):
+    _, _, headers = call(dispatcher, "POST", "/auth/login", {"email": "a@example.com", "password": "x"},
+                         headers={"Origin": "https://app.example.com"})
+    assert headers["Access-Control-Allow-Origin"] == "https://app.example.com"
+    assert headers["Access-Control-Expose-Headers"] == "ETag, X-Next-Cursor, Server-Timing, X-Profile-Id, X-Profile-Status"
+
+    status, _, headers = call(dispatcher, "OPTIONS", "/tasks", headers={
+        "Origin": "https://app.example.com", "Access-Control-Request-Method": "GET"})
+    assert status == 204 and "GET" in headers["Access-Control-Allow-Methods"]
+
+
+def test_direct_and_mangum_paths_agree(db):
+    token = register(mangum)
+    for handler in (mangum, dispatcher):
+        call(handler, "POST", "/tasks", {"title": "Same"}, token=token)
+    direct = call(dispatcher, "GET", "/tasks", token=token)
+    via_fastapi = call(mangum, "GET", "/tasks", token=token)
+    assert direct[0] == via_fastapi[0] == 200
+    assert direct[1] == via_fastapi[1]
+
+
+def test_lazy_dispatcher_resolves_routes_on_first_use(db):
+    lazy = ApiGatewayDispatcher(routes, lazy=True)
+    get_route = lazy.static_routes["/tasks"]["GET"]
+    assert get_route["handler"] == "api.handlers.task_handlers:get_tasks"
+    token = register(lazy)
+    assert call(lazy, "GET", "/tasks", token=token)[0] == 200
+    assert callable(get_route["handler"])
+    assert isinstance(lazy.static_routes["/tasks"]["POST"]["schema"], str)
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+
+from infrastructure.database import indexes
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    database = InMemoryDatabase()
+    MongoConnection.use_database(database)
+    monkeypatch.setattr(indexes, "_provisioned", False)
+    asyncio.run(indexes.provision_indexes())
+    database.commands.clear()
+    yield database
+    MongoConnection.use_database(None)
+
+
+def register(email="count@example.com"):
+    return client.post("/auth/register", json={"email": email, "password": "password123"})
+
+
+def auth_headers(db):
+    token = register().json()["token"]
+    db.commands.clear()
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_register_is_a_single_insert(db):
+    response = register()
+    assert response.status_code == 201
+    assert db.commands == [("insert", "users")]
+
+
+def test_duplicate_register_is_detected_by_the_unique_index(db):
+    register()
+    db.commands.clear()
+    response = register()
+    assert response.status_code == 409
+    assert db.commands == [("insert", "users")]
+
+
+def test_login_is_a_single_find(db):
+    register()
+    db.commands.clear()
+    response = client.post("/auth/login", json={"email": "count@example.com", "password": "password123"})
+    assert response.status_code == 200
+    assert db.commands == [("find", "users")]
+
+
+# Every task write is followed by one update of the owner's list version (the ETag of GET /tasks)
+BUMP = ("update", "task_list_versions")
+
+
+def test_create_task_is_a_single_insert(db):
+    headers = auth_headers(db)
+    response = client.post("/tasks", headers=headers, json={"title": "Count me"})
+    assert response.status_code == 201
+    assert response.json()["id"] != "None"
+    assert db.commands == [("insert", "tasks"), BUMP]
+
+
+def test_list_tasks_is_a_version_read_and_a_single_find(db):
+    headers = auth_headers(db)
+    client.post("/tasks", headers=headers, json={"title": "Count me"})
+    db.commands.clear()
+    response = client.get("/tasks", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert db.commands == [("find", "task_list_versions"), ("find", "tasks")]
+
+
+def test_unchanged_list_is_a_single_version_read(db):
+    headers = auth_headers(db)
+    client.post("/tasks", headers=headers, json={"title": "Count me"})
+    etag = client.get("/tasks", headers=headers).headers["ETag"]
+    db.commands.clear()
+    response = client.get("/tasks", headers=dict(headers, **{"If-None-Match": etag}))
+    assert response.status_code == 304
+    assert db.commands == [("find", "task_list_versions")]
+
+
+def create_task(headers, db):
+    task_id = client.post("/tasks", headers=headers, json={"title": "Count me"}).json()["id"]
+    db.commands.clear()
+    return task_id
+
+
+def test_update_task_is_a_single_find_and_modify(db):
+    headers = auth_headers(db)
+    task_id = create_task(headers, db)
+    response = client.put(f"/tasks/{task_id}", headers=headers, json={"title": "Counted"})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Counted"
+    assert db.commands == [("findAndModify", "tasks"), BUMP]
+
+
+def test_delete_task_is_a_single_tombstone_update(db):
+    headers = auth_headers(db)
+    task_id = create_task(headers, db)
+    response = client.delete(f"/tasks/{task_id}", headers=headers)
+    assert response.status_code == 204
+    assert db.commands == [("update", "tasks"), BUMP]
+
+
+def test_foreign_task_is_forbidden_after_one_extra_lookup(db):
+    task_id = create_task(auth_headers(db), db)
+    token = register("intruder@example.com").json()["token"]
+    db.commands.clear()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.put(f"/tasks/{task_id}", headers=headers, json={"title": "Mine now"}).status_code == 403
+    assert client.delete(f"/tasks/{task_id}", headers=headers).status_code == 403
+    assert db.commands == [("findAndModify", "tasks"), ("find", "tasks"), ("update", "tasks"), ("find", "tasks")]
+
+
+def test_missing_task_is_not_found(db):
+    headers = auth_headers(db)
+    missing_id = "60d5ecf3a3b4b5b6c7d8e9f0"
+    assert client.put(f"/tasks/{missing_id}", headers=headers, json={"title": "Ghost"}).status_code == 404
+    assert client.delete(f"/tasks/{missing_id}", headers=headers).status_code == 404
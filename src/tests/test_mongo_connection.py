@@ -0,0 +1,163 @@
+import asyncio
+import pytest
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+
+from infrastructure.database import mongo_connection
+from infrastructure.database.mongo_connection import MongoConnection, pool_options
+from infrastructure.monitoring.mongo_commands import command_metrics
+from infrastructure.monitoring.mongo_pool import pool_metrics
+
+
+class FakeAdmin:
+    def __init__(self, client):
+        self.client = client
+
+    async def command(self, name):
+        assert name == "ping"
+        self.client.pings += 1
+        if self.client.fail:
+            raise ServerSelectionTimeoutError("no servers available")
+        return {"ok": 1}
+
+
+class FakeClient:
+    instances = []
+    fail = False
+
+    def __init__(self, uri, **kwargs):
+        self.kwargs = kwargs
+        self.pings = 0
+        self.closed = False
+        self.admin = FakeAdmin(self)
+        FakeClient.instances.append(self)
+
+    def __getitem__(self, name):
+        return {"name": name}
+
+    async def close(self):
+        self.closed = True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    FakeClient.instances = []
+    FakeClient.fail = False
+    monkeypatch.setattr(mongo_connection, "AsyncMongoClient", FakeClient)
+    monkeypatch.setattr(mongo_connection.time, "monotonic", clock)
+    monkeypatch.setenv("MONGO_HEALTH_TTL_SECONDS", "60")
+    monkeypatch.setenv("MONGO_CONNECT_BACKOFF_SECONDS", "1")
+    monkeypatch.setenv("MONGO_CONNECT_BACKOFF_MAX_SECONDS", "4")
+    MongoConnection.use_database(None)
+    yield clock
+    MongoConnection.use_database(None)
+
+
+def test_connects_and_pings_once_then_serves_the_cached_database(clock):
+    async def run():
+        for _ in range(5):
+            assert (await MongoConnection.get_db())["name"] == MongoConnection._db["name"]
+    asyncio.run(run())
+    assert len(FakeClient.instances) == 1
+    assert FakeClient.instances[0].pings == 1
+    assert MongoConnection.health()["healthy"]
+
+
+def test_expired_health_is_rechecked_in_the_background(clock):
+    async def run():
+        await MongoConnection.get_db()
+        clock.now += 61
+        assert not MongoConnection.health()["healthy"]
+        await MongoConnection.get_db()  # returns without waiting for the ping
+        await asyncio.sleep(0)
+        await MongoConnection.get_db()
+    asyncio.run(run())
+    assert FakeClient.instances[0].pings == 2
+    assert MongoConnection.health()["healthy"]
+
+
+def test_failed_connect_backs_off_exponentially(clock):
+    FakeClient.fail = True
+
+    def attempt():
+        with pytest.raises(ConnectionFailure):
+            asyncio.run(MongoConnection.get_db())
+
+    attempt()
+    assert len(FakeClient.instances) == 1 and FakeClient.instances[0].closed
+    attempt()  # within the 1 s backoff: fails without connecting
+    assert len(FakeClient.instances) == 1
+    assert MongoConnection.health()["retry_in_s"] == pytest.approx(1)
+
+    clock.now += 1
+    attempt()
+    assert len(FakeClient.instances) == 2
+    assert MongoConnection.health()["retry_in_s"] == pytest.approx(2)
+
+    clock.now += 2
+    attempt()
+    clock.now += 4
+    attempt()
+    assert MongoConnection.health()["retry_in_s"] == pytest.approx(4)  # capped
+
+    FakeClient.fail = False
+    clock.now += 4
+    asyncio.run(MongoConnection.get_db())
+    assert MongoConnection.health() == {"connected": True, "healthy": True, "consecutive_failures": 0,
+                                        "retry_in_s": 0.0, "last_error": None}
+
+
+def test_failed_health_check_keeps_the_client_and_backs_off(clock):
+    async def run():
+        db = await MongoConnection.get_db()
+        FakeClient.fail = True
+        clock.now += 61
+        await MongoConnection.get_db()
+        await asyncio.sleep(0)
+        # Requests in flight keep the client; new ones still get the database
+        assert not FakeClient.instances[0].closed
+        assert await MongoConnection.get_db() is db
+        assert MongoConnection.health()["connected"] and not MongoConnection.health()["healthy"]
+        # No new check until the backoff has elapsed
+        await asyncio.sleep(0)
+        assert FakeClient.instances[0].pings == 2
+
+        FakeClient.fail = False
+        clock.now += 1
+        await MongoConnection.get_db()
+        await asyncio.sleep(0)
+    asyncio.run(run())
+    assert len(FakeClient.instances) == 1 and FakeClient.instances[0].pings == 3
+    assert MongoConnection.health()["healthy"]
+
+
+def test_client_uses_the_pool_profile_and_metrics_listener(clock, monkeypatch):
+    monkeypatch.setenv("MONGO_POOL_PROFILE", "lambda")
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "3")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zlib")
+    asyncio.run(MongoConnection.get_db())
+    kwargs = FakeClient.instances[0].kwargs
+    assert kwargs["maxPoolSize"] == 3
+    assert kwargs["waitQueueTimeoutMS"] == 1000
+    assert kwargs["compressors"] == "zlib"
+    assert kwargs["event_listeners"] == [pool_metrics, command_metrics]
+
+
+def test_pool_profile_defaults_to_the_runtime(monkeypatch):
+    monkeypatch.delenv("MONGO_POOL_PROFILE", raising=False)
+    monkeypatch.delenv("MONGO_MAX_POOL_SIZE", raising=False)
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "api")
+    assert pool_options()["maxPoolSize"] == 10
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME")
+    assert pool_options()["maxPoolSize"] == 100
+    monkeypatch.setenv("MONGO_POOL_PROFILE", "huge")
+    with pytest.raises(ValueError):
+        pool_options()
@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from pymongo.errors import AutoReconnect
+
+from core.entities.task import Task
+from core.entities.user import User
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database import mongo_repositories
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.database.mongo_repositories import MongoTaskRepository, MongoUserRepository
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase()
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+def test_task_repository_round_trip(db):
+    repository = MongoTaskRepository()
+
+    async def scenario():
+        await repository.create_task(Task(title="Write docs", user_email="a@example.com"))
+        await repository.create_task(Task(title="Other user", user_email="b@example.com"))
+        return await repository.get_user_tasks("a@example.com")
+
+    tasks = asyncio.run(scenario())
+    assert [t.title for t in tasks] == ["Write docs"]
+    assert tasks[0].id is not None
+
+
+def test_user_repository_find_by_email(db):
+    repository = MongoUserRepository()
+
+    async def scenario():
+        await repository.register_user(User(email="a@example.com", password_hash="hash"))
+        return await repository.find_by_email("a@example.com"), await repository.find_by_email("missing@example.com")
+
+    found, missing = asyncio.run(scenario())
+    assert found.email == "a@example.com"
+    assert missing is None
+
+
+def test_concurrent_queries_overlap(db):
+    db.latency = 0.05
+    repository = MongoTaskRepository()
+
+    async def scenario():
+        return await asyncio.gather(*(repository.get_user_tasks("a@example.com") for _ in range(10)))
+
+    loop = asyncio.new_event_loop()
+    start = loop.time()
+    loop.run_until_complete(scenario())
+    elapsed = loop.time() - start
+    loop.close()
+    # Ten 50 ms queries must run concurrently rather than back to back
+    assert elapsed < 0.25
+
+
+def test_a_failed_list_version_bump_is_retried_without_failing_the_write(db, monkeypatch, caplog):
+    monkeypatch.setattr(mongo_repositories, "BUMP_RETRY_DELAY_S", 0)
+    repository = MongoTaskRepository()
+    versions = db.task_list_versions
+    update_one = versions.update_one
+    failures = []
+
+    async def flaky_update_one(*args, **kwargs):
+        if len(failures) < failing:
+            failures.append(True)
+            raise AutoReconnect("connection reset")
+        return await update_one(*args, **kwargs)
+    monkeypatch.setattr(versions, "update_one", flaky_update_one)
+
+    failing = 1
+    asyncio.run(repository.create_task(Task(title="Retried", user_email="a@example.com")))
+    assert asyncio.run(repository.get_list_version("a@example.com")) == 1
+
+    # Once every attempt failed the bump is given up, but the task is still created
+    failures.clear()
+    failing = mongo_repositories.BUMP_ATTEMPTS
+    task = asyncio.run(repository.create_task(Task(title="Kept", user_email="a@example.com")))
+    assert task.id is not None and len(failures) == mongo_repositories.BUMP_ATTEMPTS
+    assert [t.title for t in asyncio.run(repository.get_user_tasks("a@example.com"))] == ["Retried", "Kept"]
+    assert "Giving up on the task-list version bump" in caplog.text
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+from api.handlers import auth_handlers
+from core.exceptions.auth_errors import PasswordHashingUnavailableError
+from infrastructure.auth import password_hasher
+from infrastructure.auth.password_hasher import BcryptWorkerPool
+
+
+def slow_hashpw(password, salt):
+    time.sleep(0.1)
+    return b"$2b$hash"
+
+
+def test_hash_and_verify_round_trip():
+    pool = BcryptWorkerPool(max_workers=1, max_queue=0)
+
+    async def scenario():
+        hashed = await pool.hash_password("secret")
+        return await pool.verify_password("secret", hashed), await pool.verify_password("wrong", hashed)
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert pool.stats()["completed"] == 3
+
+
+def test_hashing_does_not_block_the_event_loop(monkeypatch):
+    monkeypatch.setattr(password_hasher, "hashpw", slow_hashpw)
+    pool = BcryptWorkerPool(max_workers=1, max_queue=0)
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(pool.hash_password("secret"), ticker())
+
+    asyncio.run(scenario())
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.09
+
+
+def test_saturated_pool_fails_fast(monkeypatch):
+    monkeypatch.setattr(password_hasher, "hashpw", slow_hashpw)
+    pool = BcryptWorkerPool(max_workers=1, max_queue=1)
+
+    async def scenario():
+        return await asyncio.gather(*(pool.hash_password("secret") for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert sum(isinstance(r, PasswordHashingUnavailableError) for r in results) == 1
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["queue_depth"] == 0
+    assert stats["wait_ms_max"] >= 50
+    # The queued call's wait lands above the 50 ms bucket of the wait histogram
+    assert pool.wait_histogram.snapshot()["count"] == 2
+    assert dict(pool.wait_histogram.buckets())[50] == 1
+
+
+def test_login_returns_503_when_pool_is_saturated(monkeypatch):
+    async def busy(*args):
+        raise PasswordHashingUnavailableError()
+
+    monkeypatch.setattr(auth_handlers.auth_service, "authenticate_user", busy)
+    response = asyncio.run(auth_handlers.login_user({"body": {"email": "a@example.com", "password": "secret"}}, {}))
+    assert response["statusCode"] == 503
+    assert response["headers"]["Retry-After"] == "1"
@@ -0,0 +1,55 @@
+import pytest
+from pymongo import monitoring
+
+from infrastructure.monitoring.histogram import Histogram
+from infrastructure.monitoring.mongo_pool import PoolMetrics
+
+ADDRESS = ("db.example.com", 27017)
+
+
+def test_histogram_percentiles_and_buckets():
+    histogram = Histogram(bounds=(1, 10, 100))
+    assert histogram.percentile(50) is None
+    for value in [0.5] * 50 + [5] * 40 + [50] * 9 + [500]:
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100 and snapshot["max"] == 500
+    assert snapshot["p50"] <= 1
+    assert 1 < snapshot["p90"] <= 10
+    assert 10 < snapshot["p99"] <= 100
+    assert histogram.buckets() == [(1, 50), (10, 90), (100, 99), (float("inf"), 100)]
+
+
+def test_pool_metrics_track_checkouts_waits_and_churn():
+    metrics = PoolMetrics()
+    for connection_id in (1, 2):
+        metrics.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, connection_id))
+        metrics.connection_ready(monitoring.ConnectionReadyEvent(ADDRESS, connection_id, 0.004))
+    metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1, 0.0001))
+    metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 2, 0.020))
+    assert metrics.snapshot()["checked_out"] == 2
+
+    metrics.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDRESS, 1))
+    metrics.connection_check_out_failed(monitoring.ConnectionCheckOutFailedEvent(ADDRESS, "timeout", 1.0))
+    metrics.connection_closed(monitoring.ConnectionClosedEvent(ADDRESS, 2, "error"))
+    metrics.pool_cleared(monitoring.PoolClearedEvent(ADDRESS))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["open"] == 1
+    assert snapshot["checked_out"] == 0
+    assert snapshot["max_checked_out"] == 2
+    assert snapshot["checkouts"] == 2
+    assert snapshot["checkout_failures"] == {"timeout": 1}
+    assert snapshot["created"] == 2 and snapshot["closed"] == {"error": 1}
+    assert snapshot["pools_cleared"] == 1
+    assert snapshot["checkout_wait_ms"]["count"] == 3
+    assert snapshot["checkout_wait_ms"]["max"] == pytest.approx(1000)
+    assert snapshot["connect_ms"]["p50"] == pytest.approx(4, rel=0.5)
+
+
+def test_closing_a_pool_forgets_its_connections():
+    metrics = PoolMetrics()
+    metrics.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, 1))
+    metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1, 0.0))
+    metrics.pool_closed(monitoring.PoolClosedEvent(ADDRESS))
+    assert metrics.snapshot()["open"] == metrics.snapshot()["checked_out"] == 0
@@ -0,0 +1,101 @@
+import json
+import os
+import pytest
+from fastapi.testclient import TestClient
+
+from api.routes.api_routes import routes
+from api.routes.dispatcher import ApiGatewayDispatcher
+from benchmarks.bench_request_metrics import measure_overhead
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.monitoring.histogram import Histogram
+from infrastructure.monitoring.mongo_commands import command_metrics
+from infrastructure.monitoring.prometheus import Exposition
+from infrastructure.monitoring.request_metrics import MetricsMiddleware, RequestMetrics
+from main import app
+from tests.test_lambda_dispatcher import call, register
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase(event_listeners=[command_metrics])
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+def test_middleware_labels_requests_with_the_route_template(db):
+    registry = RequestMetrics()
+    client = TestClient(MetricsMiddleware(app, registry=registry))
+    token = client.post("/auth/register", json={"email": "metrics@example.com", "password": "password123"}).json()["token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    task = client.post("/tasks", json={"title": "Counted"}, headers=auth).json()
+    client.put(f"/tasks/{task['id']}", json={"title": "Again"}, headers=auth)
+    client.put("/tasks/0123456789abcdef01234567", json={"title": "Missing"}, headers=auth)
+    client.get("/nowhere")
+
+    snapshot = registry.snapshot()
+    assert snapshot["responses"] == {
+        ("POST", "/auth/register", 201): 1,
+        ("POST", "/tasks", 201): 1,
+        ("PUT", "/tasks/{task_id}", 200): 1,
+        ("PUT", "/tasks/{task_id}", 404): 1,
+        ("GET", "unmatched", 404): 1,
+    }
+    assert snapshot["latency_ms"][("PUT", "/tasks/{task_id}")]["count"] == 2
+    assert snapshot["in_flight"] == {"POST": 0, "PUT": 0, "GET": 0}
+
+
+def test_metrics_endpoint_serves_the_prometheus_text_format(db):
+    client = TestClient(app)
+    token = client.post("/auth/register", json={"email": "scrape@example.com", "password": "password123"}).json()["token"]
+    client.get("/tasks", headers={"Authorization": f"Bearer {token}"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert 'http_requests_total{method="GET",route="/tasks",status="200"}' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/tasks",le="+Inf"}' in text
+    assert 'mongodb_command_duration_seconds_count{command="find",collection="tasks",method="MongoTaskRepository.get_user_tasks"}' in text
+    assert "# TYPE mongodb_pool_connections_open gauge" in text
+    assert 'jwt_cache_lookups_total{result="hit"}' in text
+    assert "# TYPE password_hasher_wait_seconds histogram" in text
+    assert 'password_hasher_wait_seconds_bucket{le="+Inf"}' in text
+
+
+def test_histogram_buckets_are_exported_in_seconds():
+    histogram = Histogram((1, 10))
+    for value in (0.5, 5, 50):
+        histogram.observe(value)
+    exposition = Exposition()
+    exposition.declare("latency_seconds", "histogram", "Latency.")
+    exposition.histogram("latency_seconds", histogram, {"route": "/a"})
+    assert exposition.render().splitlines()[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.001"} 1',
+        'latency_seconds_bucket{route="/a",le="0.01"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 0.0555',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_dispatcher_flushes_one_emf_line_per_invocation(db, capsys):
+    dispatcher = ApiGatewayDispatcher(routes, metrics="emf")
+    token = register(dispatcher)
+    capsys.readouterr()
+    call(dispatcher, "GET", "/tasks", token=token)
+
+    [line] = capsys.readouterr().out.splitlines()
+    record = json.loads(line)
+    assert record["Route"] == "/tasks" and record["Method"] == "GET" and record["StatusCode"] == 200
+    assert record["Requests"] == 1 and record["Errors"] == 0 and record["Latency"] > 0
+    [directive] = record["_aws"]["CloudWatchMetrics"]
+    assert directive["Dimensions"] == [["Route", "Method"]]
+    assert {metric["Name"] for metric in directive["Metrics"]} == {"Latency", "Requests", "Errors"}
+
+
+def test_middleware_overhead_is_within_budget():
+    budget_us = float(os.getenv("METRICS_OVERHEAD_BUDGET_US", 25))
+    assert measure_overhead(requests=5000, repeat=3) * 1e6 < budget_us
@@ -0,0 +1,87 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+
+from api.routes.api_routes import routes
+from api.routes.dispatcher import ApiGatewayDispatcher
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.monitoring.request_profiler import ProfilerMiddleware, RequestProfiler, sign_token
+from main import app
+from tests.test_lambda_dispatcher import api_event, register
+
+SECRET = "profiler-test-secret"
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase(latency=0.01)
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+def test_signed_tokens_are_verified():
+    profiler = RequestProfiler(secret=SECRET)
+    token = sign_token(SECRET, ttl=60, now=1000)
+    assert profiler.verify(token, now=1000)
+    assert not profiler.verify(token, now=1061)
+    assert not profiler.verify(token[:-1] + ("0" if token[-1] != "0" else "1"), now=1000)
+    assert not profiler.verify(sign_token(SECRET, ttl=3 * 24 * 3600, now=1000), now=1000)
+    assert not profiler.verify(sign_token("other", ttl=60, now=1000), now=1000)
+    assert not RequestProfiler(stages=("dev",)).verify(token, now=1000)
+
+
+def test_only_signed_requests_or_configured_stages_are_profiled(monkeypatch):
+    monkeypatch.delenv("STAGE", raising=False)
+    profiler = RequestProfiler(secret=SECRET, stages=("dev",))
+    headers = {"x-debug-profile": "1"}
+    assert profiler.requested({}.get, "dev") is None
+    assert profiler.requested(headers.get, "prod") is None
+    request = profiler.requested(dict(headers, **{"x-profile-mode": "sampling"}).get, "dev", "req/1")
+    assert (request.mode, request.output, request.request_id) == ("sampling", "store", "req_1")
+    assert profiler.requested({"x-debug-profile": sign_token(SECRET)}.get, "prod") is not None
+
+
+def test_profiling_is_not_installed_unless_configured(monkeypatch):
+    monkeypatch.delenv("PROFILER_SECRET", raising=False)
+    monkeypatch.delenv("PROFILE_STAGES", raising=False)
+    assert RequestProfiler.from_env() is None
+    assert ApiGatewayDispatcher(routes).profiler is None
+
+
+def test_dispatcher_returns_a_cprofile_report_in_the_body(db):
+    dispatcher = ApiGatewayDispatcher(routes, profiler=RequestProfiler(stages=("dev",)))
+    token = register(dispatcher)
+    event = api_event("GET", "/tasks", token=token, headers={"X-Debug-Profile": "1", "X-Profile-Output": "body"})
+    response = dispatcher(event, {})
+    assert response["statusCode"] == 200
+    assert response["headers"]["X-Profile-Status"] == "200" and response["headers"]["X-Profile-Id"] == "test"
+    assert "function calls" in response["body"] and "get_tasks" in response["body"]
+
+
+def test_dispatcher_stores_sampled_stacks_by_request_id(db, tmp_path):
+    dispatcher = ApiGatewayDispatcher(routes, profiler=RequestProfiler(stages=("dev",), directory=str(tmp_path)))
+    token = register(dispatcher)
+    event = api_event("GET", "/tasks", token=token, headers={"X-Debug-Profile": "1", "X-Profile-Mode": "sampling"})
+    response = dispatcher(event, {})
+    assert response["statusCode"] == 200 and response["headers"]["X-Profile-Id"] == "test"
+    folded = (tmp_path / "test.folded").read_text().splitlines()
+    assert folded and all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+
+
+def test_fastapi_middleware_profiles_signed_requests(db, tmp_path):
+    client = TestClient(ProfilerMiddleware(app, RequestProfiler(secret=SECRET, directory=str(tmp_path))))
+    token = client.post("/auth/register", json={"email": "profiled@example.com", "password": "password123"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}", "X-Debug-Profile": sign_token(SECRET), "X-Request-Id": "slow-get"}
+
+    response = client.get("/tasks", headers=dict(headers, **{"X-Profile-Output": "body"}))
+    assert response.status_code == 200 and response.headers["x-profile-status"] == "200"
+    assert "function calls" in response.text
+
+    response = client.get("/tasks", headers=headers)
+    assert response.json() == [] and response.headers["x-profile-id"] == "slow-get"
+    assert os.path.getsize(tmp_path / "slow-get.prof") > 0
+
+    unsigned = client.get("/tasks", headers=dict(headers, **{"X-Debug-Profile": "1"}))
+    assert "x-profile-id" not in unsigned.headers
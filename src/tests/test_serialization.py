@@ -0,0 +1,44 @@
+import json
+from datetime import datetime, timezone
+import pytest
+from bson import ObjectId
+
+from api.utils import serialization
+from api.utils.json_response import FastJSONResponse
+
+
+@pytest.fixture(params=["json", "orjson"])
+def backend(request):
+    if request.param == "orjson" and serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    previous = serialization.backend
+    serialization.use_backend(request.param)
+    yield request.param
+    serialization.use_backend(previous)
+
+
+def test_encodes_object_id_and_datetime(backend):
+    task_id = ObjectId()
+    when = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    encoded = serialization.dumps({"id": task_id, "updated_at": when, "title": "Café"})
+    assert json.loads(encoded) == {"id": str(task_id), "updated_at": "2024-05-01T12:30:00+00:00", "title": "Café"}
+
+
+def test_round_trip(backend):
+    data = [{"title": "a", "description": None, "completed": "to do"}]
+    assert serialization.loads(serialization.dumps_str(data)) == data
+
+
+def test_invalid_json_raises_json_decode_error(backend):
+    with pytest.raises(json.JSONDecodeError):
+        serialization.loads("{invalid")
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        serialization.use_backend("yaml")
+
+
+def test_response_class_passes_encoded_bodies_through():
+    assert FastJSONResponse(content=b'{"a":1}').body == b'{"a":1}'
+    assert json.loads(FastJSONResponse(content={"id": ObjectId("60d5ecf3a3b4b5b6c7d8e9f0")}).body) == {"id": "60d5ecf3a3b4b5b6c7d8e9f0"}
@@ -0,0 +1,70 @@
+import logging
+import re
+import pytest
+from fastapi.testclient import TestClient
+
+from api.routes.api_routes import routes
+from api.routes.dispatcher import ApiGatewayDispatcher
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.monitoring import server_timing
+from infrastructure.monitoring.server_timing import ServerTimingMiddleware, timed
+from main import app
+from tests.test_lambda_dispatcher import call, register
+
+dispatcher = ApiGatewayDispatcher(routes, allowed_origin="https://app.example.com", server_timing=True)
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase(latency=0.002)
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+def phases(header):
+    return {name: float(ms) for name, ms in re.findall(r"(\w+);dur=([\d.]+)", header)}
+
+
+def test_timed_is_a_no_op_outside_a_request():
+    with timed("db"):
+        pass
+    with server_timing.request() as timings:
+        with timed("db"):
+            with timed("db"):
+                pass
+        with timed("validation"):
+            pass
+    assert set(timings.phases) == {"db", "validation"}
+    assert timings.header(1.0).endswith("total;dur=1.00")
+
+
+def test_dispatcher_reports_the_phases_of_a_request(db, caplog):
+    token = register(dispatcher)
+    with caplog.at_level(logging.INFO, logger="infrastructure.monitoring.server_timing"):
+        status, _, headers = call(dispatcher, "POST", "/tasks", {"title": "Timed"}, token=token)
+    assert status == 201
+    timings = phases(headers["Server-Timing"])
+    assert set(timings) == {"auth", "db", "validation", "serialization", "total"}
+    assert timings["db"] >= 2 and timings["total"] >= timings["db"]
+    assert headers["Timing-Allow-Origin"] == "https://app.example.com"
+
+    record = caplog.records[-1]
+    assert record.getMessage().startswith("POST /tasks 201 in ")
+    assert record.method == "POST" and record.path == "/tasks" and record.status == 201
+    assert set(record.server_timing) == {"auth", "db", "validation", "serialization"}
+
+
+def test_dispatcher_without_server_timing_adds_no_header(db):
+    plain = ApiGatewayDispatcher(routes, server_timing=False)
+    assert "Server-Timing" not in call(plain, "GET", "/tasks", token=register(plain))[2]
+
+
+def test_fastapi_middleware_reports_the_phases_of_a_request(db):
+    client = TestClient(ServerTimingMiddleware(app, allowed_origin="*"))
+    token = client.post("/auth/register", json={"email": "timed@example.com", "password": "password123"}).json()["token"]
+    response = client.get("/tasks", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert {"auth", "db", "serialization", "total"} <= set(phases(response.headers["server-timing"]))
+    assert response.headers["timing-allow-origin"] == "*"
@@ -0,0 +1,72 @@
+import io
+import json
+import logging
+import pytest
+
+from infrastructure.monitoring import structured_logging
+from infrastructure.monitoring.structured_logging import JsonFormatter, SamplingFilter, parse_sample_rates
+
+
+@pytest.fixture
+def output():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    stream = io.StringIO()
+    yield stream
+    structured_logging.stop_logging()
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def lines(stream):
+    structured_logging.flush_logs()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_written_as_json_by_the_listener(output):
+    structured_logging.configure_logging("INFO", stream=output, sample_rates={}, force=True)
+    logger = logging.getLogger("tests.structured")
+    logger.info("Task %s updated", "abc", extra={"route": "/tasks/{task_id}"})
+    logger.debug("below the level %s", "x")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Failed for %s", "abc")
+
+    info, failure = lines(output)
+    assert info["level"] == "INFO" and info["logger"] == "tests.structured"
+    assert info["message"] == "Task abc updated" and info["route"] == "/tasks/{task_id}"
+    assert info["timestamp"].endswith("Z")
+    assert failure["message"] == "Failed for abc" and "ValueError: boom" in failure["exception"]
+
+
+def test_formatting_happens_off_the_calling_thread(output):
+    structured_logging.configure_logging("INFO", stream=output, sample_rates={}, force=True)
+    record = logging.LogRecord("tests", logging.INFO, __file__, 1, "value %s of %s", ("a", ["b"]), None)
+    prepared = structured_logging._queue_handler.prepare(record)
+    assert prepared.msg == "value %s of %s" and prepared.args == ("a", ["b"])
+
+
+def test_sampling_applies_to_info_lines_of_the_configured_loggers(monkeypatch):
+    sampling = SamplingFilter({"infrastructure.database": 0.0, "infrastructure.database.indexes": 1.0})
+    record = lambda name, level=logging.INFO: logging.LogRecord(name, level, __file__, 1, "line", (), None)
+    assert not sampling.filter(record("infrastructure.database.mongo_repositories"))
+    assert sampling.filter(record("infrastructure.database.mongo_repositories", logging.WARNING))
+    assert sampling.filter(record("infrastructure.database.indexes"))
+    assert sampling.filter(record("api.handlers.task_handlers"))
+
+    monkeypatch.setattr(structured_logging.random, "random", lambda: 0.3)
+    half = SamplingFilter({"api": 0.5})
+    assert half.filter(record("api.handlers")) and not SamplingFilter({"api": 0.2}).filter(record("api.handlers"))
+
+
+def test_sample_rates_are_read_from_the_environment_format():
+    assert parse_sample_rates("a.b=0.1, c=2,broken,d=x") == {"a.b": 0.1, "c": 1.0}
+    assert parse_sample_rates(None) == {}
+
+
+def test_formatter_keeps_unserializable_extras_readable():
+    record = logging.LogRecord("tests", logging.INFO, __file__, 1, "done", (), None)
+    record.payload = object()
+    assert json.loads(JsonFormatter().format(record))["payload"].startswith("<object object")
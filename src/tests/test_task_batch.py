@@ -0,0 +1,164 @@
+import asyncio
+import json
+
+import pytest
+
+from api.handlers import task_handlers
+from core.entities.task import Task
+from core.exceptions.task_errors import BatchTooLargeError
+from core.services.task_service import TaskService
+from infrastructure.cache.cached_task_repository import CachedTaskRepository
+from infrastructure.cache.task_list_cache import LocalTaskListCache
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.database.mongo_repositories import MongoTaskRepository
+
+USER = "batch@example.com"
+OTHER = "other@example.com"
+BUMP = ("update", "task_list_versions")
+MISSING = "60d5ecf3a3b4b5b6c7d8e9f0"
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase()
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+@pytest.fixture
+def service():
+    return TaskService(MongoTaskRepository(), max_batch_size=8)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def create(count, user_email=USER):
+    repository = MongoTaskRepository()
+
+    async def insert():
+        return [await repository.create_task(Task(title=f"Task {i}", user_email=user_email)) for i in range(count)]
+    return run(insert())
+
+
+def statuses(results):
+    return [result.status for result in results]
+
+
+def titles(user_email=USER):
+    return [task.title for task in run(MongoTaskRepository().get_user_tasks(user_email))]
+
+
+def test_create_validates_every_item_and_inserts_the_rest_at_once(db, service):
+    results = run(service.create_tasks(USER, [{"title": "A"}, {"description": "No title"}, "nope", {"title": "B", "user_email": OTHER}]))
+    assert statuses(results) == [201, 400, 400, 201]
+    assert results[3].task.user_email == USER and results[0].id == results[0].task.id
+    assert db.commands == [("insert", "tasks"), BUMP]
+    assert titles() == ["A", "B"]
+
+
+def test_ordered_create_stops_at_the_first_invalid_item(db, service):
+    results = run(service.create_tasks(USER, [{"title": "A"}, {}, {"title": "C"}], ordered=True))
+    assert statuses(results) == [201, 400, 424]
+    assert titles() == ["A"]
+
+
+def test_failed_inserts_are_reported_per_item(db, service):
+    run(db.tasks.create_index([("title", 1)], unique=True))
+    create(1)
+    results = run(service.create_tasks(USER, [{"title": "Task 0"}, {"title": "New"}]))
+    assert statuses(results) == [500, 201]
+
+    results = run(service.create_tasks(USER, [{"title": "Other"}, {"title": "Task 0"}, {"title": "Last"}], ordered=True))
+    assert statuses(results) == [201, 500, 424]
+    assert titles() == ["Task 0", "New", "Other"]
+
+
+def test_update_checks_ownership_and_writes_once(db, service):
+    first, second = create(2)
+    theirs = create(1, user_email=OTHER)[0]
+    db.commands.clear()
+    results = run(service.update_tasks(USER, [
+        {"id": first.id, "title": "Renamed"},
+        {"id": theirs.id, "title": "Stolen"},
+        {"id": MISSING, "title": "Ghost"},
+        {"id": "not-an-id", "title": "Ghost"},
+        {"title": "No id"},
+        {"id": second.id, "completed": "not a status"},
+        {"id": first.id, "completed": "finished"},
+    ]))
+    assert statuses(results) == [200, 403, 404, 404, 400, 400, 200]
+    # Updates to the same task apply in order, and each result is the task after it
+    assert results[0].task.title == "Renamed" and results[0].task.completed == "to do"
+    assert results[6].task.title == "Renamed" and results[6].task.completed == "finished"
+    assert db.commands == [("find", "tasks"), ("update", "tasks"), BUMP]
+    assert titles() == ["Renamed", "Task 1"] and titles(OTHER) == ["Task 0"]
+
+
+def test_ordered_update_applies_nothing_after_a_failure(db, service):
+    first, second = create(2)
+    results = run(service.update_tasks(USER, [{"id": first.id, "title": "A"}, {"id": MISSING}, {"id": second.id, "title": "B"}], ordered=True))
+    assert statuses(results) == [200, 404, 424]
+    assert titles() == ["A", "Task 1"]
+
+
+def test_delete_leaves_tombstones_and_reports_each_id(db, service):
+    first, second = create(2)
+    theirs = create(1, user_email=OTHER)[0]
+    db.commands.clear()
+    results = run(service.delete_tasks(USER, [first.id, theirs.id, first.id, 7, second.id]))
+    assert statuses(results) == [204, 403, 404, 400, 204]
+    assert db.commands == [("find", "tasks"), ("update", "tasks"), BUMP]
+    assert titles() == [] and titles(OTHER) == ["Task 0"]
+    assert run(db.tasks.count_documents({"deleted": True})) == 2
+
+
+def test_nothing_to_write_issues_no_write(db, service):
+    results = run(service.delete_tasks(USER, [MISSING]))
+    assert statuses(results) == [404]
+    assert db.commands == [("find", "tasks")]
+
+
+def test_batches_over_the_limit_are_rejected(db, service):
+    with pytest.raises(BatchTooLargeError):
+        run(service.create_tasks(USER, [{"title": "A"}] * 9))
+    assert db.commands == []
+
+
+def test_batch_writes_refresh_the_cached_list(db):
+    repository = CachedTaskRepository(MongoTaskRepository(), LocalTaskListCache())
+    service = TaskService(repository)
+    first = create(1)[0]
+    run(repository.get_user_tasks(USER))
+    run(service.create_tasks(USER, [{"title": "New"}]))
+    run(service.update_tasks(USER, [{"id": first.id, "title": "Renamed"}]))
+    assert [task.title for task in run(repository.get_user_tasks(USER))] == ["Renamed", "New"]
+    run(service.delete_tasks(USER, [first.id]))
+    assert [task.title for task in run(repository.get_user_tasks(USER))] == ["New"]
+
+
+def batch(handler, body):
+    event = {"body": json.dumps(body), "requestContext": {"authorizer": {"email": USER}}}
+    response = run(handler(event, None))
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_batch_handlers(db, monkeypatch):
+    status, body = batch(task_handlers.create_tasks_batch, {"tasks": [{"title": "A"}, {}]})
+    assert status == 200 and [result["status"] for result in body["results"]] == [201, 400]
+    created = body["results"][0]
+    assert created["task"]["title"] == "A" and "user_email" not in created["task"]
+
+    status, body = batch(task_handlers.update_tasks_batch, {"tasks": [{"id": created["id"], "completed": "finished"}], "ordered": True})
+    assert status == 200 and body["results"][0]["task"]["completed"] == "finished"
+
+    status, body = batch(task_handlers.delete_tasks_batch, {"ids": [created["id"]]})
+    assert status == 200 and body["results"] == [{"index": 0, "status": 204, "id": created["id"], "task": None, "error": None}]
+
+    assert batch(task_handlers.delete_tasks_batch, {"tasks": []})[0] == 400
+    assert batch(task_handlers.create_tasks_batch, {"tasks": [], "ordered": "yes"})[0] == 400
+    monkeypatch.setattr(task_handlers.task_service, "max_batch_size", 1)
+    assert batch(task_handlers.create_tasks_batch, {"tasks": [{"title": "A"}, {"title": "B"}]})[0] == 413
@@ -1,14 +1,114 @@
 # src/tests/test_task_handlers.py
+import asyncio
+import json
 import pytest
-from unittest.mock import patch
-from api.handlers.task_handlers import create_task_handler
-
-@patch("core.services.task_service.TaskService")
-def test_create_task_success(mock_service):
-    mock_service.return_value.create_task.return_value = {"id": "123"}
-    event = {
-        "body": json.dumps({"title": "Test"}),
-        "headers": {"Authorization": "Bearer valid_token"}
-    }
-    response = create_task_handler(event, None)
-    assert response["statusCode"] == 201
\ No newline at end of file
+
+from api.handlers import task_handlers
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+
+USER_EMAIL = "owner@example.com"
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase()
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+def event(body=None, task_id=None, email=USER_EMAIL):
+    event = {"body": json.dumps(body) if body is not None else None}
+    if email:
+        event["requestContext"] = {"authorizer": {"email": email}}
+    if task_id:
+        event["pathParameters"] = {"taskId": task_id}
+    return event
+
+
+def call(handler, event):
+    response = asyncio.run(handler(event, None))
+    return response["statusCode"], json.loads(response["body"]) if response["body"] else None
+
+
+def test_create_task_success(db):
+    status, task = call(task_handlers.create_task, event({"title": "Test", "description": "Details"}))
+    assert status == 201
+    assert task["title"] == "Test" and task["completed"] == "to do"
+    assert "user_email" not in task
+
+
+def test_create_task_requires_a_principal(db):
+    assert call(task_handlers.create_task, event({"title": "Test"}, email=None))[0] == 401
+
+
+def test_create_task_rejects_invalid_bodies(db):
+    assert call(task_handlers.create_task, event({"description": "No title"}))[0] == 400
+    assert call(task_handlers.create_task, dict(event(), body="{not json"))[0] == 400
+    assert call(task_handlers.create_task, event())[0] == 400
+
+
+def test_update_and_delete_only_touch_the_callers_tasks(db):
+    _, task = call(task_handlers.create_task, event({"title": "Mine"}))
+    assert call(task_handlers.update_task, event({"title": "Theirs"}, task["id"], email="other@example.com"))[0] == 403
+
+    status, updated = call(task_handlers.update_task, event({"completed": "finished"}, task["id"]))
+    assert status == 200 and updated["completed"] == "finished" and updated["title"] == "Mine"
+
+    assert call(task_handlers.delete_task, event(task_id=task["id"], email="other@example.com"))[0] == 403
+    assert call(task_handlers.delete_task, event(task_id=task["id"]))[0] == 204
+    assert call(task_handlers.get_tasks, event())[1] == []
+
+
+def test_unchanged_task_list_is_not_modified(db):
+    call(task_handlers.create_task, event({"title": "Cached"}))
+    first = asyncio.run(task_handlers.get_tasks(event(), None))
+    etag = first["headers"]["ETag"]
+    conditional = dict(event(), headers={"if-none-match": f'W/{etag}, "other"'})
+
+    response = asyncio.run(task_handlers.get_tasks(conditional, None))
+    assert response["statusCode"] == 304 and response["body"] == "" and response["headers"]["ETag"] == etag
+
+    call(task_handlers.create_task, event({"title": "Changed"}))
+    response = asyncio.run(task_handlers.get_tasks(conditional, None))
+    assert response["statusCode"] == 200 and response["headers"]["ETag"] != etag
+    # Another page of the same list is a different representation
+    paged = dict(conditional, queryStringParameters={"limit": "1"})
+    assert asyncio.run(task_handlers.get_tasks(paged, None))["statusCode"] == 200
+
+
+def test_update_returns_the_etag_of_the_task(db):
+    _, task = call(task_handlers.create_task, event({"title": "Tagged"}))
+    first = asyncio.run(task_handlers.update_task(event({"title": "Tagged"}, task["id"]), None))
+    again = asyncio.run(task_handlers.update_task(event({"title": "Tagged"}, task["id"]), None))
+    renamed = asyncio.run(task_handlers.update_task(event({"title": "Renamed"}, task["id"]), None))
+    assert first["headers"]["ETag"] == again["headers"]["ETag"] != renamed["headers"]["ETag"]
+
+
+def test_instances_with_their_own_cache_agree_on_the_etag(db, monkeypatch):
+    from core.services.task_service import TaskService
+    from infrastructure.cache.cached_task_repository import CachedTaskRepository
+    from infrastructure.cache.task_list_cache import LocalTaskListCache
+    from infrastructure.database.mongo_repositories import MongoTaskRepository
+
+    # Two Lambda containers, each with the default local cache, over one database
+    instances = [TaskService(CachedTaskRepository(MongoTaskRepository(), LocalTaskListCache())) for _ in range(2)]
+
+    def on(instance, handler, request):
+        monkeypatch.setattr(task_handlers, "task_service", instances[instance])
+        return asyncio.run(handler(request, None))
+
+    on(0, task_handlers.create_task, event({"title": "Seed"}))
+    for instance in (0, 1):
+        on(instance, task_handlers.get_tasks, event())
+    on(0, task_handlers.create_task, event({"title": "First"}))
+    seen = on(0, task_handlers.get_tasks, event())
+    on(1, task_handlers.create_task, event({"title": "Second"}))
+
+    conditional = dict(event(), headers={"If-None-Match": seen["headers"]["ETag"]})
+    responses = [on(instance, task_handlers.get_tasks, conditional) for instance in (0, 1)]
+    assert [response["statusCode"] for response in responses] == [200, 200]
+    assert responses[0]["headers"]["ETag"] == responses[1]["headers"]["ETag"]
+    assert responses[0]["body"] == responses[1]["body"]
+    assert [task["title"] for task in json.loads(responses[0]["body"])] == ["Seed", "First", "Second"]
@@ -0,0 +1,191 @@
+import asyncio
+import sys
+import pytest
+
+from core.entities.task import Task
+from core.repositories.task_list_cache import TaskListEntry
+from core.services.task_service import TaskService
+from infrastructure.cache.cached_task_repository import CachedTaskRepository
+from infrastructure.cache.task_list_cache import (InMemoryKeyValueStore, LocalTaskListCache, SharedTaskListCache,
+                                                 task_list_cache_from_env)
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.database.mongo_repositories import MongoTaskRepository
+
+USER = "a@example.com"
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase()
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+@pytest.fixture(params=["local", "shared"])
+def repository(request, db):
+    cache = LocalTaskListCache() if request.param == "local" else SharedTaskListCache(InMemoryKeyValueStore())
+    return CachedTaskRepository(MongoTaskRepository(), cache, max_tasks=5)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def seed(repository, count, user_email=USER):
+    async def create():
+        return [await repository.create_task(Task(title=f"Task {i}", user_email=user_email)) for i in range(count)]
+    return run(create())
+
+
+def titles(tasks):
+    return [task.title for task in tasks]
+
+
+def test_second_read_is_served_from_the_cache(repository, db):
+    seed(MongoTaskRepository(), 3)
+    db.commands.clear()
+    assert titles(run(repository.get_user_tasks(USER))) == ["Task 0", "Task 1", "Task 2"]
+    assert titles(run(repository.get_user_tasks(USER))) == ["Task 0", "Task 1", "Task 2"]
+    assert db.commands == [("find", "task_list_versions"), ("find", "tasks")]
+    assert repository.cache_stats()["hits"] == 1
+    assert repository.cache_stats()["misses"] == 1
+
+
+def test_pages_match_the_uncached_repository(repository, db):
+    seed(MongoTaskRepository(), 5)
+    cached, uncached = TaskService(repository), TaskService(MongoTaskRepository())
+    cursor = None
+    while True:
+        page = run(cached.get_user_tasks(USER, limit=2, cursor=cursor))
+        expected = run(uncached.get_user_tasks(USER, limit=2, cursor=cursor))
+        assert page == expected
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+
+def test_writes_patch_the_cached_list(db):
+    repository = CachedTaskRepository(MongoTaskRepository(), LocalTaskListCache(), max_tasks=5)
+    first, second = seed(repository, 2)
+    run(repository.get_user_tasks(USER))
+    db.commands.clear()
+
+    created = run(repository.create_task(Task(title="Created", user_email=USER)))
+    run(repository.update_user_task(first.id, USER, {"title": "Renamed"}))
+    assert run(repository.delete_user_task(second.id, USER))
+    # A write by someone else leaves the list alone
+    assert run(repository.update_user_task(first.id, "other@example.com", {"title": "Stolen"})) is None
+
+    assert titles(run(repository.get_user_tasks(USER))) == ["Renamed", "Created"]
+    assert ("find", "tasks") not in db.commands
+    assert titles(run(MongoTaskRepository().get_user_tasks(USER))) == ["Renamed", "Created"]
+    assert run(repository.get_user_tasks(USER))[-1].id == created.id
+
+
+def test_writes_drop_the_entry_of_a_shared_cache(db):
+    cache = SharedTaskListCache(InMemoryKeyValueStore())
+    repository = CachedTaskRepository(MongoTaskRepository(), cache)
+    task = seed(repository, 1)[0]
+    run(repository.get_user_tasks(USER))
+    run(repository.update_user_task(task.id, USER, {"title": "Renamed"}))
+    assert run(cache.get(USER)) is None
+    assert titles(run(repository.get_user_tasks(USER))) == ["Renamed"]
+
+
+def test_users_with_too_many_tasks_read_through(repository, db):
+    seed(MongoTaskRepository(), 7)
+    assert titles(run(repository.get_user_tasks(USER, limit=3))) == ["Task 0", "Task 1", "Task 2"]
+    db.commands.clear()
+    assert len(run(repository.get_user_tasks(USER))) == 7
+    assert db.commands == [("find", "tasks")]
+    assert repository.cache_stats()["bypassed"] == 2
+
+    for task in run(repository.get_user_tasks(USER))[:3]:
+        run(repository.delete_user_task(task.id, USER))
+    # Now under the limit, the list is cached again
+    run(repository.get_user_tasks(USER))
+    db.commands.clear()
+    assert len(run(repository.get_user_tasks(USER))) == 4
+    assert db.commands == []
+
+
+class SlowReads(MongoTaskRepository):
+    """Answers list reads late, with the tasks as they were when the read started."""
+
+    async def get_user_tasks(self, *args, **kwargs):
+        tasks = await super().get_user_tasks(*args, **kwargs)
+        await asyncio.sleep(0.01)
+        return tasks
+
+
+def test_a_list_loaded_during_a_write_is_not_cached(db):
+    repository = CachedTaskRepository(SlowReads(), LocalTaskListCache())
+    task = seed(repository, 1)[0]
+
+    async def race():
+        read = asyncio.ensure_future(repository.get_user_tasks(USER))
+        await asyncio.sleep(0.001)
+        await repository.update_user_task(task.id, USER, {"title": "Renamed"})
+        assert titles(await read) == ["Task 0"]
+    run(race())
+    assert titles(run(repository.get_user_tasks(USER))) == ["Renamed"]
+
+
+def test_local_cache_evicts_the_least_recently_used_and_expired_users():
+    cache = LocalTaskListCache(max_users=2, ttl_s=60)
+    for user in ("a", "b", "c"):
+        run(cache.set(user, TaskListEntry([])))
+    assert run(cache.get("a")) is None and len(cache) == 2
+
+    expiring = LocalTaskListCache(ttl_s=0)
+    run(expiring.set("a", TaskListEntry([])))
+    assert run(expiring.get("a")) is None
+
+
+def test_a_write_elsewhere_is_seen_by_reads_passing_the_list_version(repository, db):
+    seed(repository, 2)
+    run(repository.get_user_tasks(USER))
+    # Another instance writes straight to the database; this cache is not told
+    seed(MongoTaskRepository(), 1)
+    assert len(run(repository.get_user_tasks(USER))) == 2
+    version = run(repository.get_list_version(USER))
+    assert len(run(repository.get_user_tasks(USER, version=version))) == 3
+
+
+def test_writes_through_a_local_cache_keep_its_version_current(db):
+    repository = CachedTaskRepository(MongoTaskRepository(), LocalTaskListCache())
+    seed(repository, 2)
+    run(repository.get_user_tasks(USER))
+    run(repository.create_task(Task(title="Here", user_email=USER)))
+    db.commands.clear()
+    version = run(repository.get_list_version(USER))
+    assert len(run(repository.get_user_tasks(USER, version=version))) == 3
+    assert db.commands == [("find", "task_list_versions")]
+
+
+def test_concurrent_writers_on_a_shared_cache_lose_no_update(db):
+    cache = SharedTaskListCache(InMemoryKeyValueStore(latency=0.005))
+    first, second = (CachedTaskRepository(MongoTaskRepository(), cache) for _ in range(2))
+    seed(MongoTaskRepository(), 1)
+    run(first.get_user_tasks(USER))
+
+    async def write():
+        await asyncio.gather(first.create_task(Task(title="A", user_email=USER)),
+                             second.create_task(Task(title="B", user_email=USER)))
+    run(write())
+    # Neither writer left its own view of the list behind for the other instances
+    assert run(cache.get(USER)) is None
+    for repository in (first, second):
+        version = run(repository.get_list_version(USER))
+        assert titles(run(repository.get_user_tasks(USER, version=version))) == ["Task 0", "A", "B"]
+
+
+def test_the_shared_backend_fails_at_startup_without_redis(monkeypatch):
+    monkeypatch.setenv("TASK_CACHE", "shared")
+    monkeypatch.setenv("TASK_CACHE_URL", "redis://localhost:6379/0")
+    monkeypatch.setitem(sys.modules, "redis", None)
+    monkeypatch.setitem(sys.modules, "redis.asyncio", None)
+    with pytest.raises(RuntimeError, match="redis package"):
+        task_list_cache_from_env()
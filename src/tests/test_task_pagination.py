@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+
+from core.entities.task import Task
+from core.exceptions.task_errors import InvalidCursorError
+from core.services.task_service import TaskService
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.database.mongo_repositories import MongoTaskRepository
+from api.handlers import task_handlers
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase()
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+def seed(count, user_email="a@example.com"):
+    repository = MongoTaskRepository()
+
+    async def create():
+        for i in range(count):
+            await repository.create_task(Task(title=f"Task {i}", user_email=user_email))
+    asyncio.run(create())
+
+
+def test_pages_cover_every_task_once(db):
+    seed(5)
+    seed(3, user_email="other@example.com")
+    service = TaskService(MongoTaskRepository())
+    titles, cursor, pages = [], None, 0
+    while True:
+        page = asyncio.run(service.get_user_tasks("a@example.com", limit=2, cursor=cursor))
+        titles.extend(t.title for t in page.items)
+        pages += 1
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert titles == [f"Task {i}" for i in range(5)]
+    assert pages == 3
+
+
+def test_page_query_is_bounded_by_limit(db):
+    seed(10)
+    service = TaskService(MongoTaskRepository())
+    page = asyncio.run(service.get_user_tasks("a@example.com", limit=3))
+    assert len(page.items) == 3
+    assert page.next_cursor is not None
+
+
+def test_invalid_cursor_is_rejected(db):
+    service = TaskService(MongoTaskRepository())
+    with pytest.raises(InvalidCursorError):
+        asyncio.run(service.get_user_tasks("a@example.com", cursor="not-a-cursor"))
+
+
+def test_get_tasks_handler_returns_next_cursor_header(db):
+    seed(3)
+    event = {
+        "requestContext": {"authorizer": {"email": "a@example.com"}},
+        "queryStringParameters": {"limit": "2"},
+    }
+    response = asyncio.run(task_handlers.get_tasks(event, {}))
+    assert response["statusCode"] == 200
+    assert "X-Next-Cursor" in response["headers"]
+
+    event["queryStringParameters"]["cursor"] = response["headers"]["X-Next-Cursor"]
+    response = asyncio.run(task_handlers.get_tasks(event, {}))
+    assert response["statusCode"] == 200
+    assert "X-Next-Cursor" not in response["headers"]
+
+    event["queryStringParameters"]["limit"] = "zero"
+    assert asyncio.run(task_handlers.get_tasks(event, {}))["statusCode"] == 400
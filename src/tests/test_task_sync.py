@@ -0,0 +1,164 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api.handlers import task_handlers
+from core.entities.task import Task
+from core.exceptions.task_errors import InvalidSyncTokenError, SyncTokenExpiredError
+from core.entities.task import TOMBSTONE_RETENTION
+from core.services.task_service import TaskService, _encode_sync_token
+from infrastructure.database import indexes, mongo_repositories
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.database.mongo_repositories import MongoTaskRepository
+
+USER = "sync@example.com"
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase()
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+@pytest.fixture
+def service():
+    return TaskService(MongoTaskRepository())
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def create(count, user_email=USER):
+    repository = MongoTaskRepository()
+
+    async def insert():
+        return [await repository.create_task(Task(title=f"Task {i}", user_email=user_email)) for i in range(count)]
+    return run(insert())
+
+
+def sync(service, since=None, limit=100, now=None):
+    """Follows has_more to the end and returns (tasks, deleted, token)."""
+    tasks, deleted = [], []
+    while True:
+        changes = run(service.get_user_changes(USER, since=since, limit=limit, now=now))
+        tasks.extend(changes.tasks)
+        deleted.extend(changes.deleted)
+        since = changes.sync_token
+        if not changes.has_more:
+            return tasks, deleted, since
+
+
+def later(seconds=3):
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+def test_initial_sync_pages_through_every_live_task(db, service):
+    created = create(5)
+    create(2, user_email="other@example.com")
+    run(MongoTaskRepository().delete_user_task(created[0].id, USER))
+    tasks, deleted, _ = sync(service, limit=2)
+    assert [task.title for task in tasks] == ["Task 1", "Task 2", "Task 3", "Task 4"]
+    assert deleted == []
+
+
+def test_initial_sync_includes_tasks_written_before_updated_at(db, service):
+    run(db.tasks.insert_one({"title": "Legacy", "description": "", "completed": "to do", "user_email": USER}))
+    create(1)
+    tasks, deleted, token = sync(service, limit=1)
+    assert [task.title for task in tasks] == ["Legacy", "Task 0"] and deleted == []
+    # Deltas only list writes made since, which all set updated_at
+    assert "Legacy" not in [task.title for task in sync(service, since=token)[0]]
+
+
+def test_delta_lists_only_changes_and_tombstones(db, service, monkeypatch):
+    # Written before the overlap window of the initial sync, so not listed again
+    monkeypatch.setattr(mongo_repositories, "_now", lambda: datetime.now(timezone.utc) - timedelta(seconds=10))
+    first, second, third = create(3)
+    monkeypatch.undo()
+    _, _, token = sync(service)
+
+    repository = MongoTaskRepository()
+    run(repository.update_user_task(first.id, USER, {"title": "Renamed"}))
+    run(repository.delete_user_task(second.id, USER))
+    run(repository.create_task(Task(title="New", user_email=USER)))
+    db.commands.clear()
+
+    tasks, deleted, token = sync(service, since=token)
+    assert [task.title for task in tasks] == ["Renamed", "New"]
+    assert deleted == [second.id]
+    assert db.commands == [("find", "tasks")]
+
+    # Changes within the overlap window are listed again, once the window has passed they are not
+    tasks, deleted, token = sync(service, since=token, now=later())
+    assert [task.title for task in tasks] == ["Renamed", "New"] and deleted == [second.id]
+    tasks, deleted, _ = sync(service, since=token, now=later())
+    assert tasks == [] and deleted == []
+
+
+def test_changes_sharing_a_timestamp_are_paged_without_loss(db, service, monkeypatch):
+    _, _, token = sync(service)
+    stamp = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(seconds=1)
+    monkeypatch.setattr(mongo_repositories, "_now", lambda: stamp)
+    created = create(5)
+    tasks, _, _ = sync(service, since=token, limit=2, now=stamp + timedelta(seconds=1))
+    assert [task.id for task in tasks] == [task.id for task in created]
+
+
+def test_tombstones_are_invisible_to_reads_and_writes(db):
+    repository = MongoTaskRepository()
+    task = create(1)[0]
+    assert run(repository.delete_user_task(task.id, USER))
+    assert run(repository.get_task_by_id(task.id)) is None
+    assert run(repository.get_user_tasks(USER)) == []
+    assert run(repository.update_user_task(task.id, USER, {"title": "Back"})) is None
+    assert not run(repository.delete_user_task(task.id, USER))
+
+    tombstone = run(db.tasks.find_one({}))
+    assert tombstone["deleted"] and "title" not in tombstone
+    assert tombstone["expires_at"] - tombstone["updated_at"] == TOMBSTONE_RETENTION
+
+
+def test_the_service_sets_how_long_tombstones_are_kept(db):
+    task = create(1)[0]
+    service = TaskService(MongoTaskRepository(), tombstone_retention=timedelta(days=1))
+    run(service.delete_task(task.id, USER))
+    tombstone = run(db.tasks.find_one({}))
+    assert tombstone["expires_at"] - tombstone["updated_at"] == timedelta(days=1)
+    with pytest.raises(SyncTokenExpiredError):
+        run(service.get_user_changes(USER, since=_encode_sync_token(False, later(-2 * 86400), None)))
+
+
+def test_tombstones_expire_through_a_ttl_index(db):
+    run(indexes.ensure_indexes())
+    assert db.tasks.indexes["tombstone_ttl"]["expireAfterSeconds"] == 0
+    assert db.tasks.indexes["user_email_updated_at"]["key"][:2] == [("user_email", 1), ("updated_at", 1)]
+
+
+def test_old_and_malformed_tokens_are_rejected(db, service):
+    expired = _encode_sync_token(False, datetime.now(timezone.utc) - TOMBSTONE_RETENTION - timedelta(minutes=1), None)
+    with pytest.raises(SyncTokenExpiredError):
+        run(service.get_user_changes(USER, since=expired))
+    for token in ("not-a-token", _encode_sync_token(True, datetime.now(timezone.utc), None)):
+        with pytest.raises(InvalidSyncTokenError):
+            run(service.get_user_changes(USER, since=token))
+
+
+def test_changes_handler(db):
+    create(2)
+    event = {"requestContext": {"authorizer": {"email": USER}}, "queryStringParameters": {"limit": "1"}}
+    response = run(task_handlers.get_task_changes(event, None))
+    body = json.loads(response["body"])
+    assert response["statusCode"] == 200 and body["has_more"] is True
+    assert [task["title"] for task in body["tasks"]] == ["Task 0"] and "user_email" not in body["tasks"][0]
+
+    expired = _encode_sync_token(False, datetime(2000, 1, 1, tzinfo=timezone.utc), None)
+    event["queryStringParameters"] = {"since": expired}
+    assert run(task_handlers.get_task_changes(event, None))["statusCode"] == 410
+    event["queryStringParameters"] = {"since": "garbage"}
+    assert run(task_handlers.get_task_changes(event, None))["statusCode"] == 400
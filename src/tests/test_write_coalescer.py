@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from core.entities.task import Task
+from infrastructure.database.in_memory_mongo import InMemoryDatabase
+from infrastructure.database.mongo_connection import MongoConnection
+from infrastructure.database.mongo_repositories import MongoTaskRepository
+from infrastructure.database.write_coalescer import WriteCoalescer
+
+
+@pytest.fixture
+def db():
+    database = InMemoryDatabase()
+    MongoConnection.use_database(database)
+    yield database
+    MongoConnection.use_database(None)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def create_concurrently(repository, titles, user_emails=("a@example.com",)):
+    async def create():
+        return await asyncio.gather(*(
+            repository.create_task(Task(title=title, user_email=user_emails[i % len(user_emails)]))
+            for i, title in enumerate(titles)
+        ), return_exceptions=True)
+    return run(create())
+
+
+def test_concurrent_creates_share_one_insert(db):
+    repository = MongoTaskRepository(insert_delay_ms=5)
+    created = create_concurrently(repository, ["A", "B", "C"], ("a@example.com", "b@example.com"))
+    assert [task.title for task in created] == ["A", "B", "C"]
+    assert len({task.id for task in created}) == 3
+    assert db.commands == [("insert", "tasks"), ("update", "task_list_versions")]
+    assert run(repository.get_list_version("a@example.com")) == 1
+    assert [task.id for task in run(repository.get_user_tasks("a@example.com"))] == [created[0].id, created[2].id]
+
+
+def test_batches_flush_when_full(db):
+    repository = MongoTaskRepository(insert_delay_ms=1000, insert_max_batch=2)
+    created = create_concurrently(repository, ["A", "B", "C", "D"])
+    assert all(isinstance(task, Task) for task in created)
+    assert repository.insert_coalescer.batches == 2
+    assert db.commands.count(("insert", "tasks")) == 2
+
+
+def test_a_failed_insert_fails_only_its_caller(db):
+    run(db.tasks.create_index([("title", 1)], unique=True))
+    repository = MongoTaskRepository(insert_delay_ms=5)
+    create_concurrently(repository, ["Taken"])
+    created = create_concurrently(repository, ["Free", "Taken", "Also free"])
+    assert isinstance(created[1], DuplicateKeyError)
+    assert [task.title for task in (created[0], created[2])] == ["Free", "Also free"]
+    assert [task.title for task in run(repository.get_user_tasks("a@example.com"))] == ["Taken", "Free", "Also free"]
+
+
+def test_a_failed_flush_fails_every_caller():
+    async def flush(items):
+        raise ConnectionError("down")
+
+    coalescer = WriteCoalescer(flush, max_delay_s=0.001)
+
+    async def submit():
+        return await asyncio.gather(coalescer.submit(1), coalescer.submit(2), return_exceptions=True)
+    assert [type(outcome) for outcome in run(submit())] == [ConnectionError, ConnectionError]
+
+
+def test_a_cancelled_caller_does_not_affect_the_batch():
+    async def flush(items):
+        await asyncio.sleep(0.01)
+        return [item * 2 for item in items]
+
+    coalescer = WriteCoalescer(flush, max_delay_s=0.001)
+
+    async def submit():
+        first = asyncio.ensure_future(coalescer.submit(1))
+        second = asyncio.ensure_future(coalescer.submit(2))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        return await second
+    assert run(submit()) == 4
+    # The coalescer follows the caller to a new event loop
+    assert run(coalescer.submit(3)) == 6